@@ -1,5 +1,5 @@
-from pydantic import BaseModel, HttpUrl, Field
-from typing import Any, List, Literal
+from pydantic import AfterValidator, BaseModel, HttpUrl, Field, PlainSerializer
+from typing import Annotated, Any, Dict, Iterator, List, Literal, Mapping, Optional
 from datetime import date, datetime
 
 # ---------------- Reusable type ----------------
@@ -79,10 +79,37 @@ class GetParticipantsRequestModel(BaseModel):
     # )
     
 
+class TemplateVars(Mapping[str, str]):
+    """Read-only, hashable mapping of placeholder values (keeps ParticipantItem hashable)."""
+
+    __slots__ = ("_values",)
+
+    def __init__(self, values: Mapping[str, str]):
+        self._values = dict(values)
+
+    def __getitem__(self, key: str) -> str:
+        return self._values[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._values)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __hash__(self) -> int:
+        return hash(frozenset(self._values.items()))
+
+    def __repr__(self) -> str:
+        return f"TemplateVars({self._values!r})"
+
+
 class ParticipantItem(BaseModel):
     id: str
     phone_number: str
 
+    # values for the message's {placeholders}, mass messages only
+    vars: Optional[Annotated[Dict[str, str], AfterValidator(TemplateVars), PlainSerializer(dict)]] = None
+
     model_config = {
         "frozen": True  # makes it hashable
     }
@@ -92,6 +119,14 @@ class SendMassMessagesRequestModel(BaseModel):
     message: str
     participants: List[ParticipantItem]
 
+    # per_recipient: schedule every message upfront
+    # rolling: store the plan, jobs are created only for the next window (for big/long sends)
+    # dispatcher: store the plan, a single job per batch sends it in scheduled order
+    mode: Literal["per_recipient", "rolling", "dispatcher"] = "per_recipient"
+
+    # Skip recipients who already got the identical (rendered) message within this many hours
+    suppress_within_hours: Optional[float] = Field(None, gt=0, le=168)
+
 
 class ConnectionStateResponse(BaseModel):
     status: Literal[ # connected, not_connected, evolution_connection_error
@@ -99,6 +134,7 @@ class ConnectionStateResponse(BaseModel):
         "not_connected",
         "evolution_connection_error"
     ]
+    checked_at: Optional[datetime] = None  # when the state was last probed
     
 
 class QRCodeResponseModel(BaseModel):
@@ -107,6 +143,19 @@ class QRCodeResponseModel(BaseModel):
     create_response: Any
     connect_response: Any
     
-class ConnectRequestModel(BaseModel):
+class InstanceSettingsModel(BaseModel):
+    # Share of the mass-message recipients (weighted round-robin) and send budget of the number
+    weight: int = Field(1, ge=1, le=100)
+    messages_per_minute: Optional[int] = Field(None, gt=0)  # default: the planner's MESSAGES_PER_MINUTE
+    messages_per_hour: Optional[int] = Field(None, gt=0)    # default: the planner's MESSAGES_PER_HOUR
+    enabled: bool = True
+
+
+class RegisterInstanceRequestModel(InstanceSettingsModel):
+    number: str
+
+
+class ConnectRequestModel(InstanceSettingsModel):
     api_key : str
-    number : str
\ No newline at end of file
+    number : str
+    instance_name: Optional[str] = None  # default: the default instance (evo_request.INSTANCE)
\ No newline at end of file
@@ -1,5 +1,6 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
 from routes.group_creates import group_creates_router
 from routes.job import job_router
@@ -7,9 +8,14 @@ from routes.test_routes import test_router
 from routes.group_participants import participants_router
 from routes.send_mass_messages import messages_router
 from routes.connection import connection_router
+from routes.evolution import evolution_router
+from routes.batch import batch_router
 
 
 from api.setup.setup import setup
+from shared.domain_errors import WhatsappNotConnectedError
+from whatsapp.mass_messages.dispatcher import stop_mass_message_dispatchers
+from whatsapp.mass_messages.status_writer import mass_message_status_writer
 
 
 app = FastAPI()
@@ -22,10 +28,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 # Register routers
-for router in [group_creates_router, job_router, test_router, participants_router, messages_router, connection_router ]:
+for router in [group_creates_router, job_router, test_router, participants_router, messages_router, connection_router, evolution_router, batch_router ]:
     app.include_router(router)
 
 
+@app.exception_handler(WhatsappNotConnectedError)
+def whatsapp_not_connected_handler(request: Request, e: WhatsappNotConnectedError):
+    # raised by validate_whatsapp_connection before anything is scheduled or sent
+    return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content={"detail": e.message})
+
+
 @app.on_event("startup")
 def startup_event():
     setup(app)
@@ -34,6 +46,10 @@ def startup_event():
 
 @app.on_event("shutdown")
 def shutdown_event():
+    print("Stopping mass message dispatchers...")
+    stop_mass_message_dispatchers()
     print("Shutting down scheduler...")
     app.state.scheduler.shutdown()
-    print("Scheduler shut down.")
\ No newline at end of file
+    print("Scheduler shut down.")
+    # after the scheduler: running send jobs have finished and recorded their results
+    print(f"Flushed {mass_message_status_writer.flush()} pending mass message results.")
\ No newline at end of file
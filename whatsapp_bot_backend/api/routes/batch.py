@@ -0,0 +1,20 @@
+from fastapi import APIRouter, Depends, Query, status
+
+from api.dependencies import get_cursor_dep
+from job_and_listener.job_batch.stats import PROGRESS_WINDOW_MINUTES
+from job_and_listener.service import get_batch_progress_service
+
+batch_router = APIRouter(prefix="/batch")
+
+
+@batch_router.get("/{batch_id:path}/progress", status_code=status.HTTP_200_OK)
+def get_batch_progress_endpoint(
+    batch_id: str,
+    window_minutes: int = Query(PROGRESS_WINDOW_MINUTES, ge=1, le=24 * 60),
+    cur = Depends(get_cursor_dep),
+):
+    """
+    Job/message counts, throughput over the last `window_minutes` and ETA of a batch.
+    Served from incrementally maintained counters: cost doesn't depend on the batch size.
+    """
+    return get_batch_progress_service(batch_id, cur, window_minutes)
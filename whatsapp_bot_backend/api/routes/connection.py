@@ -1,22 +1,77 @@
-from fastapi import APIRouter
-from api.base_models import ConnectRequestModel, ConnectionStateResponse, QRCodeResponseModel
-from whatsapp.core.whatsapp_connection import connect_service, connection_state_service
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from api.base_models import (
+    ConnectRequestModel,
+    ConnectionStateResponse,
+    QRCodeResponseModel,
+    RegisterInstanceRequestModel,
+)
+from api.dependencies import get_cursor_dep
+from whatsapp.core.instances import WhatsappInstance
+from whatsapp.core.whatsapp_connection import (
+    connect_service,
+    connection_monitor,
+    list_instances_service,
+    register_instance_service,
+    registered_instance_monitor,
+)
 
 connection_router = APIRouter( prefix="/connection",)
 
+# ConnectRequestModel fields that aren't instance settings
+CONNECT_ONLY_FIELDS = {"api_key", "number", "instance_name"}
+
+
 @connection_router.get(
     "/connection_state",
     response_model=ConnectionStateResponse,
 )
-def connection_state_route():
+def connection_state_route(fresh: bool = False, instance: Optional[str] = None, cur = Depends(get_cursor_dep)):
+    """
+    Last known connection state from the background poller (of the default instance, or of the
+    registered `instance`). `?fresh=true` forces a probe of Evolution before answering.
+    """
+    monitor = registered_instance_monitor(cur, instance) if instance else connection_monitor
+    if monitor is None:
+        raise HTTPException(status_code=404, detail=f"Instance {instance} is not registered")
+    status, checked_at = monitor.state(fresh=fresh)
     return {
-        "status": connection_state_service()
+        "status": status,
+        "checked_at": checked_at,
     }
 
 
 @connection_router.post("/connect", response_model=QRCodeResponseModel)
-def connect_route(payload: ConnectRequestModel):
+def connect_route(payload: ConnectRequestModel, cur = Depends(get_cursor_dep)):
+    """
+    (Re)create an Evolution instance for `number` and register it as a mass-message sender.
+    Call once per WhatsApp number, with a distinct `instance_name` for every number but the default one.
+    """
     return connect_service(
+        cur,
         number=payload.number,
         api_key=payload.api_key,
-    )
\ No newline at end of file
+        instance_name=payload.instance_name,
+        **payload.model_dump(exclude=CONNECT_ONLY_FIELDS, exclude_none=True),
+    )
+
+
+@connection_router.get("/instances")
+def list_instances_route(cur = Depends(get_cursor_dep)):
+    """
+    Registered mass-message senders with their settings and connection state.
+    With none registered, mass messages go through the default instance.
+    """
+    return list_instances_service(cur)
+
+
+@connection_router.put("/instances/{instance_name}")
+def register_instance_route(instance_name: str, payload: RegisterInstanceRequestModel, cur = Depends(get_cursor_dep)):
+    """
+    Register (or update) an instance that is already connected in Evolution, e.g. the default
+    instance once other numbers are added. `enabled: false` stops new sends through it.
+    """
+    return register_instance_service(
+        cur, WhatsappInstance(name=instance_name, **payload.model_dump(exclude_none=True))
+    )
@@ -0,0 +1,64 @@
+"""
+Operational endpoints for the Evolution API client (circuit breaker state, lookup caches, request coalescing,
+send-rate lanes, mass-message sender pool).
+"""
+
+from fastapi import APIRouter, status
+
+from whatsapp.core.circuit_breaker import evolution_breaker
+from whatsapp.core.group_cache import group_cache_stats
+from whatsapp.core.lane_rate_limit import lane_rate_limiter
+from whatsapp.core.single_flight import evo_single_flight_stats
+from whatsapp.mass_messages.sender_pool import sender_pool
+
+evolution_router = APIRouter(prefix="/evolution")
+
+
+@evolution_router.get("/circuit_breaker", status_code=status.HTTP_200_OK)
+def circuit_breaker_endpoint():
+    """
+    Current state (closed / open / half_open) and counters of the Evolution circuit breaker.
+    """
+    return evolution_breaker.snapshot()
+
+
+@evolution_router.post("/circuit_breaker/reset", status_code=status.HTTP_200_OK)
+def reset_circuit_breaker_endpoint():
+    """
+    Force the breaker closed (e.g. right after Evolution was restarted).
+    """
+    evolution_breaker.reset()
+    return evolution_breaker.snapshot()
+
+
+@evolution_router.get("/cache_stats", status_code=status.HTTP_200_OK)
+def cache_stats_endpoint():
+    """
+    Hit/miss counters, size and evictions of the group lookup caches.
+    """
+    return group_cache_stats()
+
+
+@evolution_router.get("/single_flight", status_code=status.HTTP_200_OK)
+def single_flight_endpoint():
+    """
+    GET requests made to Evolution vs. identical concurrent GETs that shared an in-flight request.
+    """
+    return evo_single_flight_stats.snapshot()
+
+
+@evolution_router.get("/send_lanes", status_code=status.HTTP_200_OK)
+def send_lanes_endpoint():
+    """
+    Send rate, available tokens and throttled sends (waited in thread / deferred) of each priority lane,
+    per instance.
+    """
+    return lane_rate_limiter.snapshot()
+
+
+@evolution_router.get("/sender_pool", status_code=status.HTTP_200_OK)
+def sender_pool_endpoint():
+    """
+    Instances mass messages are spread over: weight, connection, sends picked and times skipped for budget.
+    """
+    return sender_pool.snapshot()
@@ -1,8 +1,12 @@
-from fastapi import APIRouter, Depends, status
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 
 from api.dependencies import get_cursor_dep, get_scheduler
-from whatsapp.mass_messages.service import send_mass_messages_service
+from whatsapp.mass_messages.service import retry_failed_mass_messages_service, send_mass_messages_service
+from whatsapp.mass_messages.upload import upload_mass_messages_service
 from api.base_models import SendMassMessagesRequestModel
+from shared.domain_errors import MessageTemplateError, RecipientUploadError
 
 messages_router = APIRouter()
 
@@ -13,4 +17,45 @@ def send_mass_messages_route(
     cur = Depends(get_cursor_dep),
     scheduler = Depends(get_scheduler)
 ):
-    return send_mass_messages_service(scheduler, cur, payload)
+    try:
+        return send_mass_messages_service(scheduler, cur, payload)
+    except MessageTemplateError as e:
+        # get_cursor commits on exit, even after an error
+        cur.rollback()
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+@messages_router.post("/send_mass_messages/upload", status_code=status.HTTP_201_CREATED)
+async def upload_mass_messages_route(
+    request: Request,
+    name: str,
+    message: str,
+    mode: Literal["per_recipient", "rolling", "dispatcher"] = "rolling",
+    suppress_within_hours: Optional[float] = Query(None, gt=0, le=168),
+    cur = Depends(get_cursor_dep),
+    scheduler = Depends(get_scheduler)
+):
+    """
+    Same as /send_mass_messages, but the recipients are streamed as the request body
+    (text/csv or application/x-ndjson, see whatsapp.mass_messages.upload) instead of a JSON list.
+    """
+    try:
+        return await upload_mass_messages_service(
+            scheduler, cur, request.stream(), request.headers.get("content-type"), name, message, mode,
+            suppress_within_hours,
+        )
+    except (RecipientUploadError, MessageTemplateError) as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+@messages_router.post("/send_mass_messages/{batch_id:path}/retry_failed", status_code=status.HTTP_200_OK)
+def retry_failed_mass_messages_route(
+    batch_id: str,
+    cur = Depends(get_cursor_dep),
+    scheduler = Depends(get_scheduler)
+):
+    """
+    Send the batch's message again only to recipients whose send failed or never happened,
+    at fresh send times under the global rate limit.
+    """
+    return retry_failed_mass_messages_service(scheduler, cur, batch_id)
@@ -1,11 +1,15 @@
 
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
+from apscheduler.jobstores.memory import MemoryJobStore
 from db.connection_str import connection_main
 import logging
 from typing import Optional, Callable, Any
 
 from job_and_listener.listener import listener
+from job_and_listener.job.core.create.create_job import INTERNAL_JOBSTORE
+from job_and_listener.job_priority import build_lane_executors
+from job_and_listener.scheduler_registry import set_running_scheduler
 
 
 def _setup_scheduler_logger(use_logging: bool = True, filename: str = "app.log") -> None:
@@ -28,10 +32,12 @@ def _setup_scheduler_core(connection_url: str, listener_fn: Optional[Callable[[A
     Mirrors your original jobstores/listener setup.
     """
     jobstores = {
-        "default": SQLAlchemyJobStore(url=connection_url)
+        "default": SQLAlchemyJobStore(url=connection_url),
+        INTERNAL_JOBSTORE: MemoryJobStore(),  # app's own periodic jobs, not persisted
     }
 
-    scheduler = BackgroundScheduler(jobstores=jobstores)
+    # one executor (thread pool) per priority lane, see job_and_listener.job_priority
+    scheduler = BackgroundScheduler(jobstores=jobstores, executors=build_lane_executors())
 
     if listener_fn is not None:
         scheduler.add_listener(listener_fn)
@@ -58,6 +64,7 @@ def setup_scheduler(use_logging: bool = True) -> BackgroundScheduler:
 
     # 3) start scheduler (now that logging is configured)
     scheduler.start()
+    set_running_scheduler(scheduler)
     log("Scheduler started")
     return scheduler
 
@@ -12,6 +12,8 @@ startup event. It:
   • configures and starts the BackgroundScheduler  
   • attaches the scheduler and database engine to `app.state`  
   • ensures all required SQLAlchemy tables exist
+  • registers the app's internal periodic jobs (mass-message materializer, WhatsApp connection poller,
+    mass-message status writer, batch_stats_minutes pruner)
 
 Split into small helper functions for clarity:
   - `_setup_scheduler_logger` manages logging configuration  
@@ -26,11 +28,21 @@ from db.connection_str import connection_main
 from sqlalchemy import create_engine
 from db.create_tables import create_tables
 from .scheduler_setup import setup_scheduler
+from whatsapp.mass_messages.materializer import setup_mass_messages_materializer
+from whatsapp.core.whatsapp_connection import setup_connection_monitor
+from whatsapp.mass_messages.status_writer import setup_mass_message_status_writer
+from job_and_listener.job_batch.core import setup_batch_stats_pruner
+from whatsapp.mass_messages.suppression import setup_recent_sends_pruner
 
 def setup(app):
     app.state.scheduler = setup_scheduler()
     app.state.engine = create_engine(connection_main)
     create_tables( engine=app.state.engine  )
+    setup_mass_messages_materializer(app.state.scheduler)
+    setup_connection_monitor(app.state.scheduler)
+    setup_mass_message_status_writer(app.state.scheduler)
+    setup_batch_stats_pruner(app.state.scheduler)
+    setup_recent_sends_pruner(app.state.scheduler)
 
 
 
@@ -0,0 +1,101 @@
+"""
+Benchmark: one INSERT per row (old insert_to_mass_messages_sql loop) vs db.bulk.bulk_insert
+(multi-row VALUES and COPY FROM STDIN) at 100, 1k and 10k rows.
+
+Writes to a temporary table shaped like mass_messages, so nothing persistent is touched:
+
+    cd whatsapp_bot_backend && python -m benchmarks.bulk_insert
+    cd whatsapp_bot_backend && python -m benchmarks.bulk_insert --url sqlite://   # no Postgres: loop vs VALUES only
+"""
+
+import argparse
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from db.bulk import BULK_CHUNK_SIZE, BULK_METHOD_COPY, BULK_METHOD_VALUES, bulk_insert
+from db.connection_str import connection_main
+from shared.timezone import TIMEZONE
+
+
+TABLE = "bench_mass_messages"
+COLUMNS = ["batch_id", "recipient_id", "recipient_phone_number", "job_info_id", "scheduled_at"]
+
+
+def _rows(n):
+    start = datetime.now(TIMEZONE)
+    return [
+        {
+            "batch_id": "bench",
+            "recipient_id": str(i),
+            "recipient_phone_number": f"972{i:09d}",
+            "job_info_id": None,
+            "scheduled_at": start + timedelta(seconds=90 * i),
+        }
+        for i in range(n)
+    ]
+
+
+def _insert_loop(cur, rows, chunk_size):
+    insert_sql = text(f"""
+        INSERT INTO {TABLE} ({", ".join(COLUMNS)})
+        VALUES ({", ".join(":" + c for c in COLUMNS)})
+    """)
+    for row in rows:
+        cur.execute(insert_sql, row)
+
+
+def _bulk_values(cur, rows, chunk_size):
+    bulk_insert(cur, TABLE, COLUMNS, rows, chunk_size=chunk_size, method=BULK_METHOD_VALUES)
+
+
+def _bulk_copy(cur, rows, chunk_size):
+    bulk_insert(cur, TABLE, COLUMNS, rows, chunk_size=chunk_size, method=BULK_METHOD_COPY)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=connection_main)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--chunk-size", type=int, default=BULK_CHUNK_SIZE)
+    parser.add_argument("--repeat", type=int, default=3, help="runs per case; the best is reported (first run compiles statements)")
+    args = parser.parse_args()
+
+    engine = create_engine(args.url)
+    cur = sessionmaker(bind=engine, autoflush=False)()  # one session: the temp table lives on its connection
+
+    methods = [("row-by-row INSERT", _insert_loop), ("bulk VALUES", _bulk_values)]
+    if engine.dialect.name == "postgresql":
+        methods.append(("bulk COPY", _bulk_copy))
+
+    cur.execute(text(f"CREATE TEMPORARY TABLE {TABLE} (batch_id VARCHAR(100), recipient_id VARCHAR(100), "
+                     f"recipient_phone_number VARCHAR(100), job_info_id VARCHAR(200), scheduled_at TIMESTAMP WITH TIME ZONE)"))
+    cur.commit()
+
+    try:
+        for n in args.sizes:
+            rows = _rows(n)
+            for label, fn in methods:
+                elapsed = float("inf")
+                for _ in range(args.repeat):
+                    cur.execute(text(f"DELETE FROM {TABLE}"))
+                    cur.commit()
+
+                    start = time.perf_counter()
+                    fn(cur, rows, args.chunk_size)
+                    cur.commit()
+                    elapsed = min(elapsed, time.perf_counter() - start)
+
+                    count = cur.execute(text(f"SELECT count(*) FROM {TABLE}")).scalar()
+                    assert count == n, f"{label}: expected {n} rows, got {count}"
+
+                print(f"{n:>6} rows  {label:<20} {elapsed * 1000:9.1f} ms  ->  {n / elapsed:10.0f} rows/s")
+    finally:
+        cur.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
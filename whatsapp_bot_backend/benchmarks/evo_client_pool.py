@@ -0,0 +1,57 @@
+"""
+Benchmark: one new requests.Session per Evolution call (old behaviour) vs the pooled,
+keep-alive session used by evo_request.
+
+Runs against the local fake Evolution server (fake_evolution.server), so no Evolution instance is needed:
+
+    cd whatsapp_bot_backend && python -m benchmarks.evo_client_pool --requests 2000 --threads 10
+"""
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from fake_evolution.server import EndpointFaults, FakeEvolutionConfig, start_fake_evolution
+from whatsapp.core import evo_request
+
+
+def _new_session_per_call(url):
+    session = requests.Session()
+    session.send(session.prepare_request(requests.Request("GET", url)))
+
+
+def _pooled_session(url):
+    session = evo_request.get_evo_session()
+    session.send(session.prepare_request(requests.Request("GET", url)),
+                 timeout=(evo_request.CONNECT_TIMEOUT, evo_request.READ_TIMEOUT))
+
+
+def _run(label, fn, url, total, threads):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(lambda _: fn(url), range(total)))
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {total} requests in {elapsed:6.2f}s  ->  {total / elapsed:8.1f} req/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.0, help="injected server latency per request (seconds)")
+    args = parser.parse_args()
+
+    server, base_url = start_fake_evolution(FakeEvolutionConfig(faults={"*": EndpointFaults(latency=args.latency)}))
+    url = f"{base_url}/instance/connectionState/{evo_request.INSTANCE}"
+
+    try:
+        _run("new Session per call", _new_session_per_call, url, args.requests, args.threads)
+        _run("pooled keep-alive Session", _pooled_session, url, args.requests, args.threads)
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
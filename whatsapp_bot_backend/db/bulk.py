@@ -0,0 +1,196 @@
+"""
+Bulk writes for tables filled from big recipient/participant lists.
+
+`bulk_insert` sends rows in chunks, either as multi-row `INSERT ... VALUES (...), (...)`
+statements (default, works inside the caller's session/transaction like any other statement)
+or through Postgres `COPY ... FROM STDIN` on the session's own connection (same transaction).
+`bulk_update` updates many rows by key with one `UPDATE ... FROM (VALUES ...)` per chunk.
+"""
+
+import re
+from functools import lru_cache
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+from sqlalchemy import text
+
+
+# Rows per statement / COPY round. Multi-row VALUES is also capped by Postgres' 65535 bind parameters.
+BULK_CHUNK_SIZE = 1000
+MAX_BIND_PARAMS = 65535
+
+BULK_METHOD_VALUES = "values"
+BULK_METHOD_COPY = "copy"
+
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+def _check_identifiers(table: str, columns: Sequence[str]) -> None:
+    # table/column names are interpolated into the SQL: only plain identifiers are accepted
+    for name in (table, *columns):
+        if not _IDENTIFIER.match(name):
+            raise ValueError(f"Invalid SQL identifier: {name!r}")
+
+
+def _chunks(rows: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    it = iter(rows)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+@lru_cache(maxsize=128)
+def _insert_values_sql(table: str, columns: Tuple[str, ...], n_rows: int):
+    """
+    Multi-row INSERT for `n_rows` rows. Memoized, so every full chunk reuses one TextClause
+    (and SQLAlchemy's compiled-statement cache) instead of re-parsing thousands of placeholders.
+    """
+    values = ", ".join(
+        "(" + ", ".join(f":p{i}_{j}" for j in range(len(columns))) + ")"
+        for i in range(n_rows)
+    )
+    return text(f"INSERT INTO {table} ({', '.join(columns)}) VALUES {values}")
+
+
+def _power_of_two_parts(chunk: List[Dict[str, Any]]) -> Iterator[List[Dict[str, Any]]]:
+    """Split a partial chunk into power-of-two sized parts (13 -> 8 + 4 + 1), so only a handful of
+    statement shapes are ever compiled."""
+    start = 0
+    while start < len(chunk):
+        size = 1 << ((len(chunk) - start).bit_length() - 1)
+        yield chunk[start:start + size]
+        start += size
+
+
+def _insert_values_chunk(cur, table: str, columns: Tuple[str, ...], chunk: List[Dict[str, Any]]) -> None:
+    params = {
+        f"p{i}_{j}": row.get(column)
+        for i, row in enumerate(chunk)
+        for j, column in enumerate(columns)
+    }
+    cur.execute(_insert_values_sql(table, columns, len(chunk)), params)
+
+
+def _copy_chunks(cur, table: str, columns: Sequence[str], chunks: Iterator[List[Dict[str, Any]]]) -> None:
+    # The session's own DBAPI (psycopg 3) connection, so COPY runs in the caller's transaction
+    dbapi_connection = cur.connection().connection.driver_connection
+
+    with dbapi_connection.cursor() as raw_cursor:
+        with raw_cursor.copy(f"COPY {table} ({', '.join(columns)}) FROM STDIN") as copy:
+            for chunk in chunks:
+                for row in chunk:
+                    copy.write_row([row.get(column) for column in columns])
+
+
+def bulk_insert(
+    cur,
+    table: str,
+    columns: Sequence[str],
+    rows: Iterable[Dict[str, Any]],
+    chunk_size: int = BULK_CHUNK_SIZE,
+    method: str = BULK_METHOD_VALUES,
+) -> None:
+    """
+    Insert `rows` (dicts keyed by column name; missing keys are NULL) into `table`.
+
+    Args:
+        cur: SQLAlchemy session (as yielded by get_cursor)
+        table: table name
+        columns: columns to fill, in order
+        rows: any iterable of dicts, consumed lazily one chunk at a time
+        chunk_size: rows per INSERT statement / per COPY write round
+        method: BULK_METHOD_VALUES (multi-row INSERT) or BULK_METHOD_COPY (COPY FROM STDIN, Postgres only)
+    """
+    _check_identifiers(table, columns)
+
+    if method == BULK_METHOD_COPY:
+        _copy_chunks(cur, table, columns, _chunks(rows, chunk_size))
+        return
+
+    if method != BULK_METHOD_VALUES:
+        raise ValueError(f"Unknown bulk insert method: {method!r}")
+
+    columns = tuple(columns)
+    chunk_size = max(1, min(chunk_size, MAX_BIND_PARAMS // len(columns)))
+    for chunk in _chunks(rows, chunk_size):
+        parts = [chunk] if len(chunk) == chunk_size else _power_of_two_parts(chunk)
+        for part in parts:
+            _insert_values_chunk(cur, table, columns, part)
+
+
+@lru_cache(maxsize=128)
+def _update_from_values_sql(table: str, key_columns: Tuple[str, ...], value_columns: Tuple[str, ...],
+                            casts: Tuple[Tuple[str, str], ...], returning_previous: Tuple[str, ...], n_rows: int):
+    cast_of = dict(casts)
+    columns = key_columns + value_columns
+
+    def placeholder(i, j, column):
+        return f"CAST(:p{i}_{j} AS {cast_of[column]})" if column in cast_of else f":p{i}_{j}"
+
+    values = ", ".join(
+        "(" + ", ".join(placeholder(i, j, column) for j, column in enumerate(columns)) + ")"
+        for i in range(n_rows)
+    )
+    assignments = ", ".join(f"{column} = v.{column}" for column in value_columns)
+    matches = " AND ".join(f"t.{column} = v.{column}" for column in key_columns)
+
+    sql = (
+        f"UPDATE {table} AS t SET {assignments} "
+        f"FROM (VALUES {values}) AS v ({', '.join(columns)})"
+    )
+    if not returning_previous:
+        return text(f"{sql} WHERE {matches}")
+
+    # Joined again as `prev`: in Postgres its columns hold the values from before this UPDATE
+    prev_matches = " AND ".join(f"prev.{column} = t.{column}" for column in key_columns)
+    returning = ", ".join([f"t.{column}" for column in key_columns] + [f"prev.{column} AS previous_{column}" for column in returning_previous])
+    return text(f"{sql}, {table} AS prev WHERE {matches} AND {prev_matches} RETURNING {returning}")
+
+
+def bulk_update(
+    cur,
+    table: str,
+    key_columns: Sequence[str],
+    value_columns: Sequence[str],
+    rows: Iterable[Dict[str, Any]],
+    casts: Dict[str, str] = None,
+    chunk_size: int = BULK_CHUNK_SIZE,
+    returning_previous: Sequence[str] = (),
+) -> List[Any]:
+    """
+    Update many rows, each matched by `key_columns`, with one `UPDATE ... FROM (VALUES ...)` per chunk.
+
+    Args:
+        rows: dicts holding the key and value columns
+        casts: column -> SQL type for VALUES entries whose type Postgres can't infer
+            (e.g. {"success": "boolean", "fail_reason": "json"})
+        returning_previous: columns whose value from before the update is returned, as
+            `previous_<column>`, with the key columns of every updated row (Postgres only)
+
+    Returns:
+        The updated rows' keys and previous values if `returning_previous` is given, else [].
+    """
+    key_columns, value_columns = tuple(key_columns), tuple(value_columns)
+    returning_previous = tuple(returning_previous)
+    columns = key_columns + value_columns
+    _check_identifiers(table, columns + returning_previous)
+    casts = tuple(sorted((casts or {}).items()))
+
+    updated = []
+    chunk_size = max(1, min(chunk_size, MAX_BIND_PARAMS // len(columns)))
+    for chunk in _chunks(rows, chunk_size):
+        parts = [chunk] if len(chunk) == chunk_size else _power_of_two_parts(chunk)
+        for part in parts:
+            params = {
+                f"p{i}_{j}": row.get(column)
+                for i, row in enumerate(part)
+                for j, column in enumerate(columns)
+            }
+            result = cur.execute(
+                _update_from_values_sql(table, key_columns, value_columns, casts, returning_previous, len(part)), params
+            )
+            if returning_previous:
+                updated.extend(result.fetchall())
+    return updated
@@ -1,6 +1,6 @@
 def create_tables(engine):
     
-    from db.sqlalchemy_models import GroupInfo, Participants, MassMessages, JobBatch, JobInformation  # import your models
+    from db.sqlalchemy_models import GroupInfo, Participants, MassMessages, JobBatch, JobInformation, SendSlots, MassMessageBatches, BatchStats, BatchStatsMinutes, RecentSends, WhatsappInstances  # import your models
 
     # Only create these two tables
     JobBatch.__table__.create(bind=engine, checkfirst=True)
@@ -8,4 +8,35 @@ def create_tables(engine):
     JobInformation.__table__.create(bind=engine, checkfirst=True)
     GroupInfo.__table__.create(bind=engine, checkfirst=True)
     MassMessages.__table__.create(bind=engine, checkfirst=True)
+    SendSlots.__table__.create(bind=engine, checkfirst=True)
+    MassMessageBatches.__table__.create(bind=engine, checkfirst=True)
+    BatchStats.__table__.create(bind=engine, checkfirst=True)
+    BatchStatsMinutes.__table__.create(bind=engine, checkfirst=True)
+    RecentSends.__table__.create(bind=engine, checkfirst=True)
+    WhatsappInstances.__table__.create(bind=engine, checkfirst=True)
+
+    add_missing_columns(engine)
+
+
+# Columns added after their table was first created. `create(checkfirst=True)` doesn't alter
+# existing tables, so they are added here (idempotent).
+ADDED_COLUMNS_DDL = [
+    "ALTER TABLE mass_messages ADD COLUMN IF NOT EXISTS scheduled_at TIMESTAMP WITH TIME ZONE",
+    "CREATE INDEX IF NOT EXISTS ix_mass_messages_scheduled_at ON mass_messages (scheduled_at)",
+    "ALTER TABLE mass_messages ADD COLUMN IF NOT EXISTS attempted_at TIMESTAMP WITH TIME ZONE",
+    "ALTER TABLE mass_messages ADD COLUMN IF NOT EXISTS attempts INTEGER NOT NULL DEFAULT 0",
+    "CREATE INDEX IF NOT EXISTS ix_mass_messages_dispatch ON mass_messages (batch_id, scheduled_at) WHERE attempted_at IS NULL",
+    "ALTER TABLE mass_messages ADD COLUMN IF NOT EXISTS template_vars JSON",
+    "CREATE INDEX IF NOT EXISTS ix_mass_messages_batch_success ON mass_messages (batch_id, success)",
+    "ALTER TABLE send_slots ADD COLUMN IF NOT EXISTS pool VARCHAR(20) NOT NULL DEFAULT 'bulk'",
+    "CREATE INDEX IF NOT EXISTS ix_send_slots_pool_slot_at ON send_slots (pool, slot_at)",
+]
+
+
+def add_missing_columns(engine):
+    from sqlalchemy import text
+
+    with engine.begin() as conn:
+        for ddl in ADDED_COLUMNS_DDL:
+            conn.execute(text(ddl))
     
\ No newline at end of file
@@ -1,5 +1,5 @@
 # SQLAlchemy core imports
-from sqlalchemy import Column, Integer, String, Text, Boolean, JSON, ARRAY, ForeignKey, DateTime, func, PrimaryKeyConstraint
+from sqlalchemy import Column, Integer, String, Text, Boolean, JSON, ARRAY, ForeignKey, DateTime, func, PrimaryKeyConstraint, Index, text
 from sqlalchemy.orm import relationship, declarative_base
 from sqlalchemy.dialects.postgresql import ENUM as PG_ENUM
 
@@ -55,11 +55,68 @@ class MassMessages(Base):
         index=True,
     )
 
+    # Planned send time (from the send-rate planner)
+    scheduled_at = Column(DateTime(timezone=True), nullable=True, index=True)
+
+    # Values for the batch message's {placeholders} (see whatsapp.mass_messages.template)
+    template_vars = Column(JSON, nullable=True)
+
+    # Dispatcher mode: set when a dispatcher claims the row, before sending
+    attempted_at = Column(DateTime(timezone=True), nullable=True)
+    attempts = Column(Integer, nullable=False, server_default="0")
+
     success = Column(Boolean, nullable=True, default=False)
     fail_reason = Column(JSON, nullable=True)
     
     __table_args__ = (
         PrimaryKeyConstraint("batch_id", "recipient_id"),
+        # next due, unclaimed rows of a batch (dispatcher)
+        Index("ix_mass_messages_dispatch", "batch_id", "scheduled_at", postgresql_where=text("attempted_at IS NULL")),
+        # failed / unsent rows of a batch (retry_failed)
+        Index("ix_mass_messages_batch_success", "batch_id", "success"),
+    )
+
+
+class MassMessageBatches(Base):
+    """
+    One row per mass-message batch: the message is stored here once instead of in every job.
+    """
+    __tablename__ = "mass_message_batches"
+
+    batch_id = Column(String(100), ForeignKey("job_batch.name", ondelete="CASCADE"), primary_key=True)
+    name = Column(String(100), nullable=False)
+    message = Column(Text, nullable=False)
+
+    # "per_recipient": all jobs are created upfront
+    # "rolling": jobs are materialized periodically for the next window only
+    # "dispatcher": one job per batch sends every recipient in order of scheduled_at
+    mode = Column(String(20), nullable=False, server_default="per_recipient")
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+
+class SendSlots(Base):
+    """
+    Send slots reserved by the global send-rate planner, across all batches.
+    """
+    __tablename__ = "send_slots"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    slot_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+    # Budget the slot counts against (see whatsapp.send_slots.planner.SLOT_POOL_BUDGETS)
+    pool = Column(String(20), nullable=False, server_default="bulk")
+
+    batch_id = Column(
+        String(100),
+        ForeignKey("job_batch.name", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+
+
+    __table_args__ = (
+        Index("ix_send_slots_pool_slot_at", "pool", "slot_at"),
     )
 
 
@@ -68,6 +125,85 @@ class JobBatch(Base):
 
     name = Column(String(100), primary_key=True)
     description = Column(String(255), nullable=True)
+
+
+class RecentSends(Base):
+    """
+    Successful mass-message sends of the last days (phone number + hash of the text sent),
+    for suppressing identical messages across batches (see whatsapp.mass_messages.suppression).
+    """
+    __tablename__ = "recent_sends"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    phone_number = Column(String(100), nullable=False)
+    content_hash = Column(String(64), nullable=False)
+    sent_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+    __table_args__ = (
+        Index("ix_recent_sends_lookup", "phone_number", "content_hash", "sent_at"),
+    )
+
+
+class WhatsappInstances(Base):
+    """
+    Registry of the Evolution instances (WhatsApp numbers) mass messages are sent through
+    (see whatsapp.core.instances).
+    """
+    __tablename__ = "whatsapp_instances"
+
+    name = Column(String(100), primary_key=True)
+    number = Column(String(100), nullable=False)
+
+    # Share of the mass-message recipients (weighted round-robin) and send budget of the number
+    weight = Column(Integer, nullable=False, server_default="1")
+    messages_per_minute = Column(Integer, nullable=False)
+    messages_per_hour = Column(Integer, nullable=False)
+
+    enabled = Column(Boolean, nullable=False, server_default=text("true"))
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+
+class BatchStats(Base):
+    """
+    Progress counters of a batch, kept up to date incrementally (see job_and_listener.job_batch.stats)
+    so reading a batch's progress never scans its jobs or messages.
+    """
+    __tablename__ = "batch_stats"
+
+    batch_id = Column(String(100), ForeignKey("job_batch.name", ondelete="CASCADE"), primary_key=True)
+
+    # jobs of the batch by job_information.status
+    pending = Column(Integer, nullable=False, server_default="0")
+    running = Column(Integer, nullable=False, server_default="0")
+    success = Column(Integer, nullable=False, server_default="0")
+    failure = Column(Integer, nullable=False, server_default="0")
+    missed = Column(Integer, nullable=False, server_default="0")
+    deleted = Column(Integer, nullable=False, server_default="0")
+
+    # mass_messages rows of the batch and their results
+    messages_total = Column(Integer, nullable=False, server_default="0")
+    messages_sent = Column(Integer, nullable=False, server_default="0")
+    messages_failed = Column(Integer, nullable=False, server_default="0")
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+
+class BatchStatsMinutes(Base):
+    """
+    Per-minute activity of a batch (for throughput and ETA); old minutes are pruned periodically.
+    """
+    __tablename__ = "batch_stats_minutes"
+
+    batch_id = Column(String(100), ForeignKey("job_batch.name", ondelete="CASCADE"), nullable=False)
+    minute = Column(DateTime(timezone=True), nullable=False)
+
+    jobs_finished = Column(Integer, nullable=False, server_default="0")
+    messages_sent = Column(Integer, nullable=False, server_default="0")
+    messages_failed = Column(Integer, nullable=False, server_default="0")
+
+    __table_args__ = (
+        PrimaryKeyConstraint("batch_id", "minute"),
+    )
  
 
 
@@ -0,0 +1,435 @@
+"""
+Local stand-in for the Evolution API, for benchmarks and load/resilience tests without a WhatsApp session.
+
+Covers the endpoints this app calls:
+
+    POST   message/sendText/{instance}            POST   group/create/{instance}
+    POST   message/sendMedia/{instance}           POST   group/updateParticipant/{instance}?groupJid=
+    GET    instance/connectionState/{instance}    GET    group/participants/{instance}?groupJid=
+    GET    instance/connect/{instance}            GET    group/inviteCode/{instance}?groupJid=
+    DELETE instance/delete/{instance}             POST   instance/create
+
+Groups live in memory. Faults are injectable per endpoint ("message/sendText", ...) or for all
+endpoints ("*"): fixed latency + jitter, error rate (500), throttling (429 with Retry-After, either
+random or as a requests-per-minute limit) and connection resets (RST, no response).
+The "delay" field of send requests is honored, scaled by `delay_scale` (0.001 -> 50000ms = 50ms).
+
+Run standalone, then start the app with EVOLUTION_BASE_URL=http://localhost:8081 in its environment
+(read by whatsapp/core/evo_request.py; the default is the real Evolution API on http://localhost:8080):
+
+    cd whatsapp_bot_backend && python -m fake_evolution.server --port 8081 --delay-scale 0.001 \
+        --error-rate 0.01 --throttle-per-minute 600 --reset-rate 0.005
+
+or in-process: `server, base_url = start_fake_evolution(FakeEvolutionConfig(...))`.
+
+Control endpoints: GET /__fake/stats, POST /__fake/faults (body: {"<endpoint or *>": {<EndpointFaults fields>}}),
+POST /__fake/reset (clears groups and stats).
+"""
+
+import argparse
+import json
+import random
+import socket
+import struct
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from dataclasses import asdict, dataclass, field, fields
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+
+ALL_ENDPOINTS = "*"
+
+
+@dataclass
+class EndpointFaults:
+    """
+    Attributes:
+        latency: seconds added to every response
+        jitter: up to this many extra seconds, uniformly random
+        error_rate: probability of a 500 response
+        throttle_rate: probability of a 429 response
+        throttle_per_minute: max requests per rolling minute before answering 429 (0 = unlimited)
+        reset_rate: probability of resetting the connection without a response
+        retry_after: Retry-After seconds sent with 429 responses
+    """
+    latency: float = 0.0
+    jitter: float = 0.0
+    error_rate: float = 0.0
+    throttle_rate: float = 0.0
+    throttle_per_minute: int = 0
+    reset_rate: float = 0.0
+    retry_after: float = 1.0
+
+
+@dataclass
+class FakeEvolutionConfig:
+    """
+    Attributes:
+        faults: endpoint ("message/sendText", ...) or "*" -> faults; endpoint entries override "*"
+        delay_scale: multiplier applied to the "delay" (ms) field of send requests; 0 ignores it
+        connection_state: state returned by instance/connectionState ("open", "close", "connecting")
+        unknown_number_prefix: sendText to numbers starting with this answers 400 "exists: false"
+        api_key: if set, requests without this apikey header get 401
+        seed: random seed, for reproducible fault sequences
+    """
+    faults: Dict[str, EndpointFaults] = field(default_factory=dict)
+    delay_scale: float = 0.0
+    connection_state: str = "open"
+    unknown_number_prefix: Optional[str] = None
+    api_key: Optional[str] = None
+    seed: Optional[int] = None
+
+
+class FakeEvolutionState:
+    """In-memory groups, rate-limit windows and counters, shared by all handler threads."""
+
+    def __init__(self, config: FakeEvolutionConfig):
+        self.config = config
+        self.lock = threading.Lock()
+        self.random = random.Random(config.seed)
+        self.groups: Dict[str, Dict[str, Any]] = {}
+        self.stats: Counter = Counter()
+        self.recent: Dict[str, deque] = {}
+
+    def faults_for(self, endpoint: str) -> EndpointFaults:
+        return self.config.faults.get(endpoint) or self.config.faults.get(ALL_ENDPOINTS) or EndpointFaults()
+
+    def update_faults(self, faults: Dict[str, Dict[str, Any]]) -> None:
+        with self.lock:
+            for endpoint, values in faults.items():
+                self.config.faults[endpoint] = EndpointFaults(**values)
+
+    def reset(self) -> None:
+        with self.lock:
+            self.groups.clear()
+            self.stats.clear()
+            self.recent.clear()
+
+    def roll(self, probability: float) -> bool:
+        if probability <= 0:
+            return False
+        with self.lock:
+            return self.random.random() < probability
+
+    def uniform(self, a: float, b: float) -> float:
+        with self.lock:
+            return self.random.uniform(a, b)
+
+    def over_rate_limit(self, endpoint: str, per_minute: int) -> bool:
+        """Record one request; True if it exceeds `per_minute` in the rolling minute."""
+        if per_minute <= 0:
+            return False
+
+        now = time.monotonic()
+        with self.lock:
+            window = self.recent.setdefault(endpoint, deque())
+            while window and now - window[0] > 60:
+                window.popleft()
+            if len(window) >= per_minute:
+                return True
+            window.append(now)
+            return False
+
+    def count(self, endpoint: str, outcome: str) -> None:
+        with self.lock:
+            self.stats[f"{endpoint} {outcome}"] += 1
+
+
+def _jid(number: str) -> str:
+    number = str(number)
+    return number if "@" in number else f"{number}@s.whatsapp.net"
+
+
+class FakeEvolutionHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like Evolution
+    disable_nagle_algorithm = True
+
+    state: FakeEvolutionState = None  # set on the subclass built by make_server
+
+    # --- Plumbing ---
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, body: Any, headers: Optional[Dict[str, str]] = None) -> None:
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _reset_connection(self) -> None:
+        """Close with RST (SO_LINGER 0) so the client sees 'connection reset by peer'."""
+        self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0))
+        self.close_connection = True
+        self.connection.close()
+
+    def _read_body(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        try:
+            return json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            return {}
+
+    def _route(self) -> Tuple[str, Dict[str, str]]:
+        """('message/sendText', query params) from '/message/sendText/my_instance?...'."""
+        url = urlparse(self.path)
+        parts = [p for p in url.path.split("/") if p]
+        endpoint = "/".join(parts[:2])
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        return endpoint, params
+
+    # --- Request handling ---
+
+    def _handle(self, method: str) -> None:
+        endpoint, params = self._route()
+        body = self._read_body()
+        state = self.state
+
+        if endpoint.startswith("__fake/"):
+            return self._handle_control(endpoint, body)
+
+        faults = state.faults_for(endpoint)
+
+        if state.roll(faults.reset_rate):
+            state.count(endpoint, "reset")
+            return self._reset_connection()
+
+        if state.config.api_key and self.headers.get("apikey") != state.config.api_key:
+            state.count(endpoint, "401")
+            return self._send_json(401, {"status": 401, "error": "Unauthorized", "response": {"message": "Unauthorized"}})
+
+        if state.over_rate_limit(endpoint, faults.throttle_per_minute) or state.roll(faults.throttle_rate):
+            state.count(endpoint, "429")
+            return self._send_json(
+                429,
+                {"status": 429, "error": "Too Many Requests", "response": {"message": "rate-overlimit"}},
+                headers={"Retry-After": f"{faults.retry_after:g}"},
+            )
+
+        wait = faults.latency + (state.uniform(0, faults.jitter) if faults.jitter else 0)
+        if state.config.delay_scale and "delay" in body:
+            wait += float(body["delay"]) / 1000 * state.config.delay_scale
+        if wait > 0:
+            time.sleep(wait)
+
+        if state.roll(faults.error_rate):
+            state.count(endpoint, "500")
+            return self._send_json(500, {"status": 500, "error": "Internal Server Error", "response": {"message": "injected error"}})
+
+        handler = ENDPOINT_HANDLERS.get((method, endpoint))
+        if handler is None:
+            state.count(endpoint, "404")
+            return self._send_json(404, {"status": 404, "error": "Not Found", "response": {"message": f"Cannot {method} /{endpoint}"}})
+
+        status, response = handler(state, body, params)
+        state.count(endpoint, str(status))
+        self._send_json(status, response)
+
+    def _handle_control(self, endpoint: str, body: Dict[str, Any]) -> None:
+        state = self.state
+        if endpoint == "__fake/stats":
+            with state.lock:
+                return self._send_json(200, {"stats": dict(state.stats), "groups": len(state.groups)})
+        if endpoint == "__fake/faults":
+            state.update_faults(body)
+            return self._send_json(200, {name: asdict(f) for name, f in state.config.faults.items()})
+        if endpoint == "__fake/reset":
+            state.reset()
+            return self._send_json(200, {"status": "reset"})
+        return self._send_json(404, {"error": "unknown control endpoint"})
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_PUT(self):
+        self._handle("PUT")
+
+    def do_DELETE(self):
+        self._handle("DELETE")
+
+
+# --- Endpoint handlers: (state, body, params) -> (status, json) ---
+
+def _send_message(state: FakeEvolutionState, body, params, message: Dict[str, Any]):
+    number = str(body.get("number", ""))
+    prefix = state.config.unknown_number_prefix
+    if prefix and number.startswith(prefix):
+        return 400, {
+            "status": 400,
+            "error": "Bad Request",
+            "response": {"message": [{"jid": _jid(number), "exists": False, "number": number}]},
+        }
+
+    return 201, {
+        "key": {"remoteJid": _jid(number), "fromMe": True, "id": uuid.uuid4().hex[:20].upper()},
+        "message": message,
+        "messageTimestamp": int(time.time()),
+        "status": "PENDING",
+    }
+
+
+def _send_text(state, body, params):
+    return _send_message(state, body, params, {"conversation": body.get("text", "")})
+
+
+def _send_media(state, body, params):
+    return _send_message(state, body, params, {"imageMessage": {"caption": body.get("caption", ""), "mimetype": body.get("mimetype")}})
+
+
+def _group_create(state, body, params):
+    participants = {_jid(p) for p in body.get("participants", [])}
+    with state.lock:
+        gid = f"120363{state.random.randint(10 ** 11, 10 ** 12 - 1)}@g.us"
+        state.groups[gid] = {"subject": body.get("subject", ""), "description": body.get("description", ""),
+                             "participants": participants, "invite_code": uuid.uuid4().hex[:22]}
+    return 201, {"id": gid, "subject": body.get("subject", ""), "size": len(participants),
+                 "participants": [{"id": jid, "admin": None} for jid in sorted(participants)]}
+
+
+def _get_group(state, params):
+    return state.groups.get(params.get("groupJid", ""))
+
+
+def _group_update_participant(state, body, params):
+    with state.lock:
+        group = _get_group(state, params)
+        if group is None:
+            return 400, {"status": 400, "error": "Bad Request", "response": {"message": ["Group not found"]}}
+
+        action = body.get("action")
+        jids = [_jid(p) for p in body.get("participants", [])]
+        if action == "add":
+            group["participants"].update(jids)
+        elif action == "remove":
+            group["participants"].difference_update(jids)
+        elif action not in ("promote", "demote"):
+            return 400, {"status": 400, "error": "Bad Request", "response": {"message": [f"Invalid action {action}"]}}
+
+    return 201, {"updateParticipants": [{"status": "200", "jid": jid, "content": {"tag": action}} for jid in jids]}
+
+
+def _group_participants(state, body, params):
+    with state.lock:
+        group = _get_group(state, params)
+        if group is None:
+            return 400, {"status": 400, "error": "Bad Request", "response": {"message": ["Group not found"]}}
+        participants = sorted(group["participants"])
+
+    return 200, {"participants": [{"id": jid, "phoneNumber": jid, "admin": None} for jid in participants]}
+
+
+def _group_invite_code(state, body, params):
+    with state.lock:
+        group = _get_group(state, params)
+        if group is None:
+            return 400, {"status": 400, "error": "Bad Request", "response": {"message": ["Group not found"]}}
+        code = group["invite_code"]
+
+    return 200, {"inviteUrl": f"https://chat.whatsapp.com/{code}", "inviteCode": code}
+
+
+def _connection_state(state, body, params):
+    return 200, {"instance": {"instanceName": "fake", "state": state.config.connection_state}}
+
+
+def _instance_connect(state, body, params):
+    return 200, {"pairingCode": None, "code": uuid.uuid4().hex, "base64": "data:image/png;base64,", "count": 1}
+
+
+def _instance_create(state, body, params):
+    return 201, {"instance": {"instanceName": body.get("instanceName"), "instanceId": str(uuid.uuid4()), "status": "created"},
+                 "hash": body.get("token")}
+
+
+def _instance_delete(state, body, params):
+    return 200, {"status": "SUCCESS", "error": False, "response": {"message": "Instance deleted"}}
+
+
+ENDPOINT_HANDLERS = {
+    ("POST", "message/sendText"): _send_text,
+    ("POST", "message/sendMedia"): _send_media,
+    ("POST", "group/create"): _group_create,
+    ("POST", "group/updateParticipant"): _group_update_participant,
+    ("GET", "group/participants"): _group_participants,
+    ("GET", "group/inviteCode"): _group_invite_code,
+    ("GET", "instance/connectionState"): _connection_state,
+    ("GET", "instance/connect"): _instance_connect,
+    ("POST", "instance/create"): _instance_create,
+    ("DELETE", "instance/delete"): _instance_delete,
+}
+
+
+def make_server(config: FakeEvolutionConfig, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+    handler = type("BoundFakeEvolutionHandler", (FakeEvolutionHandler,), {"state": FakeEvolutionState(config)})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def start_fake_evolution(config: Optional[FakeEvolutionConfig] = None, host: str = "127.0.0.1", port: int = 0):
+    """
+    Start the fake server in a background thread.
+
+    Returns:
+        (server, base_url) - call server.shutdown() when done.
+    """
+    server = make_server(config or FakeEvolutionConfig(), host, port)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--api-key", default=None)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--delay-scale", type=float, default=0.0, help="multiplier for the 'delay' field (ms) of sends")
+    parser.add_argument("--connection-state", default="open")
+    parser.add_argument("--unknown-number-prefix", default=None)
+    for f in fields(EndpointFaults):
+        parser.add_argument(f"--{f.name.replace('_', '-')}", type=type(f.default), default=f.default,
+                            help="applies to all endpoints")
+    parser.add_argument("--faults-file", default=None,
+                        help='JSON file of per-endpoint faults: {"message/sendText": {"latency": 0.2}, ...}')
+    args = parser.parse_args()
+
+    faults = {ALL_ENDPOINTS: EndpointFaults(**{f.name: getattr(args, f.name) for f in fields(EndpointFaults)})}
+    if args.faults_file:
+        with open(args.faults_file) as fh:
+            faults.update({name: EndpointFaults(**values) for name, values in json.load(fh).items()})
+
+    config = FakeEvolutionConfig(
+        faults=faults,
+        delay_scale=args.delay_scale,
+        connection_state=args.connection_state,
+        unknown_number_prefix=args.unknown_number_prefix,
+        api_key=args.api_key,
+        seed=args.seed,
+    )
+
+    server = make_server(config, args.host, args.port)
+    print(f"Fake Evolution API listening on http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
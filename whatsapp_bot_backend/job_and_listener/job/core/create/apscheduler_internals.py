@@ -0,0 +1,85 @@
+"""
+The APScheduler internals create_jobs_bulk relies on, kept in one place.
+
+create_jobs_bulk writes APScheduler's rows itself (inside the caller's transaction), so it has to
+build jobs, pickle them and announce them exactly like BaseScheduler.add_job / _real_add_job and
+SQLAlchemyJobStore.add_job do. That is only verified for APScheduler 3.10 (the app requires
+APScheduler >=3.10,<3.11; 4.x is a different API altogether). On any other version
+`bulk_scheduling_supported()` is False and create_jobs_bulk falls back to add_job per job.
+"""
+
+import pickle
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Optional
+
+import apscheduler
+from apscheduler.events import EVENT_JOB_ADDED, JobEvent
+from apscheduler.job import Job as SchedulerJob
+from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
+from apscheduler.schedulers.base import BaseScheduler
+from apscheduler.util import datetime_to_utc_timestamp
+
+
+# (major, minor) of the APScheduler releases this module mirrors
+SUPPORTED_APSCHEDULER = (3, 10)
+
+
+def bulk_scheduling_supported() -> bool:
+    return tuple(apscheduler.version_info[:2]) == SUPPORTED_APSCHEDULER
+
+
+def sqlalchemy_jobstore(scheduler: BaseScheduler, alias: str) -> Optional[SQLAlchemyJobStore]:
+    """The jobstore `alias` if it's an SQLAlchemyJobStore, else None."""
+    store = scheduler._lookup_jobstore(alias)
+    return store if isinstance(store, SQLAlchemyJobStore) else None
+
+
+def build_date_job(
+    scheduler: BaseScheduler,
+    *,
+    job_id: str,
+    func: Callable,
+    kwargs: Dict[str, Any],
+    run_date: datetime,
+    executor: str,
+    misfire_grace_time: int,
+    coalesce: bool,
+) -> SchedulerJob:
+    """
+    The APScheduler Job that add_job(trigger="date") would store, fully resolved but not stored.
+    Mirrors BaseScheduler.add_job/_real_add_job.
+    """
+    job = SchedulerJob(
+        scheduler,
+        trigger=scheduler._create_trigger("date", {"run_date": run_date}),
+        executor=executor,
+        func=func,
+        args=(),
+        kwargs=kwargs,
+        id=job_id,
+        name=None,
+        misfire_grace_time=misfire_grace_time,
+        coalesce=coalesce,
+    )
+
+    replacements = {key: value for key, value in scheduler._job_defaults.items() if not hasattr(job, key)}
+    if not hasattr(job, "next_run_time"):
+        replacements["next_run_time"] = job.trigger.get_next_fire_time(None, datetime.now(scheduler.timezone))
+    job._modify(**replacements)
+    return job
+
+
+def jobstore_row(store: SQLAlchemyJobStore, job: SchedulerJob) -> Dict[str, Any]:
+    """The apscheduler_jobs row SQLAlchemyJobStore.add_job would insert for `job`."""
+    return {
+        "id": job.id,
+        "next_run_time": datetime_to_utc_timestamp(job.next_run_time),
+        "job_state": pickle.dumps(job.__getstate__(), store.pickle_protocol),
+    }
+
+
+def announce_added_jobs(scheduler: BaseScheduler, job_ids: Iterable[str], jobstore: str) -> None:
+    """Dispatch EVENT_JOB_ADDED for jobs written to `jobstore` directly, and wake the scheduler up."""
+    for job_id in job_ids:
+        scheduler._dispatch_event(JobEvent(EVENT_JOB_ADDED, job_id, jobstore))
+    scheduler.wakeup()
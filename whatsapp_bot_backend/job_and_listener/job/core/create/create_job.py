@@ -1,11 +1,31 @@
 from apscheduler.schedulers.background import BackgroundScheduler
-from sqlalchemy import text
-from job_and_listener.job.models.job_model import Job, JobMetadata
-from typing import Callable, Any
+from sqlalchemy import event, text
 
+from db.bulk import bulk_insert
+from job_and_listener.job.core.create.apscheduler_internals import (
+    announce_added_jobs,
+    build_date_job,
+    bulk_scheduling_supported,
+    jobstore_row,
+    sqlalchemy_jobstore,
+)
+from job_and_listener.job.models.base_job_func_model import add_issue_to_job_sql
+from job_and_listener.job.models.job_model import Job, JobAction, JobMetadata, JobSchedule
+from job_and_listener.job_priority import PRIORITY_NORMAL, priority_executor
+from job_and_listener.job_batch.stats import add_pending_jobs_sql
+from typing import Callable, Any, Dict, Iterator, List, Optional, Sequence
+from datetime import datetime, timedelta
 
+from shared.timezone import TIMEZONE
 
 
+# In-memory jobstore for the app's own periodic jobs (materializers, pollers, ...).
+# These jobs are recreated on every startup and are not tracked in job_information.
+INTERNAL_JOBSTORE = "internal"
+
+# Persistent jobstore of the tracked jobs
+DEFAULT_JOBSTORE = "default"
+
 
 def add_date_job(
     scheduler: BackgroundScheduler,
@@ -43,6 +63,34 @@ def add_date_job(
     )
 
 
+def add_internal_interval_job(
+    scheduler: BackgroundScheduler,
+    func: Callable,
+    seconds: float,
+    job_id: str,
+    args: Optional[Sequence[Any]] = None,
+) -> None:
+    """
+    Add a periodic job to the INTERNAL_JOBSTORE.
+
+    This is the only place interval triggers are allowed: internal jobs live in a
+    memory jobstore, have no job_information row and are ignored by the listener,
+    so they don't break the "every tracked job is a pending date job" assumption
+    of add_date_job.
+    """
+    scheduler.add_job(
+        func,
+        trigger="interval",
+        seconds=seconds,
+        id=job_id,
+        args=list(args or []),
+        jobstore=INTERNAL_JOBSTORE,
+        replace_existing=True,
+        coalesce=True,
+        max_instances=1,
+    )
+
+
 def schedule_job(scheduler: BackgroundScheduler, job: "Job") -> None:
     """
     Schedule a Job object using APScheduler.
@@ -58,13 +106,14 @@ def schedule_job(scheduler: BackgroundScheduler, job: "Job") -> None:
         },
         coalesce=job.schedule.coalesce,
         misfire_grace_time=job.schedule.misfire_grace_time,
+        executor=priority_executor(job.schedule.priority),
     )
 
 
 
 def insert_job_row(cur, metadata: JobMetadata) -> None:
     """
-    Insert a row in the job_information table.
+    Insert a row in the job_information table (and count the job as pending in its batch).
     """
     insert_sql = text("""
         INSERT INTO job_information (id, description, job_id, batch_id, created_at)
@@ -79,6 +128,7 @@ def insert_job_row(cur, metadata: JobMetadata) -> None:
             "batch_id": metadata.batch_id,
         },
     )
+    add_pending_jobs_sql(cur, [metadata.batch_id])
 
 
 def create_job(cur, scheduler: BackgroundScheduler, job: Job) -> None:
@@ -87,4 +137,149 @@ def create_job(cur, scheduler: BackgroundScheduler, job: Job) -> None:
     """
     schedule_job(scheduler, job)
     insert_job_row(cur, job.metadata)
-            
\ No newline at end of file
+
+
+def _job_information_rows(jobs: List[Job]) -> Iterator[Dict[str, Any]]:
+    created_at = datetime.now(TIMEZONE)
+    for job in jobs:
+        yield {
+            "id": job.metadata.id,
+            "description": job.metadata.description,
+            "job_id": job.metadata.id,
+            "batch_id": job.metadata.batch_id,
+            "created_at": created_at,
+        }
+
+
+def _shares_database(cur, store) -> bool:
+    """True if the jobstore writes to the same database as `cur` (so one transaction can cover both)."""
+    return (
+        store is not None
+        and store.jobs_t.schema is None
+        and store.engine.url == cur.get_bind().url
+    )
+
+
+def create_jobs_bulk(cur, scheduler: BackgroundScheduler, jobs: List[Job]) -> None:
+    """
+    Schedule many jobs and create their job_information rows in the caller's transaction.
+
+    The APScheduler rows are written straight into the jobstore's table (built and pickled like
+    add_job does, see apscheduler_internals) with multi-row inserts next to the job_information
+    rows, so it's all-or-nothing: a duplicate id anywhere fails the whole transaction and nothing
+    is scheduled. Once the transaction commits, EVENT_JOB_ADDED is dispatched for every job and
+    the scheduler is woken up.
+
+    Falls back to `create_job` per job when the default jobstore isn't an SQLAlchemyJobStore on
+    the same database, or the installed APScheduler isn't the version apscheduler_internals
+    mirrors (not atomic then).
+
+    Raises:
+        ValueError: if `jobs` contains the same id twice (before anything is written)
+    """
+    jobs = list(jobs)
+    if not jobs:
+        return
+
+    ids = [job.metadata.id for job in jobs]
+    if len(set(ids)) != len(ids):
+        duplicates = sorted({job_id for job_id in ids if ids.count(job_id) > 1})
+        raise ValueError(f"Duplicate job ids in bulk creation: {duplicates[:10]}")
+
+    store = sqlalchemy_jobstore(scheduler, DEFAULT_JOBSTORE) if bulk_scheduling_supported() else None
+    if not _shares_database(cur, store):
+        for job in jobs:
+            create_job(cur, scheduler, job)
+        return
+
+    bulk_insert(cur, "job_information", ["id", "description", "job_id", "batch_id", "created_at"], _job_information_rows(jobs))
+    add_pending_jobs_sql(cur, (job.metadata.batch_id for job in jobs))
+
+    def scheduler_rows():
+        for job in jobs:
+            scheduler_job = build_date_job(
+                scheduler,
+                job_id=job.metadata.id,
+                func=job.action.func,
+                kwargs={"job_name": job.metadata.id, "run_args": job.action.run_args},
+                run_date=job.schedule.run_time,
+                executor=priority_executor(job.schedule.priority),
+                misfire_grace_time=job.schedule.misfire_grace_time,
+                coalesce=job.schedule.coalesce,
+            )
+            yield jobstore_row(store, scheduler_job)
+
+    bulk_insert(cur, store.jobs_t.name, ["id", "next_run_time", "job_state"], scheduler_rows())
+
+    # The scheduler (and the listener) only see the new rows once they're committed
+    event.listen(
+        cur, "after_commit", lambda session: announce_added_jobs(scheduler, ids, DEFAULT_JOBSTORE), once=True
+    )
+
+
+# Suffix appended to a job id for each delayed continuation: "<id>/retry_<n>"
+CONTINUATION_SUFFIX = "/retry_"
+
+
+def continuation_job_id(job_name: str, n: int) -> str:
+    """
+    Id of the `n`-th continuation of `job_name`.
+    Continuations of continuations keep the original id as their base.
+    """
+    base = job_name.split(CONTINUATION_SUFFIX, 1)[0]
+    return f"{base}{CONTINUATION_SUFFIX}{n}"
+
+
+def get_job_batch_id(cur, job_id: str) -> Optional[str]:
+    row = cur.execute(
+        text("SELECT batch_id FROM job_information WHERE id = :job_id"),
+        {"job_id": job_id},
+    ).first()
+    return row[0] if row else None
+
+
+def schedule_continuation(
+    cur,
+    scheduler: BackgroundScheduler,
+    job_name: str,
+    func: Callable,
+    run_args: Dict[str, Any],
+    delay: float,
+    n: int,
+    misfire_grace_time: int = 60,
+    priority: str = PRIORITY_NORMAL,
+    reason: Optional[str] = None,
+) -> str:
+    """
+    Schedule the remaining work of `job_name` as a new date job `delay` seconds from now,
+    instead of sleeping inside the executor thread.
+
+    The continuation is a regular tracked job (own job_information row, same batch),
+    so it shows up in the batch and can be deleted like any other pending job.
+    `priority` should be the lane of the job being continued.
+
+    `job_name` itself still ends as SUCCESS (it returned normally), so an issue pointing at the
+    continuation (and `reason`) is added to it: its work isn't done until the continuation's is.
+
+    Returns the continuation job id.
+    """
+    new_id = continuation_job_id(job_name, n)
+    run_time = datetime.now(TIMEZONE) + timedelta(seconds=delay)
+
+    create_job(
+        cur,
+        scheduler,
+        Job(
+            metadata=JobMetadata(
+                id=new_id,
+                description=f"continuation of {job_name}",
+                batch_id=get_job_batch_id(cur, job_name),
+            ),
+            action=JobAction(func=func, run_args=run_args),
+            schedule=JobSchedule(
+                run_time=run_time, coalesce=True, misfire_grace_time=misfire_grace_time, priority=priority
+            ),
+        ),
+    )
+    add_issue_to_job_sql(cur, job_name, {"continued_as": new_id, "reason": reason, "delay_seconds": round(delay, 1)})
+    return new_id
@@ -6,7 +6,7 @@ responses so that API endpoints can remain thin one-liners.
 """
 
 from apscheduler.schedulers.background import BackgroundScheduler
-from sqlalchemy import text
+from job_and_listener.job_batch.stats import set_job_status_sql
 
 
 # --- Public service functions used by the router ---
@@ -23,10 +23,7 @@ def delete_job(job_id: str, cur, scheduler: BackgroundScheduler) -> bool:
     job = scheduler.get_job(job_id)
     if job:
         scheduler.remove_job(job_id)
-        cur.execute(
-            text("UPDATE job_information SET status = :status WHERE id = :job_id"),
-            {"status": JOBSTATUS["DELETED"], "job_id": job_id}
-        )
+        set_job_status_sql(cur, job_id, JOBSTATUS["DELETED"])
         return True
     return False
 
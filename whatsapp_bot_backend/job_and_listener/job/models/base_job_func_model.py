@@ -72,16 +72,21 @@ class BaseJobFunc(ABC):
         Args:
             issue: Python object representing the issue.
         """
-        self.cur.execute(
-            text(
-                """
-                UPDATE job_information
-                SET issues = array_append(issues, :issue_json)
-                WHERE id = :job_name
-                """
-            ),
-            {
-                "issue_json": json.dumps(issue),
-                "job_name": self.job_name,
-            },
-        )
\ No newline at end of file
+        add_issue_to_job_sql(self.cur, self.job_name, issue)
+
+
+def add_issue_to_job_sql(cur, job_name: str, issue) -> None:
+    """Append `issue` (JSON-serialized) to the issues of `job_name` in `job_information`."""
+    cur.execute(
+        text(
+            """
+            UPDATE job_information
+            SET issues = array_append(issues, :issue_json)
+            WHERE id = :job_name
+            """
+        ),
+        {
+            "issue_json": json.dumps(issue),
+            "job_name": job_name,
+        },
+    )
@@ -2,6 +2,8 @@ from dataclasses import dataclass
 from datetime import datetime
 from typing import Dict, Any
 
+from job_and_listener.job_priority import PRIORITY_NORMAL
+
 
 @dataclass
 class JobMetadata:
@@ -21,6 +23,7 @@ class JobSchedule:
     run_time: datetime
     coalesce: bool = True
     misfire_grace_time: int = 600
+    priority: str = PRIORITY_NORMAL  # lane / executor the job runs on (see job_and_listener.job_priority)
 
 
 @dataclass
@@ -1,7 +1,15 @@
 from sqlalchemy import text
 from typing import List
 from apscheduler.schedulers.background import BackgroundScheduler
+from job_and_listener.job.core.create.create_job import add_internal_interval_job
 from job_and_listener.job.core.delete.core import delete_job    
+from job_and_listener.job_batch.stats import insert_batch_stats_row, prune_batch_stats_minutes_sql
+from db.get_cursor import get_cursor
+
+
+BATCH_STATS_PRUNE_INTERVAL_SECONDS = 60 * 60
+BATCH_STATS_PRUNER_JOB_ID = "internal/prune_batch_stats_minutes"
+
 
 def create_job_batch(batch_id: str, cur) -> None:
     """
@@ -18,6 +26,7 @@ def create_job_batch(batch_id: str, cur) -> None:
         text("INSERT INTO job_batch (name) VALUES (:batch_id)"),
         {"batch_id": batch_id}
     )
+    insert_batch_stats_row(cur, batch_id)
 
 def delete_job_batch(batch_id: str, cur, scheduler: BackgroundScheduler) -> List[str]:
     """
@@ -42,3 +51,15 @@ def delete_job_batch(batch_id: str, cur, scheduler: BackgroundScheduler) -> List
     return deleted_jobs
 
 
+def prune_batch_stats_minutes() -> None:
+    with get_cursor() as cur:
+        prune_batch_stats_minutes_sql(cur)
+
+
+def setup_batch_stats_pruner(sched: BackgroundScheduler) -> None:
+    add_internal_interval_job(
+        sched,
+        prune_batch_stats_minutes,
+        seconds=BATCH_STATS_PRUNE_INTERVAL_SECONDS,
+        job_id=BATCH_STATS_PRUNER_JOB_ID,
+    )
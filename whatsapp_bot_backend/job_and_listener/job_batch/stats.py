@@ -0,0 +1,196 @@
+"""
+Incrementally maintained batch progress (batch_stats, batch_stats_minutes).
+
+Every writer updates the counters in the same transaction as the change it counts:
+  - job creation (create_job, create_jobs_bulk): +pending
+  - job status changes (listener, delete_job): -old status, +new status, and finished jobs per minute
+  - mass_messages inserts: +messages_total
+  - mass-message results (status writer): sent/failed, and per minute
+
+so `get_batch_progress` reads one batch_stats row and at most `window_minutes` bucket rows,
+whatever the size of the batch. Batches created before batch_stats existed get their row
+rebuilt from job_information / mass_messages the first time their progress is read.
+"""
+
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Optional
+
+from sqlalchemy import text
+
+from job_and_listener.job_status import JOBSTATUS
+from shared.timezone import TIMEZONE
+
+
+# batch_stats column of every job status
+STATUS_COLUMNS = {status: status.lower() for status in JOBSTATUS}
+
+FINISHED_STATUSES = {JOBSTATUS["SUCCESS"], JOBSTATUS["FAILURE"], JOBSTATUS["MISSED"]}
+
+# Default window for throughput / ETA
+PROGRESS_WINDOW_MINUTES = 15
+
+# Minute buckets older than this are deleted by prune_batch_stats_minutes
+MINUTE_BUCKET_RETENTION = timedelta(days=2)
+
+
+def _minute(now: Optional[datetime] = None) -> datetime:
+    return (now or datetime.now(TIMEZONE)).replace(second=0, microsecond=0)
+
+
+def insert_batch_stats_row(cur, batch_id: str) -> None:
+    """Zeroed counters for a new batch (called by create_job_batch)."""
+    cur.execute(
+        text("INSERT INTO batch_stats (batch_id) VALUES (:batch_id) ON CONFLICT (batch_id) DO NOTHING"),
+        {"batch_id": batch_id},
+    )
+
+
+def add_batch_counts_sql(cur, batch_id: str, counts: Dict[str, int]) -> None:
+    """Add `counts` (batch_stats column -> delta) to the batch's counters. No-op for batches without a row."""
+    counts = {column: delta for column, delta in counts.items() if delta}
+    if not counts:
+        return
+    # column names come from this module (STATUS_COLUMNS / message columns), never from input
+    assignments = ", ".join(f"{column} = {column} + :{column}" for column in counts)
+    cur.execute(
+        text(f"UPDATE batch_stats SET {assignments}, updated_at = now() WHERE batch_id = :batch_id"),
+        {"batch_id": batch_id, **counts},
+    )
+
+
+def add_batch_minute_counts_sql(cur, batch_id: str, counts: Dict[str, int], now: Optional[datetime] = None) -> None:
+    """Add `counts` (batch_stats_minutes column -> delta) to the batch's bucket for the current minute."""
+    counts = {column: delta for column, delta in counts.items() if delta}
+    if not counts:
+        return
+    columns = ", ".join(counts)
+    values = ", ".join(f":{column}" for column in counts)
+    assignments = ", ".join(f"{column} = batch_stats_minutes.{column} + EXCLUDED.{column}" for column in counts)
+    cur.execute(
+        text(f"""
+            INSERT INTO batch_stats_minutes (batch_id, minute, {columns})
+            VALUES (:batch_id, :minute, {values})
+            ON CONFLICT (batch_id, minute) DO UPDATE SET {assignments}
+        """),
+        {"batch_id": batch_id, "minute": _minute(now), **counts},
+    )
+
+
+def add_pending_jobs_sql(cur, batch_ids: Iterable[str]) -> None:
+    """Count newly created jobs (one entry per job) as pending."""
+    for batch_id, n in Counter(batch_ids).items():
+        add_batch_counts_sql(cur, batch_id, {STATUS_COLUMNS["PENDING"]: n})
+
+
+def set_job_status_sql(cur, job_id: str, status: str) -> bool:
+    """
+    Set a job's status in job_information and move it between its batch's counters.
+    Returns False if the job doesn't exist or already had `status`.
+    """
+    row = cur.execute(
+        text("""
+            UPDATE job_information AS j SET status = :status
+            FROM job_information AS prev
+            WHERE j.id = :job_id AND prev.id = j.id AND prev.status <> :status
+            RETURNING j.batch_id, prev.status AS previous_status
+        """),
+        {"status": status, "job_id": job_id},
+    ).first()
+    if row is None:
+        return False
+
+    add_batch_counts_sql(cur, row.batch_id, {STATUS_COLUMNS[row.previous_status]: -1, STATUS_COLUMNS[status]: 1})
+    if status in FINISHED_STATUSES:
+        add_batch_minute_counts_sql(cur, row.batch_id, {"jobs_finished": 1})
+    return True
+
+
+def rebuild_batch_stats_sql(cur, batch_id: str) -> None:
+    """Compute a missing batch_stats row from job_information / mass_messages (scans the batch once)."""
+    status_counts = ", ".join(
+        f"count(*) FILTER (WHERE status = '{status}') AS {column}" for status, column in STATUS_COLUMNS.items()
+    )
+    cur.execute(
+        text(f"""
+            INSERT INTO batch_stats (batch_id, {", ".join(STATUS_COLUMNS.values())},
+                                     messages_total, messages_sent, messages_failed)
+            SELECT :batch_id, jobs.*, messages.*
+            FROM (SELECT {status_counts} FROM job_information WHERE batch_id = :batch_id) AS jobs,
+                 (SELECT count(*) AS messages_total,
+                         count(*) FILTER (WHERE success IS TRUE) AS messages_sent,
+                         count(*) FILTER (WHERE success IS FALSE) AS messages_failed
+                  FROM mass_messages WHERE batch_id = :batch_id) AS messages
+            ON CONFLICT (batch_id) DO NOTHING
+        """),
+        {"batch_id": batch_id},
+    )
+
+
+def prune_batch_stats_minutes_sql(cur, retention: timedelta = MINUTE_BUCKET_RETENTION) -> None:
+    cur.execute(
+        text("DELETE FROM batch_stats_minutes WHERE minute < :before"),
+        {"before": datetime.now(TIMEZONE) - retention},
+    )
+
+
+def get_batch_progress(cur, batch_id: str, window_minutes: int = PROGRESS_WINDOW_MINUTES) -> Optional[Dict[str, Any]]:
+    """
+    Counters, throughput over the last `window_minutes` and ETA of a batch, or None if the batch doesn't exist.
+
+    Mass-message batches are measured in messages, other batches (group flows) in jobs.
+    The ETA assumes the recent throughput holds; it's None when the batch is done or nothing
+    happened within the window.
+    """
+    query = text("SELECT * FROM batch_stats WHERE batch_id = :batch_id")
+    stats = cur.execute(query, {"batch_id": batch_id}).first()
+    if stats is None:
+        exists = cur.execute(text("SELECT 1 FROM job_batch WHERE name = :batch_id"), {"batch_id": batch_id}).first()
+        if exists is None:
+            return None
+        rebuild_batch_stats_sql(cur, batch_id)
+        stats = cur.execute(query, {"batch_id": batch_id}).first()
+
+    now = datetime.now(TIMEZONE)
+    recent = cur.execute(
+        text("""
+            SELECT coalesce(sum(jobs_finished), 0) AS jobs_finished,
+                   coalesce(sum(messages_sent), 0) AS messages_sent,
+                   coalesce(sum(messages_failed), 0) AS messages_failed
+            FROM batch_stats_minutes
+            WHERE batch_id = :batch_id AND minute >= :since
+        """),
+        # the current (partial) minute plus window_minutes - 1 full ones
+        {"batch_id": batch_id, "since": _minute(now) - timedelta(minutes=window_minutes - 1)},
+    ).first()
+
+    if stats.messages_total:
+        unit = "messages"
+        remaining = stats.messages_total - stats.messages_sent - stats.messages_failed
+        done_in_window = recent.messages_sent + recent.messages_failed
+    else:
+        unit = "jobs"
+        remaining = stats.pending + stats.running
+        done_in_window = recent.jobs_finished
+
+    per_minute = done_in_window / window_minutes
+    eta = now + timedelta(minutes=remaining / per_minute) if remaining > 0 and per_minute > 0 else None
+
+    return {
+        "batch_id": batch_id,
+        "jobs": {column: getattr(stats, column) for column in STATUS_COLUMNS.values()},
+        "messages": {
+            "total": stats.messages_total,
+            "sent": stats.messages_sent,
+            "failed": stats.messages_failed,
+        },
+        "unit": unit,
+        "remaining": remaining,
+        "throughput": {
+            "window_minutes": window_minutes,
+            "done": done_in_window,
+            "per_minute": round(per_minute, 2),
+        },
+        "eta": eta,
+        "updated_at": stats.updated_at,
+    }
@@ -0,0 +1,72 @@
+"""
+Priority lanes of scheduled jobs.
+
+Every tracked job has a priority (JobSchedule.priority). Each priority runs on its own APScheduler
+executor with its own worker threads, so thousands of due mass-message jobs (bulk) can only fill
+the bulk workers and never delay a critical job (e.g. the mavdak morning messages) waiting for a
+free thread. Each lane also has its own share of the Evolution send rate
+(see whatsapp.core.lane_rate_limit).
+
+Worker threads know their lane (`current_priority`); any other thread (API requests, internal
+jobs) counts as normal.
+"""
+
+import threading
+from typing import Dict
+
+from apscheduler.executors.pool import ThreadPoolExecutor
+
+
+PRIORITY_CRITICAL = "critical"
+PRIORITY_NORMAL = "normal"
+PRIORITY_BULK = "bulk"
+
+JOB_PRIORITIES = [PRIORITY_CRITICAL, PRIORITY_NORMAL, PRIORITY_BULK]
+
+# Executor alias of each lane. Normal keeps "default": jobs persisted before lanes existed
+# (and internal jobs) run there.
+PRIORITY_EXECUTORS = {
+    PRIORITY_CRITICAL: "critical",
+    PRIORITY_NORMAL: "default",
+    PRIORITY_BULK: "bulk",
+}
+
+# Worker threads of each lane. A sendText holds its worker for the whole Evolution "delay",
+# so the critical lane is kept free of everything else rather than made large.
+PRIORITY_WORKERS = {
+    PRIORITY_CRITICAL: 4,
+    PRIORITY_NORMAL: 10,
+    PRIORITY_BULK: 10,
+}
+
+_thread_lane = threading.local()
+
+
+def current_priority() -> str:
+    """Lane of the job running in this thread (PRIORITY_NORMAL outside lane workers)."""
+    return getattr(_thread_lane, "priority", PRIORITY_NORMAL)
+
+
+def _init_lane_worker(priority: str) -> None:
+    _thread_lane.priority = priority
+
+
+def priority_executor(priority: str) -> str:
+    if priority not in PRIORITY_EXECUTORS:
+        raise ValueError(f"Unknown job priority {priority!r}, expected one of {JOB_PRIORITIES}")
+    return PRIORITY_EXECUTORS[priority]
+
+
+def build_lane_executors() -> Dict[str, ThreadPoolExecutor]:
+    """One thread pool per lane, keyed by executor alias, for the scheduler's `executors`."""
+    return {
+        PRIORITY_EXECUTORS[priority]: ThreadPoolExecutor(
+            PRIORITY_WORKERS[priority],
+            pool_kwargs={
+                "thread_name_prefix": f"jobs-{priority}",
+                "initializer": _init_lane_worker,
+                "initargs": (priority,),
+            },
+        )
+        for priority in JOB_PRIORITIES
+    }
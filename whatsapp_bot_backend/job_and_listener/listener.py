@@ -24,6 +24,8 @@ from sqlalchemy import text
 from job_and_listener.job_status import JOBSTATUS
 from shared.exception_to_json import exception_to_json
 from db.get_cursor import get_cursor
+from job_and_listener.job.core.create.create_job import INTERNAL_JOBSTORE
+from job_and_listener.job_batch.stats import set_job_status_sql
 
 
 EVENT_NAMES = {
@@ -156,11 +158,9 @@ def update_job_status_in_db(job_id, status, use_logging=True):
     log = logging.debug if use_logging else print
     log(f"Updating job {job_id} status to {status} in DB")
 
+    # also moves the job between its batch's progress counters (batch_stats)
     with get_cursor() as cur:
-        cur.execute(
-            text("UPDATE job_information SET status = :status WHERE id = :job_id"),
-            {"status": status, "job_id": job_id}
-        )
+        set_job_status_sql(cur, job_id, status)
 
 
 def add_exception_to_job_sql(cur, job_name, e):
@@ -180,6 +180,10 @@ def add_exception_to_job_sql(cur, job_name, e):
 def listener(event):
     if not hasattr(event, "job_id"):
         return
+
+    # Internal periodic jobs aren't tracked in job_information
+    if getattr(event, "jobstore", None) == INTERNAL_JOBSTORE:
+        return
     
     job_id = event.job_id
     current_status = get_job_status(job_id)
@@ -0,0 +1,25 @@
+"""
+Process-wide handle to the running scheduler.
+
+Routes get the scheduler from `app.state` (api.dependencies.get_scheduler), but job functions
+are called by APScheduler with only (job_name, run_args). Jobs that need to schedule follow-up
+work (e.g. delayed continuations) use `get_running_scheduler()` instead.
+"""
+
+from typing import Optional
+
+from apscheduler.schedulers.background import BackgroundScheduler
+
+
+_scheduler: Optional[BackgroundScheduler] = None
+
+
+def set_running_scheduler(scheduler: BackgroundScheduler) -> None:
+    global _scheduler
+    _scheduler = scheduler
+
+
+def get_running_scheduler() -> BackgroundScheduler:
+    if _scheduler is None:
+        raise RuntimeError("Scheduler is not running - call setup_scheduler() first")
+    return _scheduler
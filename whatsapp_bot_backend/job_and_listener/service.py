@@ -4,9 +4,9 @@ from typing import Any, Dict
 from job_and_listener.job.core.delete.core import delete_job
 from apscheduler.schedulers.background import BackgroundScheduler
 from job_and_listener.job.core.get.core import get_jobs_in_dir
-from job_and_listener.job_batch.core import delete_job_batch
+from job_and_listener.job_batch.core import create_job_batch, delete_job_batch
+from job_and_listener.job_batch.stats import PROGRESS_WINDOW_MINUTES, get_batch_progress
 from job_and_listener.job.core.get.get_job_info import get_job_info
-from sqlalchemy import text
 
 
 def delete_job_service(job_id: str, cur, scheduler: BackgroundScheduler) -> Dict[str, Any]:
@@ -29,10 +29,7 @@ def delete_job_batch_service(batch_id: str, cur, scheduler: BackgroundScheduler)
 
 def delete_and_recreate_job_batch_service(batch_id: str, cur, scheduler: BackgroundScheduler) -> Dict[str, Any]:
     deleted_info = delete_job_batch_service(batch_id, cur, scheduler)
-    cur.execute(
-        text("INSERT INTO job_batch (name) VALUES (:batch_id)"),
-        {"batch_id": batch_id}
-    )
+    create_job_batch(batch_id, cur)
     return {
         "message": f"Batch {batch_id} deleted and recreated.",
         "deleted_jobs_info": deleted_info.get("deleted_jobs_info")
@@ -60,4 +57,14 @@ def get_all_jobs_service(cur, scheduler: BackgroundScheduler) -> Dict[str, Any]:
     """
     Returns all jobs across directories.
     """
-    return get_all_jobs_in_dir_service("", cur, scheduler)
\ No newline at end of file
+    return get_all_jobs_in_dir_service("", cur, scheduler)
+
+
+def get_batch_progress_service(batch_id: str, cur, window_minutes: int = PROGRESS_WINDOW_MINUTES) -> Dict[str, Any]:
+    """
+    Returns the batch's progress counters, throughput and ETA, or a not-found message payload.
+    """
+    progress = get_batch_progress(cur, batch_id, window_minutes)
+    if progress is None:
+        return {"message": f"Batch {batch_id} not found.", "progress": None}
+    return {"progress": progress}
@@ -48,4 +48,41 @@ class WhatsappNotConnectedError(DomainError):
 class CantRetrieveSchedulerJobError(DomainError):
     """Raised when unable to retrieve a job from the scheduler."""
     def __init__(self, message: str = "Cannot retrieve job from scheduler", request: any = None, response: any = None):
-        super().__init__(message, request=request, response=response)
\ No newline at end of file
+        super().__init__(message, request=request, response=response)
+
+class EvolutionRetryLaterError(DomainError):
+    """
+    Raised instead of sleeping when a retryable Evolution failure happens under a non-blocking
+    retry policy. `retry_after` is the number of seconds to wait before trying again.
+    """
+    def __init__(self, message: str = "Evolution API call should be retried later", retry_after: float = 0, request: any = None, response: any = None):
+        self.retry_after = retry_after
+        super().__init__(f"{message} (retry after {retry_after:.1f}s)", request=request, response=response)
+
+class CircuitOpenError(EvolutionRetryLaterError):
+    """
+    Raised without sending a request while the Evolution circuit breaker is open.
+    Jobs that can reschedule themselves defer by `retry_after` seconds; everything else fails fast.
+    """
+    def __init__(self, message: str = "Evolution circuit breaker is open", retry_after: float = 0, request: any = None, response: any = None):
+        super().__init__(message, retry_after=retry_after, request=request, response=response)
+
+class SendDeferredError(EvolutionRetryLaterError):
+    """
+    Raised without sending a request when a message send is held back by its own limits: the lane's
+    share of the send rate (lane_rate_limit) or the sender pool (no connected instance with budget left).
+    Like CircuitOpenError, deferring this way doesn't count as an attempt.
+    """
+    def __init__(self, message: str = "Message send deferred", retry_after: float = 0, request: any = None, response: any = None):
+        super().__init__(message, retry_after=retry_after, request=request, response=response)
+
+class RecipientUploadError(DomainError):
+    """Raised when an uploaded recipient list (CSV/NDJSON) is malformed; `line` is the 1-based line number, if any."""
+    def __init__(self, message: str = "Invalid recipient upload", line: int = None, request: any = None, response: any = None):
+        self.line = line
+        super().__init__(f"Line {line}: {message}" if line is not None else message, request=request, response=response)
+
+class MessageTemplateError(DomainError):
+    """Raised when a recipient has no value for one of the placeholders of a mass-message template."""
+    def __init__(self, message: str = "Invalid message template", request: any = None, response: any = None):
+        super().__init__(message, request=request, response=response)
@@ -0,0 +1,56 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+
+class FakeClock:
+    """Stand-in for time.monotonic that only moves when told to (sleep advances it too)."""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@pytest.fixture
+def fake_time(monkeypatch):
+    """
+    Returns a function that swaps the `time` module of the given modules for a FakeClock
+    (monotonic/sleep), and the clock itself.
+    """
+    clock = FakeClock()
+
+    def install(*modules):
+        for module in modules:
+            monkeypatch.setattr(module, "time", SimpleNamespace(monotonic=clock, sleep=clock.advance))
+        return clock
+
+    return install
+
+
+class BlockingLoader:
+    """Loader that returns `value` only once released, so tests can act while a load is running."""
+
+    def __init__(self, value):
+        self.value = value
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        self.started.set()
+        assert self.release.wait(5)
+        return self.value
+
+
+def run_in_thread(fn):
+    result = {}
+    thread = threading.Thread(target=lambda: result.setdefault("value", fn()))
+    thread.start()
+    return thread, result
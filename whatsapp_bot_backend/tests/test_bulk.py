@@ -0,0 +1,93 @@
+import pytest
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import Session
+
+from db import bulk
+from db.bulk import _chunks, _power_of_two_parts, bulk_insert
+
+
+@pytest.fixture
+def cur():
+    """Session on an in-memory SQLite database with a `recipients` table; `cur.statements` logs the SQL run."""
+    engine = create_engine("sqlite://")
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE recipients (id INTEGER PRIMARY KEY, name TEXT, phone TEXT)"))
+
+    session = Session(engine)
+    session.statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: session.statements.append(args[2]))
+    yield session
+    session.close()
+
+
+def rows(n, start=0):
+    return ({"id": i, "name": f"r{i}", "phone": f"9725{i:08d}"} for i in range(start, start + n))
+
+
+def inserted_rows_per_statement(cur):
+    return [statement.count("(") - 1 for statement in cur.statements if statement.startswith("INSERT")]
+
+
+def test_chunks():
+    assert [len(chunk) for chunk in _chunks(range(7), 3)] == [3, 3, 1]
+    assert list(_chunks([], 3)) == []
+
+
+@pytest.mark.parametrize("n, sizes", [(1, [1]), (8, [8]), (13, [8, 4, 1]), (500, [256, 128, 64, 32, 16, 4])])
+def test_power_of_two_parts(n, sizes):
+    parts = list(_power_of_two_parts(list(range(n))))
+    assert [len(part) for part in parts] == sizes
+    assert [item for part in parts for item in part] == list(range(n))
+
+
+def test_full_chunks_then_power_of_two_parts(cur):
+    bulk_insert(cur, "recipients", ["id", "name", "phone"], rows(2500), chunk_size=1000)
+
+    assert inserted_rows_per_statement(cur) == [1000, 1000, 256, 128, 64, 32, 16, 4]
+    assert cur.execute(text("SELECT count(*), min(id), max(id) FROM recipients")).one() == (2500, 0, 2499)
+    assert cur.execute(text("SELECT name, phone FROM recipients WHERE id = 1234")).one() == ("r1234", "972500001234")
+
+
+def test_rows_are_consumed_lazily(cur):
+    consumed = []
+
+    def generate():
+        for row in rows(5):
+            consumed.append(row["id"])
+            yield row
+
+    bulk_insert(cur, "recipients", ["id", "name", "phone"], generate(), chunk_size=2)
+    assert consumed == [0, 1, 2, 3, 4]
+    assert inserted_rows_per_statement(cur) == [2, 2, 1]
+
+
+def test_missing_keys_are_null(cur):
+    bulk_insert(cur, "recipients", ["id", "name", "phone"], [{"id": 1}])
+    assert cur.execute(text("SELECT name, phone FROM recipients")).one() == (None, None)
+
+
+def test_chunk_size_is_capped_by_bind_parameters(cur, monkeypatch):
+    monkeypatch.setattr(bulk, "MAX_BIND_PARAMS", 30)
+    bulk_insert(cur, "recipients", ["id", "name", "phone"], rows(25), chunk_size=1000)
+    # 30 // 3 columns = 10 rows per statement
+    assert inserted_rows_per_statement(cur) == [10, 10, 4, 1]
+
+
+def test_nothing_to_insert(cur):
+    bulk_insert(cur, "recipients", ["id", "name", "phone"], [])
+    assert cur.statements == []
+
+
+@pytest.mark.parametrize("table, columns", [
+    ("recipients; DROP TABLE recipients", ["id"]),
+    ("recipients", ["id", "name) VALUES (1, 'x'); --"]),
+])
+def test_only_plain_identifiers(cur, table, columns):
+    with pytest.raises(ValueError, match="Invalid SQL identifier"):
+        bulk_insert(cur, table, columns, rows(1))
+
+
+def test_unknown_method(cur):
+    with pytest.raises(ValueError, match="Unknown bulk insert method"):
+        bulk_insert(cur, "recipients", ["id"], rows(1), method="csv")
+
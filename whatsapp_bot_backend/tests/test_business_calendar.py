@@ -0,0 +1,61 @@
+from datetime import date, datetime, time, timedelta
+
+import pytest
+
+from shared.timezone import TIMEZONE
+from whatsapp.core.business_calendar import BusinessCalendar
+from whatsapp.core.core import BUSINESS_HOURS_DEFAULT
+from whatsapp.whatsapp_group.core.compute_spread_times import OCT1, business_seconds_since_oct1, compute_spread_times
+
+
+# Oct 1 2025 on, without holidays: counts the same as the weekly functions
+CALENDAR = BusinessCalendar(BUSINESS_HOURS_DEFAULT, {}, OCT1.date(), 200)
+
+
+@pytest.mark.parametrize("dt", [
+    OCT1,
+    datetime(2025, 10, 1, 7, 59, tzinfo=TIMEZONE),
+    datetime(2025, 10, 1, 13, 17, 5, tzinfo=TIMEZONE),
+    datetime(2025, 10, 3, 16, 59, 59, tzinfo=TIMEZONE),
+    datetime(2025, 10, 4, 12, 0, tzinfo=TIMEZONE),
+    datetime(2025, 11, 12, 9, 45, tzinfo=TIMEZONE),
+    datetime(2026, 2, 1, 19, 0, tzinfo=TIMEZONE),
+], ids=str)
+def test_matches_the_weekly_business_seconds(dt):
+    assert CALENDAR.business_seconds_at(dt) == business_seconds_since_oct1(dt)
+    if CALENDAR.is_open(dt):
+        assert CALENDAR.date_at_business_seconds(CALENDAR.business_seconds_at(dt)) == dt
+
+
+def test_override_closes_a_day():
+    holiday = date(2025, 10, 6)  # Monday
+    calendar = BusinessCalendar(BUSINESS_HOURS_DEFAULT, {holiday: None}, OCT1.date(), 30)
+
+    assert calendar.hours_on(holiday) is None
+    assert calendar.business_seconds_between(
+        datetime(2025, 10, 6, 0, 0, tzinfo=TIMEZONE), datetime(2025, 10, 7, 0, 0, tzinfo=TIMEZONE)
+    ) == 0
+    assert calendar.next_open(datetime(2025, 10, 6, 9, 0, tzinfo=TIMEZONE)) == datetime(2025, 10, 7, 8, 0, tzinfo=TIMEZONE)
+
+
+def test_override_shortens_a_day():
+    short_day = date(2025, 10, 8)  # Wednesday
+    calendar = BusinessCalendar(BUSINESS_HOURS_DEFAULT, {short_day: (time(8, 0), time(12, 0))}, OCT1.date(), 30)
+    assert calendar.business_seconds_between(
+        datetime(2025, 10, 8, 0, 0, tzinfo=TIMEZONE), datetime(2025, 10, 9, 0, 0, tzinfo=TIMEZONE)
+    ) == 4 * 3600
+
+
+def test_past_the_horizon_raises():
+    calendar = BusinessCalendar(BUSINESS_HOURS_DEFAULT, {}, OCT1.date(), 7)
+    with pytest.raises(ValueError):
+        calendar.business_seconds_at(datetime(2025, 10, 20, 9, 0, tzinfo=TIMEZONE))
+
+
+def test_spread_times_with_calendar_match_the_weekly_functions():
+    start = datetime(2025, 10, 3, 11, 30, tzinfo=TIMEZONE)
+    deadline = datetime(2025, 10, 9, 9, 30, tzinfo=TIMEZONE)
+    assert compute_spread_times(start, deadline=deadline, runs=7, calendar=CALENDAR) == compute_spread_times(
+        start, deadline=deadline, runs=7
+    )
+
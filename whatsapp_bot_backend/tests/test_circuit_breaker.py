@@ -0,0 +1,108 @@
+import pytest
+
+from shared.domain_errors import CircuitOpenError
+from whatsapp.core import circuit_breaker
+from whatsapp.core.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, is_breaker_failure_status
+
+
+@pytest.fixture
+def clock(fake_time):
+    return fake_time(circuit_breaker)
+
+
+@pytest.fixture
+def breaker(clock):
+    return CircuitBreaker("test", window_seconds=60, min_calls=4, failure_rate_threshold=0.5, open_seconds=30)
+
+
+def call(breaker, ok):
+    breaker.before_call()
+    breaker.record(ok)
+
+
+def trip(breaker):
+    for _ in range(breaker.min_calls):
+        call(breaker, False)
+    assert breaker.state == OPEN
+
+
+def test_stays_closed_under_min_calls(breaker):
+    for _ in range(breaker.min_calls - 1):
+        call(breaker, False)
+    assert breaker.state == CLOSED
+
+
+def test_stays_closed_below_the_failure_rate(breaker):
+    for ok in (True, True, True, False, True, False):
+        call(breaker, ok)
+    assert breaker.state == CLOSED
+
+
+def test_opens_at_the_failure_rate(breaker):
+    for ok in (True, False, True, False):
+        call(breaker, ok)
+    assert breaker.state == OPEN
+    assert breaker.snapshot()["times_opened"] == 1
+
+
+def test_old_outcomes_leave_the_window(breaker, clock):
+    for _ in range(3):
+        call(breaker, False)
+    clock.advance(61)
+    call(breaker, False)
+    assert breaker.state == CLOSED
+    assert breaker.snapshot()["failures_in_window"] == 1
+
+
+def test_open_fails_fast_with_retry_after(breaker, clock):
+    trip(breaker)
+    clock.advance(10)
+
+    with pytest.raises(CircuitOpenError) as raised:
+        breaker.before_call()
+    # the rest of the open period, plus up to open_seconds of spread
+    assert 20 <= raised.value.retry_after <= 50
+    assert breaker.snapshot()["rejected_calls"] == 1
+
+
+def test_half_open_lets_a_single_probe_through(breaker, clock):
+    trip(breaker)
+    clock.advance(30)
+
+    breaker.before_call()  # the probe
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_probe_success_closes(breaker, clock):
+    trip(breaker)
+    clock.advance(30)
+
+    call(breaker, True)
+    assert breaker.state == CLOSED
+    assert breaker.snapshot()["calls_in_window"] == 0
+    breaker.before_call()
+
+
+def test_probe_failure_reopens(breaker, clock):
+    trip(breaker)
+    clock.advance(30)
+
+    call(breaker, False)
+    assert breaker.state == OPEN
+    assert breaker.snapshot()["times_opened"] == 2
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_reset(breaker):
+    trip(breaker)
+    breaker.reset()
+    assert breaker.state == CLOSED
+    breaker.before_call()
+
+
+@pytest.mark.parametrize("status_code, failure", [(200, False), (404, False), (429, False), (500, True), (503, True)])
+def test_failure_statuses(status_code, failure):
+    assert is_breaker_failure_status(status_code) is failure
@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from shared.timezone import TIMEZONE
+from whatsapp.core.core import BUSINESS_HOURS_DEFAULT
+from whatsapp.whatsapp_group.core.compute_spread_times import (
+    OCT1,
+    _iter_business_seconds_to_dates,
+    business_seconds_since_oct1,
+    compute_spread_times,
+    compute_spread_times_batch,
+    convert_business_seconds_since_oct1_to_date,
+)
+
+
+def business_seconds_loop(dt: datetime, business_hours=BUSINESS_HOURS_DEFAULT) -> int:
+    """The original day-by-day loop business_seconds_since_oct1 replaced (reference implementation)."""
+    total_seconds = 0
+    current = dt
+    while current >= OCT1:
+        start_time, end_time = business_hours[current.weekday()]
+        start_sec = start_time.hour * 3600 + start_time.minute * 60 + start_time.second
+        end_sec = end_time.hour * 3600 + end_time.minute * 60 + end_time.second
+        t = current.time()
+        current_sec = t.hour * 3600 + t.minute * 60 + t.second
+
+        if current_sec >= end_sec:
+            total_seconds += max(0, end_sec - start_sec)
+        elif current_sec >= start_sec:
+            total_seconds += max(0, current_sec - start_sec)
+
+        prev_date = current.date() - timedelta(days=1)
+        current = datetime(prev_date.year, prev_date.month, prev_date.day, 23, 59, 59, tzinfo=TIMEZONE)
+    return total_seconds
+
+
+SAMPLE_DATES = [
+    OCT1,
+    datetime(2025, 10, 1, 7, 59, tzinfo=TIMEZONE),       # before opening
+    datetime(2025, 10, 1, 8, 0, tzinfo=TIMEZONE),        # opening
+    datetime(2025, 10, 1, 13, 17, 5, tzinfo=TIMEZONE),
+    datetime(2025, 10, 1, 20, 0, tzinfo=TIMEZONE),       # closing
+    datetime(2025, 10, 3, 16, 59, 59, tzinfo=TIMEZONE),  # Friday, short day
+    datetime(2025, 10, 4, 12, 0, tzinfo=TIMEZONE),       # Saturday, closed
+    datetime(2025, 10, 5, 8, 30, tzinfo=TIMEZONE),
+    datetime(2025, 10, 23, 23, 59, 59, tzinfo=TIMEZONE),
+    datetime(2025, 11, 12, 9, 45, tzinfo=TIMEZONE),      # weeks later
+    datetime(2026, 2, 1, 19, 0, tzinfo=TIMEZONE),
+]
+
+
+@pytest.mark.parametrize("dt", SAMPLE_DATES, ids=str)
+def test_business_seconds_match_the_loop(dt):
+    assert business_seconds_since_oct1(dt) == business_seconds_loop(dt)
+
+
+@pytest.mark.parametrize("dt", [
+    datetime(2025, 10, 1, 8, 0, tzinfo=TIMEZONE),
+    datetime(2025, 10, 1, 13, 17, 5, tzinfo=TIMEZONE),
+    datetime(2025, 10, 5, 8, 30, tzinfo=TIMEZONE),
+    datetime(2025, 11, 12, 9, 45, tzinfo=TIMEZONE),
+], ids=str)
+def test_business_seconds_round_trip(dt):
+    assert convert_business_seconds_since_oct1_to_date(business_seconds_since_oct1(dt)) == dt
+
+
+def test_single_pass_conversion_matches_per_item_conversion():
+    business_seconds_list = list(range(0, 40 * 12 * 3600, 4567))
+    assert list(_iter_business_seconds_to_dates(business_seconds_list)) == [
+        convert_business_seconds_since_oct1_to_date(business_seconds) for business_seconds in business_seconds_list
+    ]
+
+
+def test_deadline_before_start_raises_when_called():
+    start = datetime(2025, 10, 8, 12, 0, tzinfo=TIMEZONE)
+    with pytest.raises(ValueError, match="before start"):
+        compute_spread_times_batch(start, 3, deadline=start - timedelta(days=1))
+
+
+def test_batch_matches_compute_spread_times():
+    start = datetime(2025, 10, 3, 11, 30, tzinfo=TIMEZONE)
+    assert list(compute_spread_times_batch(start, 5, min_diff=timedelta(hours=3))) == compute_spread_times(
+        start, min_diff=timedelta(hours=3), runs=5
+    )
@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+
+from fake_evolution.server import EndpointFaults, FakeEvolutionConfig, start_fake_evolution
+from job_and_listener.job_priority import PRIORITY_BULK
+from shared.domain_errors import CircuitOpenError, EvolutionRetryLaterError
+from whatsapp.core import evo_request, evo_request_async, lane_rate_limit
+from whatsapp.core.circuit_breaker import CircuitBreaker
+from whatsapp.core.evo_request_async import EvoRequest, run_evo_requests
+from whatsapp.core.lane_rate_limit import LANE_BURST, LaneRateLimiter
+from whatsapp.core.retry_policy import RetryPolicy
+
+
+@pytest.fixture
+def fake_evolution(monkeypatch):
+    """Fake Evolution server behind evo_url, with a fresh lane limiter and breaker; returns its config."""
+    config = FakeEvolutionConfig()
+    server, base_url = start_fake_evolution(config)
+    monkeypatch.setattr(evo_request, "BASE_URL", base_url)
+    monkeypatch.setattr(lane_rate_limit, "lane_rate_limiter", LaneRateLimiter())
+    monkeypatch.setattr(evo_request_async, "evolution_breaker", CircuitBreaker("test"))
+    yield config
+    server.shutdown()
+
+
+@pytest.fixture
+def bulk_lane(monkeypatch):
+    monkeypatch.setattr(lane_rate_limit, "current_priority", lambda: PRIORITY_BULK)
+
+
+def send(number, instance="instance_a"):
+    return EvoRequest("message/sendText", payload={"number": number, "text": "hi"}, instance=instance)
+
+
+def test_requests_go_through_their_instance(fake_evolution):
+    results = run_evo_requests([
+        send("972500000001", instance="instance_a"),
+        EvoRequest("instance/connectionState", method="GET", instance="instance_b"),
+    ])
+
+    assert [r.status_code for r in results] == [201, 200]
+    assert results[0].request.url.path == "/message/sendText/instance_a"
+    assert results[1].request.url.path == "/instance/connectionState/instance_b"
+
+
+def test_sends_take_lane_tokens_of_their_instance(fake_evolution, bulk_lane):
+    results = run_evo_requests([send(f"97250000000{i}") for i in range(LANE_BURST + 1)])
+
+    # the bulk lane doesn't wait: the send past the burst is deferred, not sent
+    assert [getattr(r, "status_code", None) for r in results[:LANE_BURST]] == [201] * LANE_BURST
+    assert isinstance(results[-1], EvolutionRetryLaterError)
+
+    snapshot = lane_rate_limit.lane_rate_limiter.snapshot()
+    assert snapshot["instance_a"][PRIORITY_BULK]["deferred"] == 1
+
+
+def test_open_breaker_fails_fast(fake_evolution):
+    breaker = evo_request_async.evolution_breaker
+    for _ in range(breaker.min_calls):
+        breaker.before_call()
+        breaker.record(False)
+
+    [result] = run_evo_requests([EvoRequest("instance/connectionState", method="GET")])
+
+    assert isinstance(result, CircuitOpenError)
+
+
+def test_retries_use_the_policy(fake_evolution, monkeypatch):
+    fake_evolution.faults["instance/connectionState"] = EndpointFaults(throttle_rate=1.0, retry_after=0)
+    policy = RetryPolicy(max_attempts=3, base_delay=0, jitter=0, total_budget=5)
+    monkeypatch.setattr(evo_request_async, "DEFAULT_RETRY_POLICY", policy)
+
+    with pytest.warns(UserWarning, match="failed: HTTP 429"):
+        [result] = run_evo_requests([EvoRequest("instance/connectionState", method="GET")])
+
+    # out of attempts: the last throttled response is returned
+    assert result.status_code == 429
+
+
+def test_deferring_policy_raises_retry_later(fake_evolution):
+    fake_evolution.faults["instance/connectionState"] = EndpointFaults(throttle_rate=1.0, retry_after=7)
+
+    async def call():
+        try:
+            return await evo_request_async.async_evo_request_with_retries(
+                "instance/connectionState", method="GET", policy=RetryPolicy(sleep_in_thread=False)
+            )
+        finally:
+            await evo_request_async.close_async_evo_client()
+
+    with pytest.raises(EvolutionRetryLaterError) as e:
+        asyncio.run(call())
+    assert e.value.retry_after == 7
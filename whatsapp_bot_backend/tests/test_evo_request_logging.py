@@ -0,0 +1,89 @@
+import logging
+
+import pytest
+import requests
+
+from whatsapp.core import evo_request
+from whatsapp.core.evo_request import _log_exchange, _redact, _should_sample, _truncate
+
+
+def prepared(json=None, data=None, path="message/sendText"):
+    return requests.Request(
+        "POST", f"http://evolution/{path}/instance", headers={"apikey": "secret", "Accept": "*/*"}, json=json, data=data
+    ).prepare()
+
+
+def response(status_code=200, content=b'{"ok": true}'):
+    resp = requests.Response()
+    resp.status_code = status_code
+    resp._content = content
+    return resp
+
+
+@pytest.fixture
+def evo_log(caplog, monkeypatch):
+    monkeypatch.setattr(evo_request, "_sample_counts", {})
+    caplog.set_level(logging.DEBUG, logger="evolution")
+    return caplog
+
+
+def test_redact_nested_keys_case_insensitively():
+    body = {"Token": "t", "number": "972", "nested": [{"apikey": "k", "text": "hi"}]}
+    assert _redact(body) == {"Token": "***", "number": "972", "nested": [{"apikey": "***", "text": "hi"}]}
+    # the original isn't modified
+    assert body["Token"] == "t"
+
+
+def test_truncate(monkeypatch):
+    monkeypatch.setattr(evo_request, "EVO_LOG_BODY_MAX_BYTES", 4)
+    assert _truncate(None) == ""
+    assert _truncate("abcd") == "abcd"
+    assert _truncate(b"abcdef") == "abcd... [6 bytes, truncated]"
+    # counted in bytes, not characters
+    assert _truncate("שלום") == "של... [8 bytes, truncated]"
+
+
+def test_sampling_logs_one_in_n(monkeypatch):
+    monkeypatch.setattr(evo_request, "_sample_counts", {})
+    monkeypatch.setattr(evo_request, "EVO_LOG_SAMPLE_EVERY", {"message/sendText": 3})
+
+    assert [_should_sample("message/sendText") for _ in range(7)] == [True, False, False, True, False, False, True]
+    assert all(_should_sample("group/create") for _ in range(3))
+
+
+def test_debug_dump_is_redacted(evo_log):
+    _log_exchange("group/create", prepared(path="group/create"), response(), 0.05, json_payload={"token": "t", "subject": "s"})
+
+    dump = "\n".join(r.getMessage() for r in evo_log.records if r.levelno == logging.DEBUG)
+    assert "secret" not in dump and "'t'" not in dump
+    assert "'apikey': '***'" in dump and "'token': '***'" in dump and "'subject': 's'" in dump
+
+
+def test_debug_dump_uses_the_raw_body_without_json_payload(evo_log, monkeypatch):
+    monkeypatch.setattr(evo_request, "EVO_LOG_BODY_MAX_BYTES", 5)
+    _log_exchange("group/create", prepared(data="x" * 10, path="group/create"), response(), 0.05)
+
+    dump = "\n".join(r.getMessage() for r in evo_log.records if r.levelno == logging.DEBUG)
+    assert "xxxxx... [10 bytes, truncated]" in dump
+
+
+def test_sampled_endpoint_summaries(evo_log, monkeypatch):
+    monkeypatch.setattr(evo_request, "EVO_LOG_SAMPLE_EVERY", {"message/sendText": 2})
+    evo_log.set_level(logging.INFO, logger="evolution")
+
+    for _ in range(4):
+        _log_exchange("message/sendText", prepared(), response(201), 0.1)
+
+    assert [r.getMessage() for r in evo_log.records] == ["POST message/sendText -> 201 in 100ms"] * 2
+
+
+def test_error_responses_are_always_logged(evo_log, monkeypatch):
+    monkeypatch.setattr(evo_request, "EVO_LOG_SAMPLE_EVERY", {"message/sendText": 100})
+    evo_log.set_level(logging.WARNING, logger="evolution")
+
+    for _ in range(3):
+        _log_exchange("message/sendText", prepared(), response(500, b"boom"), 0.2)
+
+    assert [(r.levelno, r.getMessage()) for r in evo_log.records] == [
+        (logging.WARNING, "POST message/sendText -> 500 in 200ms: boom")
+    ] * 3
@@ -0,0 +1,130 @@
+import pytest
+
+from conftest import BlockingLoader, run_in_thread
+from whatsapp.core import group_cache, single_flight
+from whatsapp.core.group_cache import TTLCache
+from whatsapp.core.single_flight import SingleFlight, SingleFlightStats, request_key
+
+
+@pytest.fixture
+def clock(fake_time):
+    return fake_time(group_cache)
+
+
+def test_loads_once_then_hits(clock):
+    cache = TTLCache("test", ttl_seconds=60)
+    calls = []
+
+    assert cache.get_or_load("g1", lambda: calls.append(1) or "v1") == "v1"
+    assert cache.get_or_load("g1", lambda: calls.append(1) or "v2") == "v1"
+    assert len(calls) == 1
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_expired_entry_is_reloaded(clock):
+    cache = TTLCache("test", ttl_seconds=60)
+    cache.get_or_load("g1", lambda: "old")
+
+    clock.advance(61)
+    assert cache.get_or_load("g1", lambda: "new") == "new"
+    assert cache.stats()["expired"] == 1
+
+
+def test_least_recently_used_is_evicted(clock):
+    cache = TTLCache("test", ttl_seconds=60, max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get_or_load("a", lambda: None)  # touch a
+    cache.put("c", 3)
+
+    assert cache.stats()["evictions"] == 1
+    assert cache.get_or_load("a", lambda: "reloaded") == 1
+    assert cache.get_or_load("c", lambda: "reloaded") == 3
+    assert cache.get_or_load("b", lambda: "reloaded") == "reloaded"
+
+
+def test_memory_cap(clock):
+    cache = TTLCache("test", ttl_seconds=60, max_bytes=10, sizeof=len)
+    cache.put("a", "x" * 6)
+    cache.put("b", "y" * 6)  # over the cap: a goes
+    cache.put("c", "z" * 11)  # bigger than the whole cache: not stored
+
+    assert cache.stats()["entries"] == 1
+    assert cache.stats()["bytes"] == 6
+    assert cache.get_or_load("b", lambda: None) == "y" * 6
+
+
+def test_loader_errors_are_not_cached(clock):
+    cache = TTLCache("test", ttl_seconds=60)
+
+    def fail():
+        raise RuntimeError("evolution down")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_load("g1", fail)
+    assert cache.get_or_load("g1", lambda: "v") == "v"
+
+
+def test_invalidate(clock):
+    cache = TTLCache("test", ttl_seconds=60)
+    cache.put("g1", "old")
+    cache.invalidate("g1")
+    assert cache.get_or_load("g1", lambda: "new") == "new"
+
+
+@pytest.mark.parametrize("invalidate", [lambda cache: cache.invalidate("g1"), lambda cache: cache.clear()])
+def test_load_that_raced_an_invalidation_is_not_stored(clock, invalidate):
+    cache = TTLCache("test", ttl_seconds=60)
+    loader = BlockingLoader("stale")
+
+    thread, result = run_in_thread(lambda: cache.get_or_load("g1", loader))
+    assert loader.started.wait(5)
+    invalidate(cache)
+    loader.release.set()
+    thread.join(5)
+
+    # the caller still gets what it loaded, but it isn't cached
+    assert result["value"] == "stale"
+    assert cache.get_or_load("g1", lambda: "fresh") == "fresh"
+
+
+def test_invalidating_another_key_doesnt_drop_a_load(clock):
+    cache = TTLCache("test", ttl_seconds=60)
+    loader = BlockingLoader("v1")
+
+    thread, _ = run_in_thread(lambda: cache.get_or_load("g1", loader))
+    assert loader.started.wait(5)
+    cache.invalidate("g2")
+    loader.release.set()
+    thread.join(5)
+
+    assert cache.get_or_load("g1", lambda: "reloaded") == "v1"
+
+
+def test_group_write_invalidates_the_cache_and_in_flight_lookups(monkeypatch):
+    flights = SingleFlight(SingleFlightStats())
+    monkeypatch.setattr(single_flight, "evo_single_flight", flights)
+    cache = TTLCache("participants", ttl_seconds=60)
+    monkeypatch.setattr(group_cache, "GROUP_CACHES", (cache,))
+
+    cache.put("g1", ["old"])
+    key = request_key("GET", "http://evo/group/participants/default", {"groupJid": "g1"})
+    loader = BlockingLoader(["old"])
+    leader, _ = run_in_thread(lambda: flights.do(key, loader))
+    assert loader.started.wait(5)
+
+    group_cache.invalidate_on_group_write("/group/updateParticipant", {"groupJid": "g1"})
+
+    assert cache.get_or_load("g1", lambda: ["new"]) == ["new"]
+    assert flights.do(key, lambda: ["new"]) == ["new"]
+    loader.release.set()
+    leader.join(5)
+
+
+def test_reads_dont_invalidate(monkeypatch):
+    cache = TTLCache("participants", ttl_seconds=60)
+    monkeypatch.setattr(group_cache, "GROUP_CACHES", (cache,))
+    cache.put("g1", ["cached"])
+
+    group_cache.invalidate_on_group_write("group/participants", {"groupJid": "g1"})
+    assert cache.get_or_load("g1", lambda: ["reloaded"]) == ["cached"]
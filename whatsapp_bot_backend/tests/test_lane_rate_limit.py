@@ -0,0 +1,162 @@
+import asyncio
+
+import pytest
+
+from job_and_listener.job_priority import PRIORITY_BULK, PRIORITY_CRITICAL, PRIORITY_NORMAL
+from shared.domain_errors import EvolutionRetryLaterError
+from whatsapp.core import instances, lane_rate_limit
+from whatsapp.core.instances import WhatsappInstance
+from whatsapp.core.lane_rate_limit import (
+    LANE_BURST,
+    LANE_SHARES,
+    LaneRateLimiter,
+    TokenBucket,
+    acquire_send_token,
+    registered_bulk_budget,
+)
+
+
+@pytest.fixture
+def clock(fake_time):
+    return fake_time(lane_rate_limit)
+
+
+# --- TokenBucket ---
+
+def test_bucket_starts_full_and_runs_out(clock):
+    bucket = TokenBucket(rate=1, capacity=3)
+    assert [bucket.take() for _ in range(3)] == [0, 0, 0]
+    assert bucket.take() == pytest.approx(1.0)
+
+
+def test_bucket_wait_is_time_to_the_next_token(clock):
+    bucket = TokenBucket(rate=0.5, capacity=1)
+    bucket.take()
+    clock.advance(1.5)
+    assert bucket.take() == pytest.approx(0.5)
+    clock.advance(0.5)
+    assert bucket.take() == 0
+
+
+def test_bucket_refill_is_capped(clock):
+    bucket = TokenBucket(rate=1, capacity=2)
+    bucket.take()
+    bucket.take()
+    clock.advance(100)
+    assert bucket.available() == 2
+
+
+# --- LaneRateLimiter ---
+
+def drain(limiter, instance, lane):
+    for _ in range(LANE_BURST):
+        limiter.acquire(instance, lane)
+
+
+def test_lanes_have_their_share_of_the_rate(clock):
+    limiter = LaneRateLimiter(sends_per_minute=60)
+    assert {lane: limiter.lane_rate("a", lane) for lane in LANE_SHARES} == {
+        PRIORITY_CRITICAL: 30, PRIORITY_NORMAL: 18, PRIORITY_BULK: 12,
+    }
+
+
+def test_exhausted_bulk_lane_defers_without_waiting(clock):
+    limiter = LaneRateLimiter(sends_per_minute=60)
+    drain(limiter, "a", PRIORITY_BULK)
+
+    with pytest.raises(EvolutionRetryLaterError) as raised:
+        limiter.acquire("a", PRIORITY_BULK)
+    assert raised.value.retry_after == pytest.approx(5)
+    assert clock.now == 1000
+
+    # the other lanes and instances keep their tokens
+    limiter.acquire("a", PRIORITY_CRITICAL)
+    limiter.acquire("b", PRIORITY_BULK)
+    assert limiter.snapshot()["a"][PRIORITY_BULK]["deferred"] == 1
+
+
+def test_critical_lane_waits_in_thread(clock):
+    limiter = LaneRateLimiter(sends_per_minute=60)
+    drain(limiter, "a", PRIORITY_CRITICAL)
+
+    limiter.acquire("a", PRIORITY_CRITICAL)
+    assert clock.now == pytest.approx(1002)
+    assert limiter.snapshot()["a"][PRIORITY_CRITICAL]["waits"] == 1
+
+
+def test_wait_past_the_lane_limit_defers(clock, monkeypatch):
+    monkeypatch.setitem(lane_rate_limit.LANE_MAX_WAIT_SECONDS, PRIORITY_NORMAL, 1.0)
+    limiter = LaneRateLimiter(sends_per_minute=10)
+    drain(limiter, "a", PRIORITY_NORMAL)
+
+    with pytest.raises(EvolutionRetryLaterError):
+        limiter.acquire("a", PRIORITY_NORMAL)
+
+
+def test_async_acquire_waits_without_blocking(clock, monkeypatch):
+    slept = []
+
+    async def fake_sleep(seconds):
+        slept.append(seconds)
+        clock.advance(seconds)
+
+    monkeypatch.setattr(lane_rate_limit.asyncio, "sleep", fake_sleep)
+    limiter = LaneRateLimiter(sends_per_minute=60)
+    drain(limiter, "a", PRIORITY_CRITICAL)
+
+    asyncio.run(limiter.acquire_async("a", PRIORITY_CRITICAL))
+    assert slept == [pytest.approx(2)]
+
+
+def test_bulk_lane_follows_the_instance_budget(clock):
+    budgets = {"registered": 30}
+    limiter = LaneRateLimiter(sends_per_minute=20, bulk_budget=budgets.get)
+
+    assert limiter.lane_rate("registered", PRIORITY_BULK) == 30
+    assert limiter.lane_rate("registered", PRIORITY_CRITICAL) == 10
+    # not a registered sender: the lane's share
+    assert limiter.lane_rate("other", PRIORITY_BULK) == 4
+
+    drain(limiter, "registered", PRIORITY_BULK)
+    with pytest.raises(EvolutionRetryLaterError) as raised:
+        limiter.acquire("registered", PRIORITY_BULK)
+    assert raised.value.retry_after == pytest.approx(2)
+
+
+def test_bulk_bucket_is_rebuilt_when_the_budget_changes(clock):
+    budgets = {"a": 6}
+    limiter = LaneRateLimiter(bulk_budget=budgets.get)
+    limiter.acquire("a", PRIORITY_BULK)
+
+    budgets["a"] = 60
+    limiter.acquire("a", PRIORITY_BULK)
+    assert limiter.snapshot()["a"][PRIORITY_BULK]["per_minute"] == 60
+
+
+def test_registered_bulk_budget_is_the_planners_rate(monkeypatch):
+    monkeypatch.setattr(instances, "get_sending_instances", lambda: [
+        WhatsappInstance(name="a", messages_per_minute=30, messages_per_hour=600),
+        WhatsappInstance(name="b", messages_per_minute=5, messages_per_hour=6000),
+    ])
+    assert registered_bulk_budget("a") == 10
+    assert registered_bulk_budget("b") == 5
+    assert registered_bulk_budget("group_instance") is None
+
+
+class RecordingLimiter:
+    def __init__(self):
+        self.calls = []
+
+    def acquire(self, instance, lane):
+        self.calls.append((instance, lane))
+
+
+def test_only_message_sends_are_limited(monkeypatch):
+    limiter = RecordingLimiter()
+    monkeypatch.setattr(lane_rate_limit, "lane_rate_limiter", limiter)
+    monkeypatch.setattr(lane_rate_limit, "current_priority", lambda: PRIORITY_BULK)
+
+    acquire_send_token("group/participants", "a")
+    acquire_send_token("message/sendText", "a")
+    acquire_send_token("message/sendMedia", "b")
+    assert limiter.calls == [("a", PRIORITY_BULK), ("b", PRIORITY_BULK)]
@@ -0,0 +1,160 @@
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+import requests
+
+from shared.domain_errors import ConnectionDomainError, EvolutionRetryLaterError, EvolutionServerError
+from whatsapp.core import evo_request, retry_policy
+from whatsapp.core.evo_request import evo_request_with_retries
+from whatsapp.core.retry_policy import RetryPolicy, _parse_retry_after
+
+
+def response(status_code, retry_after=None):
+    resp = requests.Response()
+    resp.status_code = status_code
+    if retry_after is not None:
+        resp.headers["Retry-After"] = retry_after
+    return resp
+
+
+@pytest.mark.parametrize("random_value", [0.0, 0.5, 0.999])
+def test_backoff_is_exponential_with_bounded_jitter(monkeypatch, random_value):
+    monkeypatch.setattr(retry_policy.random, "random", lambda: random_value)
+    policy = RetryPolicy(base_delay=5, multiplier=2, max_delay=60, jitter=0.5)
+
+    for attempt, full in [(1, 5), (2, 10), (3, 20), (4, 40), (5, 60), (9, 60)]:
+        delay = policy.backoff(attempt)
+        assert full * (1 - policy.jitter) <= delay <= full
+        assert delay == pytest.approx(full * (1 - 0.5 * random_value))
+
+
+def test_no_jitter():
+    assert RetryPolicy(base_delay=3, jitter=0).backoff(2) == 6
+
+
+@pytest.mark.parametrize("status, method, retryable", [
+    (429, "POST", True),
+    (429, "GET", True),
+    (502, "GET", True),
+    (503, "delete", True),
+    (504, "PUT", True),
+    (502, "POST", False),
+    (504, "POST", False),
+    (500, "GET", False),
+    (400, "GET", False),
+    (200, "GET", False),
+])
+def test_retryable_statuses(status, method, retryable):
+    assert RetryPolicy().is_retryable_response(response(status), method) is retryable
+
+
+def test_retryable_errors():
+    policy = RetryPolicy()
+    assert policy.is_retryable_error(ConnectionDomainError())
+    assert not policy.is_retryable_error(EvolutionServerError())
+    assert not policy.is_retryable_response(None, "GET")
+
+
+def test_retry_after_seconds():
+    assert _parse_retry_after(response(429, "12")) == 12
+    assert _parse_retry_after(response(429, "-3")) == 0
+    assert _parse_retry_after(response(429)) is None
+    assert _parse_retry_after(response(429, "soon")) is None
+    assert _parse_retry_after(None) is None
+
+
+def test_retry_after_http_date():
+    at = datetime.now(timezone.utc) + timedelta(seconds=30)
+    assert _parse_retry_after(response(429, format_datetime(at, usegmt=True))) == pytest.approx(30, abs=2)
+
+    past = datetime.now(timezone.utc) - timedelta(minutes=5)
+    assert _parse_retry_after(response(429, format_datetime(past, usegmt=True))) == 0
+
+
+def test_delay_honors_retry_after_up_to_max_delay():
+    policy = RetryPolicy(base_delay=5, jitter=0, max_delay=60)
+    assert policy.delay_for(1, response(429, "7")) == 7
+    assert policy.delay_for(1, response(429, "600")) == 60
+    assert policy.delay_for(2, response(503)) == 10
+
+
+@pytest.fixture
+def evolution(monkeypatch, fake_time):
+    """evo_request replaced by a queue of outcomes (responses or exceptions); returns (calls, clock)."""
+    outcomes, calls = [], []
+
+    def fake_evo_request(path, **kwargs):
+        calls.append(path)
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    monkeypatch.setattr(evo_request, "evo_request", fake_evo_request)
+    return outcomes, calls, fake_time(evo_request)
+
+
+def test_retries_until_success(evolution):
+    outcomes, calls, clock = evolution
+    outcomes += [ConnectionDomainError(), response(429, "2"), response(200)]
+
+    with pytest.warns(UserWarning):
+        resp = evo_request_with_retries("message/sendText", policy=RetryPolicy(base_delay=1, jitter=0))
+
+    assert resp.status_code == 200
+    assert len(calls) == 3
+    assert clock.now == 1000 + 1 + 2
+
+
+def test_gives_up_after_max_attempts(evolution):
+    outcomes, calls, _ = evolution
+    outcomes += [response(429, "1")] * 3
+
+    with pytest.warns(UserWarning):
+        resp = evo_request_with_retries("message/sendText", policy=RetryPolicy(max_attempts=2))
+
+    assert resp.status_code == 429
+    assert len(calls) == 2
+
+
+def test_total_budget_stops_retrying(evolution):
+    outcomes, calls, clock = evolution
+    outcomes += [ConnectionDomainError(), ConnectionDomainError(), ConnectionDomainError()]
+    policy = RetryPolicy(max_attempts=5, base_delay=10, multiplier=1, jitter=0, total_budget=15)
+
+    # the second wait would end past the budget: the last error is raised instead
+    with pytest.warns(UserWarning), pytest.raises(ConnectionDomainError):
+        evo_request_with_retries("group/participants", method="GET", policy=policy)
+
+    assert len(calls) == 2
+    assert clock.now == 1000 + 10
+
+
+def test_non_idempotent_gateway_errors_are_not_retried(evolution):
+    outcomes, calls, _ = evolution
+    outcomes += [response(504)]
+
+    assert evo_request_with_retries("message/sendText", method="POST").status_code == 504
+    assert len(calls) == 1
+
+
+def test_continuation_policy_defers_instead_of_sleeping(evolution):
+    outcomes, calls, clock = evolution
+    outcomes += [response(429, "40")]
+    policy = RetryPolicy(sleep_in_thread=False)
+
+    with pytest.raises(EvolutionRetryLaterError) as e:
+        evo_request_with_retries("message/sendText", policy=policy, attempt=2)
+
+    assert e.value.retry_after == 40
+    assert "[Attempt 2]" in str(e.value)
+    assert clock.now == 1000
+
+
+def test_continuation_out_of_attempts_returns_the_response(evolution):
+    outcomes, _, _ = evolution
+    outcomes += [response(429)]
+
+    resp = evo_request_with_retries("message/sendText", policy=RetryPolicy(sleep_in_thread=False), attempt=3)
+    assert resp.status_code == 429
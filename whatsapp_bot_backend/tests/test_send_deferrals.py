@@ -0,0 +1,75 @@
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import pytest
+
+from shared.domain_errors import CircuitOpenError, EvolutionRetryLaterError, SendDeferredError
+from whatsapp.mass_messages import dispatcher, mass_messages
+from whatsapp.mass_messages.template import compile_template
+
+
+@contextmanager
+def no_cursor(*args):
+    yield None
+
+
+def raise_(error):
+    def fail(*args, **kwargs):
+        raise error
+    return fail
+
+
+# Nothing was sent for the first three; the last is a retryable Evolution failure
+DEFERRALS = [
+    (CircuitOpenError("breaker open", retry_after=30), False),
+    (SendDeferredError("lane exhausted", retry_after=30), False),
+    (SendDeferredError("no connected instance", retry_after=30), False),
+    (EvolutionRetryLaterError("[Attempt 2] message/sendText failed: HTTP 429", retry_after=30), True),
+]
+
+
+@pytest.mark.parametrize("error, counts", DEFERRALS)
+@pytest.mark.parametrize("raised_by", ["sender_pool", "evo_request"])
+def test_job_continuation_keeps_the_attempt_unless_evolution_failed(monkeypatch, error, counts, raised_by):
+    continuations = []
+    monkeypatch.setattr(mass_messages, "get_cursor", no_cursor)
+    monkeypatch.setattr(mass_messages, "get_running_scheduler", lambda: None)
+    monkeypatch.setattr(mass_messages, "_job_message_text", lambda cur, run_args: "hi")
+    monkeypatch.setattr(mass_messages, "set_mass_message_job_sql", lambda *args: None)
+    monkeypatch.setattr(
+        mass_messages, "schedule_continuation",
+        lambda cur, sched, job_name, func, run_args, **kwargs: continuations.append(run_args) or "continuation",
+    )
+    if raised_by == "sender_pool":
+        monkeypatch.setattr(mass_messages.sender_pool, "acquire", raise_(error))
+    else:
+        monkeypatch.setattr(mass_messages.sender_pool, "acquire", lambda: "instance")
+        monkeypatch.setattr(mass_messages, "evo_request_with_retries", raise_(error))
+
+    run_args = {"batch_id": "b", "recipient_id": "r1", "recipient_phone_number": "972500000001", "attempt": 2}
+    mass_messages.mass_messages_job("job", run_args, use_logging=False)
+
+    [continued] = continuations
+    assert continued["attempt"] == (3 if counts else 2)
+    assert continued["continuation"] == 1
+
+
+@pytest.mark.parametrize("error, counts", DEFERRALS)
+@pytest.mark.parametrize("raised_by", ["sender_pool", "evo_request"])
+def test_dispatcher_refunds_the_attempt_unless_evolution_failed(monkeypatch, error, counts, raised_by):
+    released = []
+    monkeypatch.setattr(dispatcher, "get_cursor", no_cursor)
+    monkeypatch.setattr(
+        dispatcher, "release_mass_message_sql",
+        lambda cur, batch_id, recipient_id, retry_at, refund_attempt: released.append(refund_attempt),
+    )
+    if raised_by == "sender_pool":
+        monkeypatch.setattr(dispatcher.sender_pool, "acquire", raise_(error))
+    else:
+        monkeypatch.setattr(dispatcher.sender_pool, "acquire", lambda: "instance")
+        monkeypatch.setattr(dispatcher, "evo_request_with_retries", raise_(error))
+
+    row = SimpleNamespace(recipient_id="r1", recipient_phone_number="972500000001", template_vars=None, attempts=2)
+    dispatcher._send_claimed(None, "b", compile_template("hi"), row, lambda message: None)
+
+    assert released == [not counts]
@@ -0,0 +1,124 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from shared.timezone import TIMEZONE
+from whatsapp.core.business_calendar import BusinessCalendar
+from whatsapp.core.core import BUSINESS_HOURS_DEFAULT
+from whatsapp.send_slots import planner
+from whatsapp.send_slots.planner import (
+    SLOT_POOL_BULK,
+    SLOT_POOL_INTERACTIVE,
+    _SlotAllocator,
+    min_slot_gap,
+    pool_slot_gap,
+)
+
+
+# Wednesday, inside business hours (08:00-20:00)
+T0 = datetime(2025, 10, 1, 10, 0, tzinfo=TIMEZONE)
+GAP = timedelta(seconds=45)
+
+
+class AlwaysOpen:
+    def next_open(self, dt):
+        return dt
+
+    def add_business_seconds(self, dt, seconds):
+        return dt + timedelta(seconds=seconds)
+
+
+def allocator(reserved=(), gap=GAP, calendar=None):
+    return _SlotAllocator(sorted(reserved), gap, calendar or AlwaysOpen())
+
+
+@pytest.mark.parametrize("per_minute, per_hour, seconds", [
+    (2, 80, 45),      # hourly budget is the stricter one
+    (1, 80, 60),      # per-minute budget is the stricter one
+    (60, 3600, 1),
+])
+def test_min_slot_gap(per_minute, per_hour, seconds):
+    assert min_slot_gap(per_minute, per_hour) == timedelta(seconds=seconds)
+
+
+def test_pool_slot_gap_uses_the_pool_budget():
+    assert pool_slot_gap(SLOT_POOL_BULK) == min_slot_gap(planner.MESSAGES_PER_MINUTE, planner.MESSAGES_PER_HOUR)
+    assert pool_slot_gap(SLOT_POOL_INTERACTIVE) == min_slot_gap(
+        planner.GROUP_MESSAGES_PER_MINUTE, planner.GROUP_MESSAGES_PER_HOUR
+    )
+
+
+def test_free_instant_is_taken_as_is():
+    assert allocator().first_free_at_or_after(T0) == T0
+
+
+def test_same_desired_time_gives_slots_a_gap_apart():
+    slots = allocator()
+    assert [slots.first_free_at_or_after(T0) for _ in range(3)] == [T0, T0 + GAP, T0 + 2 * GAP]
+
+
+def test_slot_too_close_to_a_reserved_one_is_pushed_past_it():
+    slots = allocator([T0])
+    assert slots.first_free_at_or_after(T0 + timedelta(seconds=10)) == T0 + GAP
+    # also when the reserved slot is on the right
+    assert slots.first_free_at_or_after(T0 - timedelta(seconds=10)) == T0 + 2 * GAP
+
+
+def test_gap_between_reserved_slots_is_used_when_wide_enough():
+    slots = allocator([T0, T0 + 3 * GAP])
+    assert slots.first_free_at_or_after(T0 + timedelta(seconds=1)) == T0 + GAP
+    # the next one no longer fits before T0 + 3 * GAP
+    assert slots.first_free_at_or_after(T0 + timedelta(seconds=1)) == T0 + 2 * GAP
+    assert slots.first_free_at_or_after(T0 + timedelta(seconds=1)) == T0 + 4 * GAP
+
+
+def test_slots_only_land_in_business_hours():
+    calendar = BusinessCalendar(BUSINESS_HOURS_DEFAULT, {}, date(2025, 10, 1), 30)
+    slots = allocator(calendar=calendar)
+
+    # Friday closes at 17:00, Saturday is closed: next opening is Sunday 08:00
+    friday_evening = datetime(2025, 10, 3, 18, 0, tzinfo=TIMEZONE)
+    assert slots.first_free_at_or_after(friday_evening) == datetime(2025, 10, 5, 8, 0, tzinfo=TIMEZONE)
+
+
+def test_release_and_reserve():
+    slots = allocator()
+    slot = slots.first_free_at_or_after(T0)
+    slots.release(slot)
+    assert slots.first_free_at_or_after(T0) == T0
+
+    slots.reserve(T0 + timedelta(seconds=1))  # closer than the gap, reserved anyway
+    assert slots.reserved == [T0.timestamp(), T0.timestamp() + 1]
+
+
+@pytest.fixture
+def no_db(monkeypatch):
+    """Planner with an empty, in-memory send_slots table; returns the inserted slots per pool."""
+    inserted = {}
+    monkeypatch.setattr(planner, "lock_send_slots", lambda cur, pool: None)
+    monkeypatch.setattr(planner, "delete_send_slots_before", lambda cur, pool, before: None)
+    monkeypatch.setattr(planner, "get_send_slots_since", lambda cur, pool, since: [])
+    monkeypatch.setattr(
+        planner, "insert_send_slots", lambda cur, pool, batch_id, slots: inserted.setdefault(pool, []).extend(slots)
+    )
+    return inserted
+
+
+def test_reserve_next_slots_spaces_by_min_diff_and_gap(no_db):
+    calendar = AlwaysOpen()
+    slots = planner.reserve_next_slots(None, "batch", 3, T0, timedelta(seconds=10), calendar=calendar, gap=GAP)
+    assert slots == [T0, T0 + GAP, T0 + 2 * GAP]
+    assert no_db == {SLOT_POOL_BULK: slots}
+
+    slots = planner.reserve_next_slots(None, "batch", 2, T0, timedelta(minutes=5), calendar=calendar, gap=GAP)
+    assert slots == [T0, T0 + timedelta(minutes=5)]
+
+
+def test_reserve_slots_at_goes_over_budget_rather_than_past_latest(no_db):
+    desired = [T0, T0 + timedelta(seconds=5)]
+    slots = planner.reserve_slots_at(
+        None, "group", desired, latest=T0 + timedelta(seconds=30), calendar=AlwaysOpen(), gap=GAP
+    )
+    # the second slot would be T0 + GAP, after `latest`: it's taken at the desired time
+    assert slots == desired
+    assert no_db == {SLOT_POOL_INTERACTIVE: desired}
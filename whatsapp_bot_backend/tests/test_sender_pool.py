@@ -0,0 +1,124 @@
+from collections import Counter
+from datetime import timedelta
+
+import pytest
+
+from shared.domain_errors import SendDeferredError
+from whatsapp.core import lane_rate_limit
+from whatsapp.core.instances import WhatsappInstance
+from whatsapp.core.whatsapp_connection import CONNECTION_POLL_INTERVAL_SECONDS
+from whatsapp.mass_messages import sender_pool as sender_pool_module
+from whatsapp.mass_messages.sender_pool import INSTANCE_BURST, SenderPool
+from whatsapp.send_slots.planner import min_slot_gap
+
+
+@pytest.fixture
+def clock(fake_time):
+    return fake_time(lane_rate_limit)
+
+
+class StubMonitor:
+    def __init__(self, connected: bool):
+        self.connected = connected
+
+    def is_connected(self) -> bool:
+        return self.connected
+
+    def cached(self):
+        return ("connected" if self.connected else "not_connected"), None
+
+
+@pytest.fixture
+def pool_of(monkeypatch, clock):
+    """Returns a function building a SenderPool over the given instances (all connected unless listed)."""
+    def build(*instances, disconnected=()):
+        monitors = {instance.name: StubMonitor(instance.name not in disconnected) for instance in instances}
+        monkeypatch.setattr(sender_pool_module, "get_sending_instances", lambda: list(instances))
+        monkeypatch.setattr(sender_pool_module, "instance_monitor", monitors.__getitem__)
+        return SenderPool()
+    return build
+
+
+def unlimited(name, weight=1):
+    return WhatsappInstance(name=name, weight=weight, messages_per_minute=6000, messages_per_hour=360000)
+
+
+def picks(pool, clock, n):
+    result = []
+    for _ in range(n):
+        result.append(pool.acquire())
+        clock.advance(1)  # buckets refill between sends
+    return result
+
+
+def test_smooth_weighted_round_robin(pool_of, clock):
+    pool = pool_of(unlimited("a", weight=2), unlimited("b", weight=1))
+    assert picks(pool, clock, 6) == ["a", "b", "a", "a", "b", "a"]
+
+
+def test_weights_set_the_split(pool_of, clock):
+    pool = pool_of(unlimited("a", weight=3), unlimited("b", weight=1), unlimited("c", weight=1))
+    assert Counter(picks(pool, clock, 50)) == {"a": 30, "b": 10, "c": 10}
+
+
+def test_disconnected_instance_is_skipped(pool_of, clock):
+    pool = pool_of(unlimited("a"), unlimited("b"), disconnected={"a"})
+    assert set(picks(pool, clock, 4)) == {"b"}
+
+
+def test_no_connected_instance_defers_until_the_next_poll(pool_of):
+    pool = pool_of(unlimited("a"), disconnected={"a"})
+    with pytest.raises(SendDeferredError) as raised:
+        pool.acquire()
+    assert raised.value.retry_after == CONNECTION_POLL_INTERVAL_SECONDS
+
+
+def test_instance_over_budget_gives_its_turn_away(pool_of, clock):
+    limited = WhatsappInstance(name="limited", weight=10, messages_per_minute=60, messages_per_hour=3600)
+    pool = pool_of(limited, unlimited("b"))
+
+    sent = []
+    for _ in range(20):
+        sent.append(pool.acquire())
+        clock.advance(0.1)
+    # its weight asks for ~18 of the 20, its budget allows the burst plus one a second
+    assert sent.count("limited") <= INSTANCE_BURST + 2
+    assert pool.snapshot()[0]["over_budget"] > 0
+
+
+def test_hourly_budget_is_enforced(pool_of, clock):
+    # 60/minute but only 60/hour: one message a minute, not one a second
+    hourly = WhatsappInstance(name="hourly", messages_per_minute=60, messages_per_hour=60)
+    pool = pool_of(hourly)
+
+    for _ in range(INSTANCE_BURST):
+        pool.acquire()
+    clock.advance(1)
+    with pytest.raises(SendDeferredError) as raised:
+        pool.acquire()
+    assert raised.value.retry_after == pytest.approx(59)
+
+
+def test_every_instance_over_budget_defers_to_the_soonest_token(pool_of, clock):
+    slow = WhatsappInstance(name="slow", messages_per_minute=1, messages_per_hour=60)
+    fast = WhatsappInstance(name="fast", messages_per_minute=6, messages_per_hour=360)
+    pool = pool_of(slow, fast)
+
+    for _ in range(2 * INSTANCE_BURST):
+        pool.acquire()
+    with pytest.raises(SendDeferredError) as raised:
+        pool.acquire()
+    assert raised.value.retry_after == pytest.approx(10)
+
+    # the failed round doesn't shift the rotation
+    clock.advance(60)
+    assert picks(pool, clock, 2) == ["slow", "fast"]
+
+
+def test_slot_gap_and_spacing_grow_with_the_instances(pool_of):
+    pool = pool_of(
+        WhatsappInstance(name="a", messages_per_minute=2, messages_per_hour=80),
+        WhatsappInstance(name="b", messages_per_minute=2, messages_per_hour=80),
+    )
+    assert pool.slot_gap() == min_slot_gap(4, 160)
+    assert pool.batch_spacing(timedelta(seconds=10)) == timedelta(seconds=5)
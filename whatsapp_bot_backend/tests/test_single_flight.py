@@ -0,0 +1,128 @@
+import asyncio
+
+import pytest
+
+from conftest import BlockingLoader, run_in_thread
+from whatsapp.core import single_flight
+from whatsapp.core.single_flight import (
+    AsyncSingleFlight,
+    SingleFlight,
+    SingleFlightStats,
+    forget_evo_flights,
+    new_evo_async_single_flight,
+    request_has_param,
+    request_key,
+)
+
+
+KEY = request_key("GET", "http://evo/group/participants/default", {"groupJid": "g1"})
+
+
+def test_concurrent_calls_share_one_request():
+    flights = SingleFlight(SingleFlightStats())
+    loader = BlockingLoader("response")
+
+    leader, leader_result = run_in_thread(lambda: flights.do("key", loader))
+    assert loader.started.wait(5)
+    follower, follower_result = run_in_thread(lambda: flights.do("key", lambda: "not called"))
+
+    loader.release.set()
+    leader.join(5)
+    follower.join(5)
+
+    assert leader_result["value"] == follower_result["value"] == "response"
+    assert loader.calls == 1
+    assert flights.stats.snapshot() == {"calls": 1, "coalesced": 1, "saved_ratio": 0.5}
+
+
+def test_error_is_shared_and_nothing_is_kept():
+    flights = SingleFlight(SingleFlightStats())
+
+    def fail():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        flights.do("key", fail)
+    assert flights.do("key", lambda: "retried") == "retried"
+
+
+def test_forgotten_flight_isnt_shared_with_later_callers():
+    flights = SingleFlight(SingleFlightStats())
+    loader = BlockingLoader("before write")
+
+    leader, leader_result = run_in_thread(lambda: flights.do(KEY, loader))
+    assert loader.started.wait(5)
+
+    flights.forget(lambda k: request_has_param(k, "groupJid", "g1"))
+    assert flights.do(KEY, lambda: "after write") == "after write"
+
+    loader.release.set()
+    leader.join(5)
+    assert leader_result["value"] == "before write"
+    assert flights.do(KEY, lambda: "next") == "next"
+
+
+def test_request_key_ignores_param_order():
+    assert request_key("get", "u", {"a": 1, "b": 2}) == request_key("GET", "u", {"b": 2, "a": 1})
+    assert request_key("GET", "u", None) != request_key("GET", "u", {"a": 1})
+    assert request_has_param(KEY, "groupJid", "g1") and not request_has_param(KEY, "groupJid", "g2")
+
+
+def test_async_concurrent_calls_share_one_request():
+    flights = AsyncSingleFlight(SingleFlightStats())
+    calls = []
+
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "response"
+
+    async def main():
+        return await asyncio.gather(*(flights.do(KEY, load) for _ in range(3)))
+
+    assert asyncio.run(main()) == ["response"] * 3
+    assert len(calls) == 1
+    assert flights.stats.snapshot()["coalesced"] == 2
+
+
+def test_async_cancelled_waiter_doesnt_cancel_the_request():
+    flights = AsyncSingleFlight(SingleFlightStats())
+
+    async def load():
+        await asyncio.sleep(0.01)
+        return "response"
+
+    async def main():
+        first = asyncio.ensure_future(flights.do(KEY, load))
+        second = asyncio.ensure_future(flights.do(KEY, load))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(main()) == "response"
+
+
+def test_forget_reaches_every_event_loop(monkeypatch):
+    monkeypatch.setattr(single_flight, "evo_single_flight", SingleFlight(SingleFlightStats()))
+    flights = new_evo_async_single_flight()
+
+    async def main():
+        release = asyncio.Event()
+
+        async def before_write():
+            await release.wait()
+            return "before write"
+
+        leader = asyncio.ensure_future(flights.do(KEY, before_write))
+        await asyncio.sleep(0)
+
+        forget_evo_flights(lambda k: request_has_param(k, "groupJid", "g1"))
+
+        async def after_write():
+            return "after write"
+
+        follower = await flights.do(KEY, after_write)
+        release.set()
+        return await leader, follower
+
+    assert asyncio.run(main()) == ("before write", "after write")
@@ -0,0 +1,109 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from api.base_models import ParticipantItem
+from shared.timezone import TIMEZONE
+from whatsapp.mass_messages import suppression
+from whatsapp.mass_messages.suppression import RECENT_SENDS_RETENTION, RecipientFilter, content_hash
+
+
+def participant(id, phone_number, **vars):
+    return ParticipantItem(id=id, phone_number=phone_number, vars=vars or None)
+
+
+def ids(participants):
+    return [p.id for p in participants]
+
+
+@pytest.fixture
+def recent_sends(monkeypatch):
+    """In-memory recent_sends: (phone number, content hash) -> sent_at; also records each query."""
+    sends, queries = {}, []
+
+    def find_recently_sent_sql(cur, phone_numbers, hashes, since):
+        queries.append((phone_numbers, hashes, since))
+        return {
+            i for i, pair in enumerate(zip(phone_numbers, hashes))
+            if pair in sends and sends[pair] >= since
+        }
+
+    monkeypatch.setattr(suppression, "find_recently_sent_sql", find_recently_sent_sql)
+    return sends, queries
+
+
+def test_duplicate_ids_and_phone_numbers_are_dropped(recent_sends):
+    _, queries = recent_sends
+    recipient_filter = RecipientFilter("Hello")
+
+    kept = recipient_filter.filter(None, [
+        participant("a1", "972500000001"),
+        participant("a1", "972500000002"),      # same id
+        participant("a2", "+972-50-000-0001"),  # same phone number, differently written
+        participant("a3", "972500000003"),
+    ])
+
+    assert ids(kept) == ["a1", "a3"]
+    assert recipient_filter.report() == {"skipped_duplicate": 2, "skipped_recent": 0}
+    # no window: no query
+    assert queries == []
+
+
+def test_duplicates_are_found_across_chunks(recent_sends):
+    recipient_filter = RecipientFilter("Hello")
+
+    assert ids(recipient_filter.filter(None, [participant("a1", "972500000001")])) == ["a1"]
+    assert ids(recipient_filter.filter(None, [
+        participant("a1", "972500000009"), participant("a2", "972500000001"), participant("a3", "972500000003"),
+    ])) == ["a3"]
+    assert recipient_filter.skipped_duplicate == 2
+
+
+def test_only_hashes_of_seen_recipients_are_kept(recent_sends):
+    recipient_filter = RecipientFilter("Hello")
+    recipient_filter.filter(None, [participant(f"a{i}", f"9725000000{i:02}") for i in range(10)])
+
+    assert len(recipient_filter._seen_ids) == len(recipient_filter._seen_phones) == 10
+    assert all(isinstance(key, int) and key < 2 ** 64 for key in recipient_filter._seen_ids)
+
+
+def test_recently_sent_identical_text_is_dropped(recent_sends):
+    sends, _ = recent_sends
+    now = datetime.now(TIMEZONE)
+    sends[("972500000001", content_hash("Hi Dana"))] = now - timedelta(hours=1)
+    sends[("972500000002", content_hash("Hi Avi"))] = now - timedelta(hours=5)    # outside the window
+    sends[("972500000003", content_hash("Hi someone else"))] = now                # another text
+
+    recipient_filter = RecipientFilter("Hi {name}", suppress_within=timedelta(hours=2))
+    kept = recipient_filter.filter(None, [
+        participant("a1", "972500000001", name="Dana"),
+        participant("a2", "972500000002", name="Avi"),
+        participant("a3", "972500000003", name="Noa"),
+    ])
+
+    assert ids(kept) == ["a2", "a3"]
+    assert recipient_filter.report() == {"skipped_duplicate": 0, "skipped_recent": 1}
+
+
+def test_one_query_per_chunk_of_unique_recipients(recent_sends):
+    _, queries = recent_sends
+    recipient_filter = RecipientFilter("Hello", suppress_within=timedelta(hours=1))
+
+    recipient_filter.filter(None, [participant("a1", "972500000001"), participant("a1", "972500000001")])
+    recipient_filter.filter(None, [participant("a1", "972500000001")])  # nothing left: no query
+
+    assert len(queries) == 1
+    phone_numbers, hashes, _ = queries[0]
+    assert phone_numbers == ["972500000001"] and hashes == [content_hash("Hello")]
+
+
+def test_window_is_capped_at_the_retention(recent_sends):
+    _, queries = recent_sends
+    recipient_filter = RecipientFilter("Hello", suppress_within=timedelta(days=30))
+    assert recipient_filter.suppress_within == RECENT_SENDS_RETENTION
+
+    before = datetime.now(TIMEZONE)
+    recipient_filter.filter(None, [participant("a1", "972500000001")])
+    since = queries[0][2]
+    assert before - RECENT_SENDS_RETENTION <= since <= datetime.now(TIMEZONE) - RECENT_SENDS_RETENTION
+
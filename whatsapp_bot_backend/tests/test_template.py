@@ -0,0 +1,85 @@
+import pytest
+
+from api.base_models import ParticipantItem
+from shared.domain_errors import MessageTemplateError
+from whatsapp.mass_messages.template import compile_template
+
+
+def test_plain_text():
+    template = compile_template("Hello everyone")
+    assert template.fields == frozenset()
+    assert not template.needs_vars
+    assert template.render("r1", "972500000000") == "Hello everyone"
+
+
+def test_escaped_braces_are_literal():
+    template = compile_template("Use {{braces}} like {{this}}")
+    assert template.fields == frozenset()
+    assert template.render("r1", "972500000000") == "Use {braces} like {this}"
+
+
+def test_builtin_fields_dont_need_vars():
+    template = compile_template("Hi {id}, we'll call {phone_number}")
+    assert not template.needs_vars
+    assert template.render("dana", "972500000000") == "Hi dana, we'll call 972500000000"
+
+
+def test_recipient_vars():
+    template = compile_template("Hi {first_name}, your code is {code}. {{not a field}}")
+    assert template.needs_vars
+    assert template.fields == {"first_name", "code"}
+    assert template.render("r1", "972500000000", {"first_name": "Dana", "code": 42}) == (
+        "Hi Dana, your code is 42. {not a field}"
+    )
+
+
+def test_recipient_vars_dont_override_builtins():
+    template = compile_template("{id}")
+    assert template.render("r1", "972500000000", {"id": "spoofed"}) == "r1"
+
+
+def test_missing_fields():
+    template = compile_template("Hi {first_name} {last_name}")
+    assert template.missing_fields({"first_name": "Dana"}) == {"last_name"}
+    assert template.missing_fields(None) == {"first_name", "last_name"}
+
+    with pytest.raises(MessageTemplateError, match="last_name"):
+        template.render("r1", "972500000000", {"first_name": "Dana"})
+
+
+@pytest.mark.parametrize("message", [
+    "Hi {0}",            # positional
+    "Hi {}",
+    "Hi { name }",
+    "Hi {user.name}",    # attribute access
+    "Hi {names[0]}",     # index access
+    "Hi {name!r}",       # conversion
+    "Hi {name:>10}",     # format spec
+    "Hi {name",          # unbalanced
+    "Hi name}",
+    'payload: {"a": {"b": 1}}',
+])
+def test_other_braces_are_literal_text(message):
+    template = compile_template(message)
+    assert template.fields == frozenset()
+    assert template.render("r1", "972500000000") == message
+
+
+def test_literal_braces_around_a_placeholder():
+    template = compile_template("{ {name} } {{name}} {name}}")
+    assert template.fields == {"name"}
+    assert template.render("r1", "972500000000", {"name": "Dana"}) == "{ Dana } {name} Dana}"
+
+
+def test_participant_vars_are_read_only_and_hashable():
+    participant = ParticipantItem(id="r1", phone_number="972500000000", vars={"name": "Dana"})
+
+    assert hash(participant) == hash(ParticipantItem(id="r1", phone_number="972500000000", vars={"name": "Dana"}))
+    assert participant.model_dump() == {"id": "r1", "phone_number": "972500000000", "vars": {"name": "Dana"}}
+    with pytest.raises(TypeError):
+        participant.vars["name"] = "Avi"
+    assert compile_template("Hi {name}").render(participant.id, participant.phone_number, participant.vars) == "Hi Dana"
+
+
+def test_compiled_once_per_message():
+    assert compile_template("Hi {first_name}") is compile_template("Hi {first_name}")
@@ -0,0 +1,131 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from shared.domain_errors import RecipientUploadError
+from shared.timezone import TIMEZONE
+from whatsapp.core.instances import WhatsappInstance
+from whatsapp.mass_messages import mass_messages, sender_pool, upload
+from whatsapp.mass_messages.mass_messages import next_mass_message_start, reserve_mass_message_times
+from whatsapp.mass_messages.upload import (
+    UPLOAD_FORMAT_CSV,
+    UPLOAD_FORMAT_NDJSON,
+    aiter_recipient_chunks,
+    upload_format,
+)
+from whatsapp.send_slots import planner
+
+
+async def _body(parts):
+    for part in parts:
+        yield part
+
+
+def parse(data, fmt, chunk_rows=1000, split_every=None):
+    """Chunks of (id, phone_number, vars) parsed from `data`, fed `split_every` bytes at a time."""
+    data = data.encode() if isinstance(data, str) else data
+    step = split_every or max(1, len(data))
+    parts = [data[i:i + step] for i in range(0, len(data), step)]
+
+    async def collect():
+        return [
+            [(item.id, item.phone_number, item.vars and dict(item.vars)) for item in chunk]
+            async for chunk in aiter_recipient_chunks(_body(parts), fmt, chunk_rows)
+        ]
+
+    return asyncio.run(collect())
+
+
+@pytest.mark.parametrize("content_type, fmt", [
+    ("text/csv", UPLOAD_FORMAT_CSV),
+    ("text/csv; charset=utf-8", UPLOAD_FORMAT_CSV),
+    ("Application/X-NDJSON", UPLOAD_FORMAT_NDJSON),
+    ("application/jsonl", UPLOAD_FORMAT_NDJSON),
+])
+def test_upload_format(content_type, fmt):
+    assert upload_format(content_type) == fmt
+
+
+@pytest.mark.parametrize("content_type", [None, "", "application/json", "text/plain"])
+def test_unsupported_content_type(content_type):
+    with pytest.raises(RecipientUploadError, match="Unsupported Content-Type"):
+        upload_format(content_type)
+
+
+def test_csv_columns_other_than_id_and_phone_are_vars():
+    data = "phone_number,id,first_name\n+972-50-000-0001, a1 ,Dana\n972500000002,a2,\"Cohen, Avi\"\n"
+    assert parse(data, UPLOAD_FORMAT_CSV) == [[
+        ("a1", "972500000001", {"first_name": "Dana"}),
+        ("a2", "972500000002", {"first_name": "Cohen, Avi"}),
+    ]]
+
+
+def test_csv_without_extra_columns_has_no_vars():
+    assert parse("id,phone_number\na1,972500000001\n", UPLOAD_FORMAT_CSV) == [[("a1", "972500000001", None)]]
+
+
+def test_bom_crlf_blank_lines_and_missing_final_newline():
+    data = "\ufeffid,phone_number\r\n\r\na1,972500000001\r\n   \r\na2,972500000002"
+    assert parse(data, UPLOAD_FORMAT_CSV) == [[("a1", "972500000001", None), ("a2", "972500000002", None)]]
+
+
+def test_lines_and_characters_split_across_body_chunks():
+    data = '{"id": "a1", "phone_number": "972500000001", "vars": {"name": "שלום"}}\n' * 3
+    assert parse(data, UPLOAD_FORMAT_NDJSON, split_every=7) == [[("a1", "972500000001", {"name": "שלום"})] * 3]
+
+
+def test_recipients_come_in_chunks():
+    data = "".join(f'{{"id": "a{i}", "phone_number": "97250000000{i}"}}\n' for i in range(5))
+    assert [len(chunk) for chunk in parse(data, UPLOAD_FORMAT_NDJSON, chunk_rows=2)] == [2, 2, 1]
+
+
+@pytest.mark.parametrize("data, fmt, message", [
+    ("name,phone_number\nDana,972500000001\n", UPLOAD_FORMAT_CSV, "Line 1: CSV header must contain id and phone_number"),
+    ("id,phone_number\na1,972500000001\na2,\n", UPLOAD_FORMAT_CSV, "Line 3: Both id and phone_number are required"),
+    ("id,phone_number\n,972500000001\n", UPLOAD_FORMAT_CSV, "Line 2: Both id and phone_number are required"),
+    ('{"id": "a1", "phone_number": "972500000001"}\n{"id": \n', UPLOAD_FORMAT_NDJSON, "Line 2: Invalid JSON"),
+    ('\n["a1", "972500000001"]\n', UPLOAD_FORMAT_NDJSON, "Line 2: Expected a JSON object"),
+    ('{"id": "a1", "phone_number": "972500000001", "vars": "x"}\n', UPLOAD_FORMAT_NDJSON, "Line 1: "),
+])
+def test_malformed_lines_name_their_line(data, fmt, message):
+    with pytest.raises(RecipientUploadError) as e:
+        parse(data, fmt)
+    assert str(e.value).startswith(message)
+
+
+def test_overlong_line_is_rejected_without_buffering(monkeypatch):
+    monkeypatch.setattr(upload, "MAX_LINE_CHARS", 20)
+    with pytest.raises(RecipientUploadError, match="Line 2: Line longer than 20 characters"):
+        parse("id,phone_number\n" + "x" * 50, UPLOAD_FORMAT_CSV, split_every=4)
+
+
+class AlwaysOpen:
+    def next_open(self, dt):
+        return dt
+
+    def add_business_seconds(self, dt, seconds):
+        return dt + timedelta(seconds=seconds)
+
+
+def test_next_chunk_keeps_the_spacing_within_a_chunk(monkeypatch):
+    """Reserving a batch in chunks gives the same send times as reserving it at once."""
+    monkeypatch.setattr(planner, "lock_send_slots", lambda cur, pool: None)
+    monkeypatch.setattr(planner, "delete_send_slots_before", lambda cur, pool, before: None)
+    monkeypatch.setattr(planner, "get_send_slots_since", lambda cur, pool, since: [])
+    monkeypatch.setattr(planner, "insert_send_slots", lambda cur, pool, batch_id, slots: None)
+    monkeypatch.setattr(planner, "get_business_calendar", AlwaysOpen)
+    monkeypatch.setattr(mass_messages, "get_business_calendar", AlwaysOpen)
+    monkeypatch.setattr(sender_pool, "get_sending_instances", lambda: [
+        WhatsappInstance(name=f"instance_{i}", number=None, messages_per_minute=10, messages_per_hour=600)
+        for i in range(3)
+    ])
+    start = datetime(2025, 10, 1, 10, 0, tzinfo=TIMEZONE)
+
+    at_once = reserve_mass_message_times(None, "batch", 6, start=start)
+
+    chunked = reserve_mass_message_times(None, "batch", 3, start=start)
+    chunked += reserve_mass_message_times(None, "batch", 3, start=next_mass_message_start(chunked[-1]))
+
+    assert chunked == at_once
+    assert at_once[1] - at_once[0] == mass_messages.MASS_MESSAGES_MIN_DIFF / 3
@@ -0,0 +1,18 @@
+import pytest
+
+from shared.domain_errors import WhatsappNotConnectedError
+from whatsapp.core import whatsapp_connection
+from whatsapp.core.whatsapp_connection import validate_whatsapp_connection
+
+
+@pytest.mark.parametrize("state", ["disconnected", "connecting", "unknown"])
+def test_validate_raises_when_not_connected(monkeypatch, state):
+    monkeypatch.setattr(whatsapp_connection.connection_monitor, "state", lambda: (state, None))
+
+    with pytest.raises(WhatsappNotConnectedError, match=f"Current status: {state}"):
+        validate_whatsapp_connection()
+
+
+def test_validate_passes_when_connected(monkeypatch):
+    monkeypatch.setattr(whatsapp_connection.connection_monitor, "state", lambda: ("connected", None))
+    assert validate_whatsapp_connection() is None
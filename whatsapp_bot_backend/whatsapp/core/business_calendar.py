@@ -0,0 +1,183 @@
+"""
+Business calendar: weekly business hours plus per-date overrides (holidays, special closures).
+
+The open windows of a rolling horizon are compiled once into sorted arrays of
+(start_epoch, end_epoch, cumulative_business_seconds), so every query is a binary search.
+Compiled calendars are immutable and memoized per configuration - use `get_business_calendar()`
+instead of constructing one per request/job.
+"""
+
+from array import array
+from bisect import bisect_right
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+from shared.timezone import TIMEZONE
+from whatsapp.core.core import BUSINESS_DAY_OVERRIDES_DEFAULT, BUSINESS_HOURS_DEFAULT
+
+
+# How many days ahead of today a calendar is compiled for
+HORIZON_DAYS_DEFAULT = 400
+
+
+def _epoch(dt: datetime) -> int:
+    """Whole epoch seconds (sub-second precision is dropped, like the weekly business-seconds functions)."""
+    return int(dt.timestamp())
+
+
+class BusinessCalendar:
+    """
+    Immutable business calendar compiled for days [horizon_start, horizon_start + horizon_days).
+
+    Business seconds are counted from the beginning of the horizon (instants before it count as 0).
+    Queries past the end of the horizon raise ValueError.
+    """
+
+    __slots__ = ("_business_hours", "_overrides", "horizon_start", "horizon_days",
+                 "_starts", "_ends", "_cumulative")
+
+    def __init__(
+        self,
+        business_hours: Tuple[Tuple[time, time], ...],
+        overrides: Dict[date, Optional[Tuple[time, time]]],
+        horizon_start: date,
+        horizon_days: int = HORIZON_DAYS_DEFAULT,
+    ):
+        """
+        Args:
+            business_hours: 7 (start, end) pairs, business_hours[0] = Monday, ..., [6] = Sunday
+            overrides: date -> (start, end) for that date only, or None when closed all day
+            horizon_start: first compiled day
+            horizon_days: number of compiled days
+        """
+        self._business_hours = tuple(tuple(day) for day in business_hours)
+        self._overrides = dict(overrides)
+        self.horizon_start = horizon_start
+        self.horizon_days = horizon_days
+
+        starts, ends, cumulative = array("q"), array("q"), array("q")
+        total = 0
+        for offset in range(horizon_days):
+            day = horizon_start + timedelta(days=offset)
+            hours = self.hours_on(day)
+            if hours is None:
+                continue
+
+            start_epoch = _epoch(datetime.combine(day, hours[0], tzinfo=TIMEZONE))
+            end_epoch = _epoch(datetime.combine(day, hours[1], tzinfo=TIMEZONE))
+
+            starts.append(start_epoch)
+            ends.append(end_epoch)
+            cumulative.append(total)  # business seconds before this window
+            total += end_epoch - start_epoch
+
+        if not starts:
+            raise ValueError("Business calendar has no open windows in its horizon")
+
+        self._starts, self._ends, self._cumulative = starts, ends, cumulative
+
+    def __repr__(self) -> str:
+        return f"BusinessCalendar(horizon_start={self.horizon_start}, horizon_days={self.horizon_days}, windows={len(self._starts)})"
+
+    # --- Per-day ---
+
+    def hours_on(self, day: date) -> Optional[Tuple[time, time]]:
+        """
+        Business hours on `day` after applying overrides, or None if closed all day.
+        """
+        hours = self._overrides[day] if day in self._overrides else self._business_hours[day.weekday()]
+        if hours is None or hours[0] >= hours[1]:
+            return None
+        return hours
+
+    # --- Point queries (binary search) ---
+
+    def _check_in_horizon(self, ts: int) -> None:
+        if ts >= self._ends[-1]:
+            raise ValueError(
+                f"{datetime.fromtimestamp(ts, TIMEZONE)} is past the business calendar horizon "
+                f"({self.horizon_start} + {self.horizon_days} days)"
+            )
+
+    def is_open(self, dt: datetime) -> bool:
+        """True if `dt` is inside an open window (start inclusive, end exclusive)."""
+        ts = _epoch(dt)
+        i = bisect_right(self._starts, ts) - 1
+        return i >= 0 and ts < self._ends[i]
+
+    def next_open(self, dt: datetime) -> datetime:
+        """`dt` itself if open, otherwise the opening instant of the next window."""
+        if self.is_open(dt):
+            return dt
+
+        ts = _epoch(dt)
+        self._check_in_horizon(ts)
+        i = bisect_right(self._starts, ts)
+        return datetime.fromtimestamp(self._starts[i], TIMEZONE)
+
+    def business_seconds_at(self, dt: datetime) -> int:
+        """Business seconds from the beginning of the horizon until `dt`."""
+        ts = _epoch(dt)
+        self._check_in_horizon(ts)
+        i = bisect_right(self._starts, ts) - 1
+        if i < 0:
+            return 0
+        return self._cumulative[i] + min(ts, self._ends[i]) - self._starts[i]
+
+    def business_seconds_between(self, start: datetime, end: datetime) -> int:
+        """Business seconds between `start` and `end` (negative if end < start)."""
+        return self.business_seconds_at(end) - self.business_seconds_at(start)
+
+    def date_at_business_seconds(self, business_seconds: int) -> datetime:
+        """
+        Inverse of `business_seconds_at`: the instant at which `business_seconds` business
+        seconds have elapsed since the beginning of the horizon. An instant that falls exactly
+        on a window end is moved to the opening of the next window.
+        """
+        if business_seconds < 0:
+            raise ValueError("business_seconds must be non-negative")
+
+        i = bisect_right(self._cumulative, business_seconds) - 1
+        ts = self._starts[i] + business_seconds - self._cumulative[i]
+        if ts >= self._ends[i]:
+            self._check_in_horizon(ts)
+        return datetime.fromtimestamp(ts, TIMEZONE)
+
+    def iter_dates_at_business_seconds(self, business_seconds_list: Iterable[int]) -> Iterator[datetime]:
+        """Lazily convert many business-second offsets to datetimes."""
+        for business_seconds in business_seconds_list:
+            yield self.date_at_business_seconds(business_seconds)
+
+    def add_business_seconds(self, dt: datetime, seconds: float) -> datetime:
+        """The instant `seconds` business seconds after `dt`."""
+        return self.date_at_business_seconds(int(self.business_seconds_at(dt) + seconds))
+
+
+@lru_cache(maxsize=8)
+def _compile_business_calendar(
+    business_hours: Tuple[Tuple[time, time], ...],
+    overrides: Tuple[Tuple[date, Optional[Tuple[time, time]]], ...],
+    horizon_start: date,
+    horizon_days: int,
+) -> BusinessCalendar:
+    return BusinessCalendar(business_hours, dict(overrides), horizon_start, horizon_days)
+
+
+def get_business_calendar(
+    business_hours: list = BUSINESS_HOURS_DEFAULT,
+    overrides: Dict[date, Optional[Tuple[time, time]]] = BUSINESS_DAY_OVERRIDES_DEFAULT,
+    horizon_days: int = HORIZON_DAYS_DEFAULT,
+) -> BusinessCalendar:
+    """
+    Shared, memoized calendar for the given configuration. The horizon rolls daily:
+    it starts yesterday (so "now" is always covered regardless of timezone) and a new
+    instance is compiled once per day.
+    """
+    horizon_start = datetime.now(TIMEZONE).date() - timedelta(days=1)
+    return _compile_business_calendar(
+        tuple(tuple(day) for day in business_hours),
+        tuple(sorted(overrides.items())),
+        horizon_start,
+        horizon_days,
+    )
@@ -0,0 +1,189 @@
+"""
+Process-wide circuit breaker for the Evolution API.
+
+Every Evolution call (sync and async clients, jobs and routes) goes through `evolution_breaker`:
+
+  closed     calls go through; outcomes are recorded in a rolling window. When the window has at
+             least MIN_CALLS outcomes and the failure rate reaches FAILURE_RATE_THRESHOLD, it opens.
+  open       calls fail fast with CircuitOpenError (no request is sent) for OPEN_SECONDS.
+  half_open  after OPEN_SECONDS a single caller is let through as a probe; every other caller
+             still fails fast. Probe success closes the breaker, probe failure re-opens it.
+
+Failures are connection errors, timeouts and 5xx responses. 4xx (including 429) means Evolution
+is up and answering, so it counts as a success.
+"""
+
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Dict
+
+from shared.domain_errors import CircuitOpenError
+
+
+# --- Config ---
+WINDOW_SECONDS = 60             # rolling window of recorded outcomes
+MIN_CALLS = 5                   # don't open on fewer outcomes than this
+FAILURE_RATE_THRESHOLD = 0.5    # failure rate that opens the breaker
+OPEN_SECONDS = 30               # how long to fail fast before probing
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Thread-safe closed / open / half-open circuit breaker driven by the recent failure rate.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        window_seconds: float = WINDOW_SECONDS,
+        min_calls: int = MIN_CALLS,
+        failure_rate_threshold: float = FAILURE_RATE_THRESHOLD,
+        open_seconds: float = OPEN_SECONDS,
+    ):
+        self.name = name
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.failure_rate_threshold = failure_rate_threshold
+        self.open_seconds = open_seconds
+
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._outcomes = deque()        # (monotonic time, ok)
+        self._failures = 0              # failures currently in _outcomes
+        self._opened_at = None          # monotonic
+        self._probe_in_flight = False
+        self._rejected = 0              # calls failed fast since the process started
+        self._times_opened = 0
+
+    # --- Call protocol ---
+
+    def before_call(self) -> None:
+        """
+        Call before sending a request.
+
+        Raises:
+            CircuitOpenError: if the breaker is open, or half-open with the probe already taken.
+        """
+        with self._lock:
+            if self._state == CLOSED:
+                return
+
+            now = time.monotonic()
+            if self._state == OPEN and now - self._opened_at >= self.open_seconds:
+                self._state = HALF_OPEN
+
+            if self._state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return
+
+            self._rejected += 1
+            remaining = max(0.0, self.open_seconds - (now - self._opened_at))
+
+        # Spread the deferred callers so they don't all come back on the same second
+        raise CircuitOpenError(
+            f"Circuit breaker '{self.name}' is {self._state}",
+            retry_after=remaining + random.uniform(0, self.open_seconds),
+        )
+
+    def record(self, ok: bool) -> None:
+        if ok:
+            self.record_success()
+        else:
+            self.record_failure()
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._close()
+                return
+            self._record(True)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._open()
+                return
+            self._record(False)
+            if self._state == CLOSED and self._should_open():
+                self._open()
+
+    # --- State ---
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current state and counters, for the /evolution/circuit_breaker endpoint."""
+        with self._lock:
+            self._evict(time.monotonic())
+            calls = len(self._outcomes)
+            open_for = None
+            if self._state != CLOSED:
+                open_for = round(time.monotonic() - self._opened_at, 1)
+
+            return {
+                "name": self.name,
+                "state": self._state,
+                "window_seconds": self.window_seconds,
+                "calls_in_window": calls,
+                "failures_in_window": self._failures,
+                "failure_rate": round(self._failures / calls, 3) if calls else 0.0,
+                "open_for_seconds": open_for,
+                "probe_in_flight": self._probe_in_flight,
+                "rejected_calls": self._rejected,
+                "times_opened": self._times_opened,
+            }
+
+    def reset(self) -> None:
+        """Force the breaker closed and forget recorded outcomes."""
+        with self._lock:
+            self._close()
+
+    # --- Internals (lock held) ---
+
+    def _record(self, ok: bool) -> None:
+        now = time.monotonic()
+        self._outcomes.append((now, ok))
+        if not ok:
+            self._failures += 1
+        self._evict(now)
+
+    def _evict(self, now: float) -> None:
+        while self._outcomes and now - self._outcomes[0][0] > self.window_seconds:
+            _, ok = self._outcomes.popleft()
+            if not ok:
+                self._failures -= 1
+
+    def _should_open(self) -> bool:
+        calls = len(self._outcomes)
+        return calls >= self.min_calls and self._failures / calls >= self.failure_rate_threshold
+
+    def _open(self) -> None:
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._probe_in_flight = False
+        self._times_opened += 1
+
+    def _close(self) -> None:
+        self._state = CLOSED
+        self._opened_at = None
+        self._probe_in_flight = False
+        self._outcomes.clear()
+        self._failures = 0
+
+
+def is_breaker_failure_status(status_code: int) -> bool:
+    """Responses that count as an Evolution failure for the breaker."""
+    return status_code >= 500
+
+
+# Shared by every Evolution call in the process
+evolution_breaker = CircuitBreaker("evolution")
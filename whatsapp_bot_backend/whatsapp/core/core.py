@@ -1,4 +1,4 @@
-from datetime import time
+from datetime import date, time
 
 
 def _phone_number(phone: str) -> str:
@@ -19,3 +19,32 @@ BUSINESS_HOURS_DEFAULT = [
     (time(8, 0), time(20, 0)), #  Sunday
 ]
 
+
+# Per-date overrides of BUSINESS_HOURS_DEFAULT (holidays, special closures, short days).
+# None = closed all day, (start, end) = business hours for that date only.
+BUSINESS_DAY_OVERRIDES_DEFAULT = {
+    # 5786
+    date(2025, 10, 2): None,   # Yom Kippur
+    date(2025, 10, 7): None,   # Sukkot
+    date(2025, 10, 14): None,  # Simchat Torah
+    date(2026, 4, 2): None,    # Pesach
+    date(2026, 4, 8): None,    # Pesach (seventh day)
+    date(2026, 4, 22): None,   # Yom Ha'atzmaut
+    date(2026, 5, 22): None,   # Shavuot
+    # 5787
+    date(2026, 9, 12): None,   # Rosh Hashana
+    date(2026, 9, 13): None,   # Rosh Hashana
+    date(2026, 9, 21): None,   # Yom Kippur
+    date(2026, 9, 26): None,   # Sukkot
+    date(2026, 10, 3): None,   # Simchat Torah
+    date(2027, 4, 22): None,   # Pesach
+    date(2027, 4, 28): None,   # Pesach (seventh day)
+    date(2027, 5, 12): None,   # Yom Ha'atzmaut
+    date(2027, 6, 11): None,   # Shavuot
+    # 5788
+    date(2027, 10, 2): None,   # Rosh Hashana
+    date(2027, 10, 3): None,   # Rosh Hashana
+    date(2027, 10, 11): None,  # Yom Kippur
+    date(2027, 10, 16): None,  # Sukkot
+    date(2027, 10, 23): None,  # Simchat Torah
+}
@@ -1,19 +1,137 @@
 import logging
-from typing import Any
+import os
+import threading
+import time
+import warnings
+from typing import Any, Optional
 import requests
+from requests.adapters import HTTPAdapter
 from pprint import pformat
-from shared.domain_errors import ConnectionDomainError, EvolutionServerError, JSONParseError
+from shared.domain_errors import ConnectionDomainError, DomainError, EvolutionRetryLaterError, EvolutionServerError, JSONParseError
+from whatsapp.core.circuit_breaker import evolution_breaker, is_breaker_failure_status
+from whatsapp.core.group_cache import invalidate_on_group_write
+from whatsapp.core.lane_rate_limit import acquire_send_token
+from whatsapp.core.retry_policy import DEFAULT_RETRY_POLICY, RetryPolicy
+from whatsapp.core.single_flight import COALESCED_METHODS, evo_single_flight, request_key
 
 # --- Config ---
-BASE_URL = "http://localhost:8080"      # Evolution API URL
+BASE_URL = os.environ.get("EVOLUTION_BASE_URL", "http://localhost:8080")   # Evolution API URL
 API_KEY = "ruz123"                      # Your API key
-INSTANCE = "my_instance"                # WhatsApp instance ID
+INSTANCE = "my_instance"                # Default WhatsApp instance ID (groups; mass sends when no other is registered)
+
+# --- HTTP client config ---
+POOL_CONNECTIONS = 4                    # number of hosts to keep a connection pool for
+POOL_MAXSIZE = 20                       # keep-alive connections per host (>= scheduler threads + API threads)
+CONNECT_TIMEOUT = 5                     # seconds
+READ_TIMEOUT = 120                      # seconds - sendText with "delay" only answers after the delay
+
+
+# --- Logging config ---
+# Level of the "evolution" logger, independent of the root level (which is DEBUG for apscheduler).
+# INFO = one summary line per request; DEBUG = full (redacted, truncated) request/response dumps.
+EVO_LOG_LEVEL = logging.INFO
+EVO_LOG_BODY_MAX_BYTES = 2048                 # bodies are truncated to this many bytes in logs
+EVO_LOG_SAMPLE_EVERY = {                      # high-volume endpoints: log 1 in N successful requests
+    "message/sendText": 20,
+    "message/sendMedia": 20,
+}
+EVO_LOG_REDACTED_KEYS = {"apikey", "token"}   # header / body keys never logged in clear
+
+evo_logger = logging.getLogger("evolution")
+evo_logger.setLevel(EVO_LOG_LEVEL)
+
+_sample_counts = {}
+_sample_lock = threading.Lock()
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_evo_session() -> requests.Session:
+    """
+    Process-wide Session used for every Evolution call, so TCP connections are kept alive and reused.
+
+    The underlying urllib3 pool is thread-safe, so one session is shared by the scheduler's
+    thread pool and the API threads. Retries are done by evo_request_with_retries, not by the adapter.
+    """
+    global _session
+
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=POOL_CONNECTIONS,
+                    pool_maxsize=POOL_MAXSIZE,
+                    max_retries=0,
+                )
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _session = session
+
+    return _session
+
+
 
+def _redact(obj):
+    """Copy of a headers/body dict with secrets replaced."""
+    if isinstance(obj, dict):
+        return {k: ("***" if str(k).lower() in EVO_LOG_REDACTED_KEYS else _redact(v)) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_redact(v) for v in obj]
+    return obj
 
 
-def request_and_print(method, url, headers=None, params=None, data=None, json=None, use_logging=False):
+def _truncate(raw) -> str:
+    """Body as text, capped at EVO_LOG_BODY_MAX_BYTES."""
+    if raw is None:
+        return ""
+    if isinstance(raw, str):
+        raw = raw.encode("utf-8", errors="replace")
+    if len(raw) <= EVO_LOG_BODY_MAX_BYTES:
+        return raw.decode("utf-8", errors="replace")
+    return raw[:EVO_LOG_BODY_MAX_BYTES].decode("utf-8", errors="replace") + f"... [{len(raw)} bytes, truncated]"
+
+
+def _should_sample(endpoint: str) -> bool:
+    """True for the 1-in-N requests of a high-volume endpoint that get a summary line."""
+    every = EVO_LOG_SAMPLE_EVERY.get(endpoint)
+    if not every:
+        return True
+    with _sample_lock:
+        _sample_counts[endpoint] = count = _sample_counts.get(endpoint, 0) + 1
+    return (count - 1) % every == 0
+
+
+def _log_exchange(endpoint: str, prepped, resp, elapsed: float, json_payload=None) -> None:
+    """
+    Structured logging of one request/response (`prepped` is a requests.PreparedRequest, or the
+    httpx.Request of the async client). Nothing is formatted unless the level is enabled:
+    - WARNING: every error response
+    - INFO: one summary line per request (1 in N for EVO_LOG_SAMPLE_EVERY endpoints)
+    - DEBUG: redacted headers and bodies, truncated to EVO_LOG_BODY_MAX_BYTES
+    """
+    if resp.status_code >= 400:
+        if evo_logger.isEnabledFor(logging.WARNING):
+            evo_logger.warning("%s %s -> %s in %.0fms: %s", prepped.method, endpoint, resp.status_code,
+                               elapsed * 1000, _truncate(resp.content))
+    elif evo_logger.isEnabledFor(logging.INFO) and _should_sample(endpoint):
+        evo_logger.info("%s %s -> %s in %.0fms", prepped.method, endpoint, resp.status_code, elapsed * 1000)
+
+    if evo_logger.isEnabledFor(logging.DEBUG):
+        if json_payload is not None:
+            body = pformat(_redact(json_payload))
+        else:
+            body = prepped.body if isinstance(prepped, requests.PreparedRequest) else prepped.content
+        evo_logger.debug("request %s %s\nheaders: %s\nbody: %s", prepped.method, prepped.url,
+                         _redact(dict(prepped.headers)), _truncate(body))
+        evo_logger.debug("response %s\n%s", resp.status_code, _truncate(resp.content))
+
+
+def request_and_print(method, url, headers=None, params=None, data=None, json=None, use_logging=True, endpoint=None):
     """
-    Send an HTTP request and log or print the full request/response details.
+    Send an HTTP request and log the request/response details.
 
     Args:
         method (str): HTTP method ("GET", "POST", etc.)
@@ -22,53 +140,99 @@ def request_and_print(method, url, headers=None, params=None, data=None, json=No
         params (dict, optional)
         data (dict, optional)
         json (dict, optional)
-        use_logging (bool): If True, use logging.debug instead of print().
+        use_logging (bool): If True (default), use the level-gated "evolution" logger (see _log_exchange).
+            If False, print() the full request/response like before - for local debugging only.
+        endpoint (str, optional): Evolution path used for sampling/log lines (defaults to the URL).
     """
-    log = logging.debug if use_logging else print
-    session = requests.Session()
+    session = get_evo_session()
+    endpoint = endpoint or url
 
     # Prepare request
     req = requests.Request(method.upper(), url, headers=headers, params=params, data=data, json=json)
     prepped = session.prepare_request(req)
 
-    # === REQUEST ===
-    log("=== REQUEST ===")
-    log(f"Method: {prepped.method}")
-    log(f"URL: {prepped.url}")
-    log(f"Headers:\n{pformat(dict(prepped.headers))}")
-    if prepped.body:
-        log(f"Body: {prepped.body}")
-    log("================")
+    if not use_logging:
+        _print_request(prepped)
 
     # Send request
-    resp = session.send(prepped)
+    started = time.monotonic()
+    resp = session.send(prepped, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT))
+    elapsed = time.monotonic() - started
+
+    if use_logging:
+        _log_exchange(endpoint, prepped, resp, elapsed, json_payload=json)
+    else:
+        _print_response(resp)
+
+    return resp
+
 
-    # === RESPONSE ===
-    log("=== RESPONSE ===")
-    log(f"Status: {resp.status_code}")
+def _print_request(prepped) -> None:
+    print("=== REQUEST ===")
+    print(f"Method: {prepped.method}")
+    print(f"URL: {prepped.url}")
+    print(f"Headers:\n{pformat(_redact(dict(prepped.headers)))}")
+    if prepped.body:
+        print(f"Body: {_truncate(prepped.body)}")
+    print("================")
+
+
+def _print_response(resp) -> None:
+    print("=== RESPONSE ===")
+    print(f"Status: {resp.status_code}")
     try:
-        log(pformat(resp.json()))
+        print(pformat(resp.json()))
     except Exception:
-        log(resp.text)
-    log("================")
+        print(resp.text)
+    print("================")
 
-    return resp
 
+def evo_url(path: str, no_suffix: bool = False, instance: str = None) -> str:
+    return f"{BASE_URL}/{path}/{instance or INSTANCE}" if not no_suffix else f"{BASE_URL}/{path}"
 
-def evo_request(path: str, payload: dict = None, params: dict = None, method: str = "POST", no_suffix: bool = False) -> Any:
+
+def evo_headers() -> dict:
+    return {"Content-Type": "application/json", "apikey": API_KEY}
+
+
+def evo_request(path: str, payload: dict = None, params: dict = None, method: str = "POST", no_suffix: bool = False,
+                instance: str = None) -> Any:
     
     """
-    Generalized request to Evolution API.
+    Generalized request to Evolution API, through `instance` (INSTANCE if None).
+
+    Concurrent identical GETs (same URL and params) are coalesced: only one goes to Evolution
+    and the others get its response (see whatsapp.core.single_flight).
     """
     
     # print("\n\n")
 
-    url = f"{BASE_URL}/{path}/{INSTANCE}" if not no_suffix else f"{BASE_URL}/{path}"
-    headers = {"Content-Type": "application/json", "apikey": API_KEY}
+    instance = instance or INSTANCE
+    url = evo_url(path, no_suffix, instance)
+
+    if method.upper() in COALESCED_METHODS:
+        return evo_single_flight.do(
+            request_key(method, url, params),
+            lambda: _evo_request(url, path, payload, params, method, instance),
+        )
+    return _evo_request(url, path, payload, params, method, instance)
+
+
+def _evo_request(url: str, path: str, payload: dict, params: dict, method: str, instance: str) -> Any:
+    headers = evo_headers()
+    resp = None
+
+    # Message sends wait for (or defer on) their lane's share of the send rate
+    acquire_send_token(path, instance)
+
+    # Fails fast with CircuitOpenError while Evolution is known to be down
+    evolution_breaker.before_call()
+    ok = False
 
     try:
         
-        resp = request_and_print( method, url, headers, params, json=payload ) #DEBUG
+        resp = request_and_print( method, url, headers, params, json=payload, endpoint=path )
+        ok = not is_breaker_failure_status(resp.status_code)
         return resp
 
 
@@ -81,31 +245,86 @@ def evo_request(path: str, payload: dict = None, params: dict = None, method: st
         raise  EvolutionServerError() from e
         
     except ValueError as e:
+        ok = True  # Evolution answered, the body just isn't JSON
         raise JSONParseError("[evo_request] Failed to parse JSON response") from e
+
+    finally:
+        evolution_breaker.record(ok)
+        # even a failed write may have been partly applied
+        invalidate_on_group_write(path, params)
     
     
 # created this especially to deal with ConnectionError caused by ConnectionResetError.
 # This happened when i ran get participantss request immediately after updating participants.
-import warnings
-import time
-
-def evo_request_with_retries(path: str, payload: dict = None, params: dict = None, method: str = "POST", no_suffix: bool = False) -> any:
+def evo_request_with_retries(path: str, payload: dict = None, params: dict = None, method: str = "POST", no_suffix: bool = False,
+                             policy: RetryPolicy = None, attempt: int = 1, instance: str = None) -> any:
     """
-    Call evo_request with retry logic for connection errors.
-    Wait times: 10 seconds, 5 minutes, 30 minutes, then raise the exception.
+    Call evo_request, retrying retryable failures according to `policy` (DEFAULT_RETRY_POLICY if None):
+    connection errors, 429 responses and, for idempotent methods only, 502/503/504 responses
+    (Retry-After is honored).
+
+    Args:
+        policy: retry policy. With `policy.sleep_in_thread=False` nothing sleeps: the first retryable
+            failure raises EvolutionRetryLaterError so the caller can reschedule itself.
+        attempt: number of the first attempt made here (> 1 when called from a continuation),
+            so backoff and max_attempts carry over across continuations.
+        instance: Evolution instance to go through (INSTANCE if None).
+
+    Returns the response. When retries are exhausted, the last connection error is raised,
+    or the last retryable response is returned (callers check the status as before).
     """
-    wait_times = [10, 20]  # seconds: 10s, 5min, 30min
-    
+    policy = policy or DEFAULT_RETRY_POLICY
+    budget_ends = time.monotonic() + policy.total_budget
+
     def req():
-        return evo_request(path, payload=payload, params=params, method=method, no_suffix=no_suffix)
+        return evo_request(path, payload=payload, params=params, method=method, no_suffix=no_suffix, instance=instance)
 
-    for attempt, wait in enumerate(wait_times, start=1):
+    while True:
+        error, resp = None, None
         try:
-            return req()
-        except ConnectionDomainError as e:
-            warnings.warn(f"[Attempt {attempt}] Connection failed: {e}. Retrying in {wait} seconds...")
-            time.sleep(wait)
-    
-    # Last attempt: just call one more time, let it raise if fails
-    return req()
-    
+            resp = req()
+        except DomainError as e:
+            if not policy.is_retryable_error(e):
+                raise
+            error = e
+
+        if error is None and not policy.is_retryable_response(resp, method):
+            return resp
+
+        delay = retry_delay(policy, path, attempt, error, resp, budget_ends - time.monotonic())
+        if delay is None:
+            break
+        time.sleep(delay)
+        attempt += 1
+
+    # Out of attempts / budget: let the last failure surface
+    if error is not None:
+        raise error
+    return resp
+
+
+def retry_delay(policy: RetryPolicy, path: str, attempt: int, error: Exception, resp, budget_left: float) -> Optional[float]:
+    """
+    Step of the retry loop shared by evo_request_with_retries and async_evo_request_with_retries,
+    after attempt number `attempt` failed with `error` or the retryable response `resp`.
+
+    Returns the wait before the next attempt, or None when out of attempts or of budget.
+
+    Raises:
+        EvolutionRetryLaterError: with the wait as retry_after, if `policy.sleep_in_thread` is False
+    """
+    failure = error if error is not None else f"HTTP {resp.status_code}"
+
+    if attempt >= policy.max_attempts:
+        return None
+
+    delay = policy.delay_for(attempt, resp)
+
+    if not policy.sleep_in_thread:
+        raise EvolutionRetryLaterError(f"[Attempt {attempt}] {path} failed: {failure}", retry_after=delay) from error
+
+    if delay > budget_left:
+        return None
+
+    warnings.warn(f"[Attempt {attempt}] {path} failed: {failure}. Retrying in {delay:.1f} seconds...")
+    return delay
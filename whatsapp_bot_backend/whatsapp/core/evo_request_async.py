@@ -0,0 +1,204 @@
+"""
+Asyncio counterpart of evo_request / evo_request_with_retries (httpx based).
+
+Every request goes through a per-event-loop semaphore, so one process can keep up to
+MAX_CONCURRENT_REQUESTS requests in flight without one OS thread per request.
+Use `gather_evo_requests` for fan-out operations, or `run_evo_requests` from sync code
+(scheduler jobs, sync routes).
+
+Requests are guarded like those of evo_request: message sends take a token of the calling thread's
+lane (whatsapp.core.lane_rate_limit), the circuit breaker fails them fast while Evolution is down,
+they're logged by the "evolution" logger and retried with the same RetryPolicy loop.
+"""
+
+import asyncio
+import time
+import weakref
+from dataclasses import dataclass, field
+from typing import Any, Iterable, List, Optional
+
+import httpx
+
+from shared.domain_errors import ConnectionDomainError, DomainError, EvolutionServerError
+from whatsapp.core.circuit_breaker import evolution_breaker, is_breaker_failure_status
+from whatsapp.core.evo_request import (
+    CONNECT_TIMEOUT,
+    INSTANCE,
+    READ_TIMEOUT,
+    _log_exchange,
+    evo_headers,
+    evo_url,
+    retry_delay,
+)
+from whatsapp.core.group_cache import invalidate_on_group_write
+from whatsapp.core.lane_rate_limit import acquire_send_token_async
+from whatsapp.core.retry_policy import DEFAULT_RETRY_POLICY, RetryPolicy
+from whatsapp.core.single_flight import COALESCED_METHODS, new_evo_async_single_flight, request_key
+
+
+# Max requests in flight per event loop (also the connection pool size)
+MAX_CONCURRENT_REQUESTS = 100
+
+
+@dataclass
+class EvoRequest:
+    """Arguments of one evo_request call (for batch helpers)."""
+    path: str
+    payload: Optional[dict] = None
+    params: Optional[dict] = field(default=None)
+    method: str = "POST"
+    no_suffix: bool = False
+    instance: Optional[str] = None
+
+
+class _LoopState:
+    def __init__(self):
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=MAX_CONCURRENT_REQUESTS,
+                max_keepalive_connections=MAX_CONCURRENT_REQUESTS,
+            ),
+        )
+        self.semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+        self.single_flight = new_evo_async_single_flight()
+
+
+# httpx clients, asyncio semaphores and futures are bound to one event loop
+_loop_states: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopState]" = weakref.WeakKeyDictionary()
+
+
+def _get_loop_state() -> _LoopState:
+    loop = asyncio.get_running_loop()
+    state = _loop_states.get(loop)
+    if state is None:
+        state = _loop_states[loop] = _LoopState()
+    return state
+
+
+async def close_async_evo_client() -> None:
+    """Close the current event loop's client (e.g. before the loop ends)."""
+    state = _loop_states.pop(asyncio.get_running_loop(), None)
+    if state is not None:
+        await state.client.aclose()
+
+
+async def async_evo_request(path: str, payload: dict = None, params: dict = None, method: str = "POST", no_suffix: bool = False,
+                            instance: str = None) -> httpx.Response:
+    """
+    Generalized async request to Evolution API, through `instance` (INSTANCE if None).
+    Same errors as evo_request. Concurrent identical GETs on the same event loop share one request.
+    """
+    state = _get_loop_state()
+    instance = instance or INSTANCE
+    url = evo_url(path, no_suffix, instance)
+
+    if method.upper() in COALESCED_METHODS:
+        return await state.single_flight.do(
+            request_key(method, url, params),
+            lambda: _async_evo_request(state, url, path, payload, params, method, instance),
+        )
+    return await _async_evo_request(state, url, path, payload, params, method, instance)
+
+
+async def _async_evo_request(state: _LoopState, url: str, path: str, payload: dict, params: dict, method: str,
+                             instance: str) -> httpx.Response:
+    # Message sends wait for (or defer on) their lane's share of the send rate
+    await acquire_send_token_async(path, instance)
+
+    # Fails fast with CircuitOpenError while Evolution is known to be down
+    evolution_breaker.before_call()
+    ok = False
+
+    try:
+        async with state.semaphore:
+            started = time.monotonic()
+            resp = await state.client.request(
+                method.upper(), url, headers=evo_headers(), params=params, json=payload
+            )
+            elapsed = time.monotonic() - started
+        _log_exchange(path, resp.request, resp, elapsed, json_payload=payload)
+        ok = not is_breaker_failure_status(resp.status_code)
+        return resp
+
+    except (httpx.ConnectError, httpx.ConnectTimeout, httpx.ReadError, httpx.WriteError, httpx.RemoteProtocolError) as e:
+        raise ConnectionDomainError from e
+
+    except httpx.HTTPError as e:
+        raise EvolutionServerError() from e
+
+    finally:
+        evolution_breaker.record(ok)
+        # even a failed write may have been partly applied
+        invalidate_on_group_write(path, params)
+
+
+async def async_evo_request_with_retries(path: str, payload: dict = None, params: dict = None, method: str = "POST",
+                                         no_suffix: bool = False, policy: RetryPolicy = None, attempt: int = 1,
+                                         instance: str = None) -> httpx.Response:
+    """
+    Call async_evo_request with the same retry loop as evo_request_with_retries (see `retry_delay`),
+    but waiting with asyncio.sleep instead of blocking a thread. Same arguments and outcome.
+    """
+    policy = policy or DEFAULT_RETRY_POLICY
+    budget_ends = time.monotonic() + policy.total_budget
+
+    while True:
+        error, resp = None, None
+        try:
+            resp = await async_evo_request(path, payload=payload, params=params, method=method, no_suffix=no_suffix,
+                                           instance=instance)
+        except DomainError as e:
+            if not policy.is_retryable_error(e):
+                raise
+            error = e
+
+        if error is None and not policy.is_retryable_response(resp, method):
+            return resp
+
+        delay = retry_delay(policy, path, attempt, error, resp, budget_ends - time.monotonic())
+        if delay is None:
+            break
+        await asyncio.sleep(delay)
+        attempt += 1
+
+    # Out of attempts / budget: let the last failure surface
+    if error is not None:
+        raise error
+    return resp
+
+
+async def gather_evo_requests(
+    requests: Iterable[EvoRequest],
+    with_retries: bool = True,
+    return_exceptions: bool = True,
+) -> List[Any]:
+    """
+    Run many Evolution requests concurrently (bounded by MAX_CONCURRENT_REQUESTS).
+
+    Returns results in the same order as `requests`. With `return_exceptions` (default),
+    a failed request yields its exception instead of cancelling the others.
+    """
+    send = async_evo_request_with_retries if with_retries else async_evo_request
+
+    return await asyncio.gather(
+        *(
+            send(r.path, payload=r.payload, params=r.params, method=r.method, no_suffix=r.no_suffix, instance=r.instance)
+            for r in requests
+        ),
+        return_exceptions=return_exceptions,
+    )
+
+
+def run_evo_requests(requests: Iterable[EvoRequest], with_retries: bool = True, return_exceptions: bool = True) -> List[Any]:
+    """
+    Sync entrypoint for gather_evo_requests - for scheduler jobs and sync routes
+    (must not be called from inside a running event loop). The requests use the lane of the calling thread.
+    """
+    async def _run():
+        try:
+            return await gather_evo_requests(requests, with_retries=with_retries, return_exceptions=return_exceptions)
+        finally:
+            await close_async_evo_client()
+
+    return asyncio.run(_run())
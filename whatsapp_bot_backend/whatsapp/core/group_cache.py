@@ -0,0 +1,167 @@
+"""
+Read-through TTL caches for Evolution group lookups (participants, invite links), keyed by groupJid.
+
+Entries expire after a TTL and are evicted least-recently-used first when a cache goes over its
+entry count or (approximate) memory cap. Writes to a group through evo_request
+(group/updateParticipant, ...) invalidate that group's entries, see `invalidate_group`.
+A load that was already running when its key was invalidated doesn't store its (stale) result,
+and isn't shared with callers arriving after the write (see SingleFlight.forget).
+"""
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from whatsapp.core.single_flight import forget_evo_flights, request_has_param
+
+
+# --- Config ---
+GROUP_PARTICIPANTS_TTL_SECONDS = 60
+GROUP_INVITE_LINK_TTL_SECONDS = 60 * 60          # links only change when revoked
+GROUP_CACHE_MAX_ENTRIES = 1000
+GROUP_CACHE_MAX_BYTES = 16 * 1024 * 1024         # per cache, estimated from the JSON size of values
+
+# Evolution paths that modify a group (the groupJid is in the query params)
+GROUP_WRITE_PATHS = {"group/updateParticipant", "group/updateSetting", "group/revokeInviteCode"}
+
+
+def _json_size(value: Any) -> int:
+    return len(json.dumps(value, default=str))
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache with per-entry TTL, an entry-count cap and an approximate memory cap.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        ttl_seconds: float,
+        max_entries: int = GROUP_CACHE_MAX_ENTRIES,
+        max_bytes: int = GROUP_CACHE_MAX_BYTES,
+        sizeof: Callable[[Any], int] = _json_size,
+    ):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()  # key -> (expires_at, size, value)
+        self._bytes = 0
+        self._stats = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0, "invalidations": 0}
+
+        # Generations: bumped by every invalidate/clear. A load records the generation it started
+        # at and is only stored if its key (or the whole cache) wasn't invalidated since.
+        self._generation = 0
+        self._cleared_at = -1
+        self._invalidated_at: Dict[Hashable, int] = {}  # only needed while loads are running
+        self._loads_running = 0
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """
+        Cached value for `key`, or the result of `loader()` (which is then cached).
+        Exceptions from `loader` propagate and nothing is cached.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self._stats["hits"] += 1
+                    return entry[2]
+                self._remove(key)
+                self._stats["expired"] += 1
+            self._stats["misses"] += 1
+            started_at = self._generation
+            self._loads_running += 1
+
+        # Load outside the lock: a slow Evolution call must not block other keys
+        try:
+            value = loader()
+            self.put(key, value, loaded_at=started_at)
+        finally:
+            with self._lock:
+                self._loads_running -= 1
+                if not self._loads_running:
+                    self._invalidated_at.clear()
+        return value
+
+    def put(self, key: Hashable, value: Any, loaded_at: Optional[int] = None) -> None:
+        """
+        Store `value`. With `loaded_at` (the generation its load started at), nothing is stored
+        if `key` was invalidated (or the cache cleared) since.
+        """
+        size = self.sizeof(value)
+        with self._lock:
+            if loaded_at is not None and max(self._cleared_at, self._invalidated_at.get(key, -1)) >= loaded_at:
+                return
+            if key in self._entries:
+                self._remove(key)
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, size, value)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self._stats["evictions"] += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            if self._loads_running:
+                self._invalidated_at[key] = self._generation
+            self._generation += 1
+            if key in self._entries:
+                self._remove(key)
+                self._stats["invalidations"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cleared_at = self._generation
+            self._generation += 1
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                "name": self.name,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "ttl_seconds": self.ttl_seconds,
+                **self._stats,
+                "hit_rate": round(self._stats["hits"] / lookups, 3) if lookups else 0.0,
+            }
+
+    def _remove(self, key: Hashable) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+
+group_participants_cache = TTLCache("group_participants", GROUP_PARTICIPANTS_TTL_SECONDS)
+group_invite_link_cache = TTLCache("group_invite_link", GROUP_INVITE_LINK_TTL_SECONDS)
+
+GROUP_CACHES = (group_participants_cache, group_invite_link_cache)
+
+
+def invalidate_group(group_id: str) -> None:
+    """Drop every cached lookup for `group_id`, and stop sharing its lookups still in flight."""
+    for cache in GROUP_CACHES:
+        cache.invalidate(group_id)
+    forget_evo_flights(lambda key: request_has_param(key, "groupJid", group_id))
+
+
+def invalidate_on_group_write(path: str, params: dict = None) -> None:
+    """Called by evo_request after every call: invalidates the group if `path` modifies it."""
+    if path.strip("/") in GROUP_WRITE_PATHS and params and params.get("groupJid"):
+        invalidate_group(params["groupJid"])
+
+
+def group_cache_stats() -> list:
+    return [cache.stats() for cache in GROUP_CACHES]
@@ -0,0 +1,120 @@
+"""
+Registry of the Evolution instances (WhatsApp numbers) mass messages are sent through
+(whatsapp_instances table).
+
+Group flows always go through the default instance (evo_request.INSTANCE): a group belongs to the
+number that created it. Mass messages are spread over every enabled instance by the sender pool
+(whatsapp.mass_messages.sender_pool). While nothing is registered, the default instance is the
+only sender, with the planner's global budget - as before the registry existed. The same
+fallback applies when every registered instance is disabled.
+"""
+
+from dataclasses import dataclass, replace
+from typing import List, Optional
+
+from sqlalchemy import event, text
+
+from db.get_cursor import get_cursor
+from whatsapp.core.evo_request import INSTANCE
+from whatsapp.core.group_cache import TTLCache
+from whatsapp.send_slots.planner import MESSAGES_PER_HOUR, MESSAGES_PER_MINUTE
+
+
+INSTANCES_CACHE_TTL_SECONDS = 30
+
+_SENDING_INSTANCES_KEY = "sending"
+
+
+@dataclass(frozen=True)
+class WhatsappInstance:
+    name: str
+    number: Optional[str] = None
+    weight: int = 1
+    messages_per_minute: int = MESSAGES_PER_MINUTE
+    messages_per_hour: int = MESSAGES_PER_HOUR
+    enabled: bool = True
+
+    @property
+    def sends_per_minute(self) -> float:
+        """Sustained mass-message send rate within both budgets."""
+        return min(self.messages_per_minute, self.messages_per_hour / 60)
+
+
+def upsert_instance_sql(cur, instance: WhatsappInstance) -> None:
+    cur.execute(
+        text("""
+            INSERT INTO whatsapp_instances (name, number, weight, messages_per_minute, messages_per_hour, enabled)
+            VALUES (:name, :number, :weight, :messages_per_minute, :messages_per_hour, :enabled)
+            ON CONFLICT (name) DO UPDATE SET
+                number = EXCLUDED.number,
+                weight = EXCLUDED.weight,
+                messages_per_minute = EXCLUDED.messages_per_minute,
+                messages_per_hour = EXCLUDED.messages_per_hour,
+                enabled = EXCLUDED.enabled
+        """),
+        {
+            "name": instance.name,
+            "number": instance.number,
+            "weight": instance.weight,
+            "messages_per_minute": instance.messages_per_minute,
+            "messages_per_hour": instance.messages_per_hour,
+            "enabled": instance.enabled,
+        },
+    )
+    _invalidate_after_commit(cur)
+
+
+def set_instance_enabled_sql(cur, name: str, enabled: bool) -> bool:
+    """Returns False if no such instance is registered."""
+    row = cur.execute(
+        text("UPDATE whatsapp_instances SET enabled = :enabled WHERE name = :name RETURNING name"),
+        {"name": name, "enabled": enabled},
+    ).first()
+    _invalidate_after_commit(cur)
+    return row is not None
+
+
+def get_instances_sql(cur) -> List[WhatsappInstance]:
+    rows = cur.execute(
+        text("""
+            SELECT name, number, weight, messages_per_minute, messages_per_hour, enabled
+            FROM whatsapp_instances
+            ORDER BY name
+        """)
+    ).fetchall()
+    return [WhatsappInstance(**row._mapping) for row in rows]
+
+
+def is_registered_instance_sql(cur, name: str) -> bool:
+    row = cur.execute(text("SELECT 1 FROM whatsapp_instances WHERE name = :name"), {"name": name}).first()
+    return row is not None
+
+
+_instances_cache = TTLCache("whatsapp_instances", INSTANCES_CACHE_TTL_SECONDS, max_entries=1)
+
+
+def get_sending_instances() -> List[WhatsappInstance]:
+    """
+    Enabled instances mass messages may go through (cached for INSTANCES_CACHE_TTL_SECONDS).
+    Never empty: with none registered or every one disabled, the default instance alone
+    (with its registered settings, if any).
+    """
+    def load():
+        with get_cursor() as cur:
+            instances = get_instances_sql(cur)
+        enabled = [instance for instance in instances if instance.enabled]
+        if enabled:
+            return enabled
+        default = next((instance for instance in instances if instance.name == INSTANCE), None)
+        return [replace(default, enabled=True) if default is not None else WhatsappInstance(name=INSTANCE)]
+
+    return _instances_cache.get_or_load(_SENDING_INSTANCES_KEY, load)
+
+
+def invalidate_instances() -> None:
+    _instances_cache.clear()
+
+
+def _invalidate_after_commit(cur) -> None:
+    """Drop the cached instances once the registry change is committed (a reload before would read the old rows)."""
+    event.listen(cur, "after_commit", lambda session: invalidate_instances(), once=True)
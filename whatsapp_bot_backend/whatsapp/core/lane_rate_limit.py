@@ -0,0 +1,194 @@
+"""
+Per-lane share of the Evolution send rate.
+
+Every message send (`message/send*`) made through evo_request or async_evo_request takes a token
+from the bucket of the calling thread's priority lane (see job_and_listener.job_priority) on the
+instance it goes through. The critical and normal lanes refill at their share of
+EVOLUTION_SENDS_PER_MINUTE. The bulk lane of an instance registered as a mass-message sender refills
+at the instance's own budget (WhatsappInstance.sends_per_minute, the rate the planner and the sender
+pool schedule its sends at); on any other instance at its share. So a bulk campaign can use up the
+bulk bucket but never the tokens critical sends rely on.
+
+When a lane is out of tokens the caller waits in its thread for up to the lane's
+LANE_MAX_WAIT_SECONDS; past that SendDeferredError (an EvolutionRetryLaterError) is raised, so jobs
+that can reschedule themselves (the mass-message jobs, all bulk) defer instead of holding a worker.
+"""
+
+import asyncio
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict, Optional, Tuple
+
+from job_and_listener.job_priority import PRIORITY_BULK, PRIORITY_CRITICAL, PRIORITY_NORMAL, current_priority
+from shared.domain_errors import SendDeferredError
+
+
+# Sends per minute each Evolution instance is allowed in total, split between the lanes
+EVOLUTION_SENDS_PER_MINUTE = 20
+
+LANE_SHARES = {
+    PRIORITY_CRITICAL: 0.5,
+    PRIORITY_NORMAL: 0.3,
+    PRIORITY_BULK: 0.2,
+}
+
+# Longest in-thread wait for a token; bulk jobs reschedule themselves instead
+LANE_MAX_WAIT_SECONDS = {
+    PRIORITY_CRITICAL: 120.0,
+    PRIORITY_NORMAL: 120.0,
+    PRIORITY_BULK: 0.0,
+}
+
+# Sends a lane may burst after being idle
+LANE_BURST = 3
+
+RATE_LIMITED_PATH_PREFIX = "message/send"
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, at most `capacity` saved up."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self) -> float:
+        """Take a token. Returns 0 if one was taken, else the seconds until one is available."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def available(self) -> float:
+        with self._lock:
+            return min(self.capacity, self._tokens + (time.monotonic() - self._updated) * self.rate)
+
+
+class LaneRateLimiter:
+    """
+    Token buckets per (instance, lane), created on the lane's first send on the instance.
+
+    Args:
+        bulk_budget: sends per minute of an instance's bulk lane, or None for its share
+            of `sends_per_minute`. A bucket is rebuilt when its instance's budget changes.
+    """
+
+    def __init__(
+        self,
+        sends_per_minute: float = EVOLUTION_SENDS_PER_MINUTE,
+        shares: Dict[str, float] = LANE_SHARES,
+        bulk_budget: Optional[Callable[[str], Optional[float]]] = None,
+    ):
+        self.sends_per_minute = sends_per_minute
+        self.shares = shares
+        self.bulk_budget = bulk_budget
+        self._lock = threading.Lock()
+        self._buckets: Dict[Tuple[str, str], TokenBucket] = {}
+        self._waits = defaultdict(int)      # (instance, lane) -> sends that waited in thread
+        self._deferred = defaultdict(int)   # (instance, lane) -> sends deferred with SendDeferredError
+
+    def lane_rate(self, instance: str, lane: str) -> float:
+        """Sends per minute of `lane` on `instance`."""
+        if lane == PRIORITY_BULK and self.bulk_budget is not None:
+            budget = self.bulk_budget(instance)
+            if budget is not None:
+                return budget
+        return self.sends_per_minute * self.shares[lane]
+
+    def _bucket(self, instance: str, lane: str) -> TokenBucket:
+        # outside the lock: the budget may come from the database
+        rate = self.lane_rate(instance, lane) / 60
+        with self._lock:
+            bucket = self._buckets.get((instance, lane))
+            if bucket is None or bucket.rate != rate:
+                bucket = self._buckets[(instance, lane)] = TokenBucket(rate=rate, capacity=LANE_BURST)
+            return bucket
+
+    def acquire(self, instance: str, lane: str) -> None:
+        """
+        Take a send token of `lane` on `instance`, waiting up to LANE_MAX_WAIT_SECONDS[lane].
+
+        Raises:
+            SendDeferredError: if the lane has no token within its wait limit
+        """
+        bucket = self._bucket(instance, lane)
+        deadline = time.monotonic() + LANE_MAX_WAIT_SECONDS[lane]
+
+        while True:
+            wait = self._take(bucket, instance, lane, deadline)
+            if wait == 0:
+                return
+            time.sleep(wait)
+
+    async def acquire_async(self, instance: str, lane: str) -> None:
+        """`acquire` for the asyncio client: waits with asyncio.sleep instead of blocking the loop."""
+        bucket = self._bucket(instance, lane)
+        deadline = time.monotonic() + LANE_MAX_WAIT_SECONDS[lane]
+
+        while True:
+            wait = self._take(bucket, instance, lane, deadline)
+            if wait == 0:
+                return
+            await asyncio.sleep(wait)
+
+    def _take(self, bucket: TokenBucket, instance: str, lane: str, deadline: float) -> float:
+        """Take a token (returns 0) or return the wait for one; raises if it would end past `deadline`."""
+        wait = bucket.take()
+        if wait == 0:
+            return 0.0
+        if time.monotonic() + wait > deadline:
+            with self._lock:
+                self._deferred[(instance, lane)] += 1
+            raise SendDeferredError(f"Send rate of the {lane} lane of {instance} exhausted", retry_after=wait)
+        with self._lock:
+            self._waits[(instance, lane)] += 1
+        return wait
+
+    def snapshot(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        with self._lock:
+            buckets = dict(self._buckets)
+            waits, deferred = dict(self._waits), dict(self._deferred)
+
+        result = defaultdict(dict)
+        for (instance, lane), bucket in buckets.items():
+            result[instance][lane] = {
+                "per_minute": round(bucket.rate * 60, 2),
+                "tokens": round(bucket.available(), 2),
+                "waits": waits.get((instance, lane), 0),
+                "deferred": deferred.get((instance, lane), 0),
+            }
+        return dict(result)
+
+
+def registered_bulk_budget(instance: str) -> Optional[float]:
+    """Mass-message budget (sends per minute) of `instance` if it's a sender of the instance registry."""
+    # imported here: the registry imports evo_request, which imports this module
+    from whatsapp.core.instances import get_sending_instances
+
+    for sender in get_sending_instances():
+        if sender.name == instance:
+            return sender.sends_per_minute
+    return None
+
+
+lane_rate_limiter = LaneRateLimiter(bulk_budget=registered_bulk_budget)
+
+
+def acquire_send_token(path: str, instance: str) -> None:
+    """Rate-limit message sends by instance and the calling thread's lane; other endpoints pass through."""
+    if path.startswith(RATE_LIMITED_PATH_PREFIX):
+        lane_rate_limiter.acquire(instance, current_priority())
+
+
+async def acquire_send_token_async(path: str, instance: str) -> None:
+    """acquire_send_token for the asyncio client (the lane is that of the thread running the event loop)."""
+    if path.startswith(RATE_LIMITED_PATH_PREFIX):
+        await lane_rate_limiter.acquire_async(instance, current_priority())
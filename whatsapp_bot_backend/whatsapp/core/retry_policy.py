@@ -0,0 +1,96 @@
+"""
+Retry policies for Evolution API calls (used by evo_request_with_retries).
+"""
+
+import random
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+from shared.domain_errors import ConnectionDomainError
+
+
+# Responses worth retrying on any request: throttled, so it wasn't processed.
+RETRYABLE_STATUS_CODES = {429}
+
+# Gateway errors: the request may or may not have reached Evolution (a 504 is often a message
+# that did go out), so only idempotent requests are retried. 500 is never retried.
+IDEMPOTENT_RETRYABLE_STATUS_CODES = {502, 503, 504}
+
+# HTTP methods that can be repeated without repeating their effect
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """
+    Exponential backoff with jitter, capped by both an attempt count and a total time budget.
+
+    Attributes:
+        max_attempts: total attempts, including the first one
+        base_delay: seconds before the first retry
+        multiplier: backoff factor between consecutive retries
+        max_delay: cap for a single wait (also caps Retry-After)
+        jitter: fraction of each wait that is randomized (0 = none, 1 = full jitter)
+        total_budget: seconds of waiting allowed in total; no retry is made past it
+        sleep_in_thread: if False, raise EvolutionRetryLaterError instead of sleeping,
+            so the caller (e.g. a scheduled job) can reschedule itself
+    """
+    max_attempts: int = 3
+    base_delay: float = 5.0
+    multiplier: float = 2.0
+    max_delay: float = 60.0
+    jitter: float = 0.5
+    total_budget: float = 30.0
+    sleep_in_thread: bool = True
+
+    def is_retryable_error(self, error: Exception) -> bool:
+        """Connection refused/reset and connect timeouts (raised as ConnectionDomainError by evo_request)."""
+        return isinstance(error, ConnectionDomainError)
+
+    def is_retryable_response(self, resp, method: str) -> bool:
+        if resp is None:
+            return False
+        if resp.status_code in RETRYABLE_STATUS_CODES:
+            return True
+        return resp.status_code in IDEMPOTENT_RETRYABLE_STATUS_CODES and method.upper() in IDEMPOTENT_METHODS
+
+    def backoff(self, attempt: int) -> float:
+        """Wait before retry number `attempt` (1-based), with jitter."""
+        delay = min(self.max_delay, self.base_delay * self.multiplier ** (attempt - 1))
+        return delay * (1 - self.jitter * random.random())
+
+    def delay_for(self, attempt: int, resp=None) -> float:
+        """Wait before retry number `attempt`, honoring Retry-After on throttled responses."""
+        retry_after = _parse_retry_after(resp)
+        if retry_after is not None:
+            return min(self.max_delay, retry_after)
+        return self.backoff(attempt)
+
+
+def _parse_retry_after(resp) -> Optional[float]:
+    """Retry-After header in seconds (delta-seconds or HTTP-date form), or None."""
+    if resp is None:
+        return None
+
+    value = resp.headers.get("Retry-After")
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+# Default for API routes and jobs that must finish their work in-thread (short, bounded waits)
+DEFAULT_RETRY_POLICY = RetryPolicy()
+
+# For scheduled jobs that can reschedule their remaining work as a delayed continuation
+JOB_CONTINUATION_RETRY_POLICY = RetryPolicy(max_attempts=5, base_delay=30.0, max_delay=15 * 60, total_budget=60 * 60, sleep_in_thread=False)
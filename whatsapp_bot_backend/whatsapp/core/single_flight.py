@@ -0,0 +1,169 @@
+"""
+Single-flight coalescing for idempotent Evolution requests.
+
+While a request for a key is in flight, identical requests for the same key don't go to Evolution:
+they wait for the in-flight one and get its result (or its exception). Nothing is cached once the
+request completes - that's what whatsapp.core.group_cache is for.
+
+`SingleFlight` is for threads (scheduler jobs, sync routes), `AsyncSingleFlight` for one event loop.
+Both report to the same `SingleFlightStats`.
+"""
+
+import asyncio
+import threading
+import weakref
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+
+class SingleFlightStats:
+    """Thread-safe counters: `calls` actually made, `coalesced` calls saved by sharing a result."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.coalesced = 0
+
+    def record(self, coalesced: bool) -> None:
+        with self._lock:
+            if coalesced:
+                self.coalesced += 1
+            else:
+                self.calls += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.calls + self.coalesced
+            return {
+                "calls": self.calls,
+                "coalesced": self.coalesced,
+                "saved_ratio": round(self.coalesced / total, 3) if total else 0.0,
+            }
+
+
+class _Flight:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key across threads."""
+
+    def __init__(self, stats: SingleFlightStats):
+        self.stats = stats
+        self._lock = threading.Lock()
+        self._flights: Dict[Hashable, _Flight] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        self.stats.record(coalesced=not leader)
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = fn()
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+            flight.done.set()
+
+    def forget(self, match: Callable[[Hashable], bool]) -> None:
+        """
+        Stop sharing the in-flight calls whose key matches: later callers start a new call instead
+        of joining one that may predate a write. Callers already waiting still get its result.
+        """
+        with self._lock:
+            for key in [key for key in self._flights if match(key)]:
+                del self._flights[key]
+
+
+class AsyncSingleFlight:
+    """Coalesces concurrent calls with the same key within one event loop."""
+
+    def __init__(self, stats: SingleFlightStats):
+        self.stats = stats
+        # forget() may be called from any thread
+        self._lock = threading.Lock()
+        self._flights: Dict[Hashable, asyncio.Future] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        with self._lock:
+            flight = self._flights.get(key)
+        if flight is not None:
+            self.stats.record(coalesced=True)
+            # shield: a cancelled waiter must not cancel the shared request
+            return await asyncio.shield(flight)
+
+        self.stats.record(coalesced=False)
+        flight = asyncio.ensure_future(fn())
+        with self._lock:
+            self._flights[key] = flight
+
+        def done(_):
+            with self._lock:
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+
+        flight.add_done_callback(done)
+        return await asyncio.shield(flight)
+
+    def forget(self, match: Callable[[Hashable], bool]) -> None:
+        """Same as SingleFlight.forget."""
+        with self._lock:
+            for key in [key for key in self._flights if match(key)]:
+                del self._flights[key]
+
+
+def request_key(method: str, url: str, params: Optional[dict]) -> Hashable:
+    """Identity of a request: method, full URL (includes the instance) and query params."""
+    return method.upper(), url, tuple(sorted((params or {}).items()))
+
+
+def request_has_param(key: Hashable, name: str, value: Any) -> bool:
+    """True if the request_key `key` was made with the query param `name`=`value`."""
+    return (name, value) in key[2]
+
+
+# Only these methods are coalesced: they're idempotent, so sharing one response is safe
+COALESCED_METHODS = {"GET"}
+
+evo_single_flight_stats = SingleFlightStats()
+evo_single_flight = SingleFlight(evo_single_flight_stats)
+
+# One per event loop that uses the async client (see whatsapp.core.evo_request_async)
+_evo_async_single_flights: "weakref.WeakSet[AsyncSingleFlight]" = weakref.WeakSet()
+_evo_async_single_flights_lock = threading.Lock()
+
+
+def new_evo_async_single_flight() -> AsyncSingleFlight:
+    """AsyncSingleFlight for Evolution requests of one event loop, reached by forget_evo_flights."""
+    flight = AsyncSingleFlight(evo_single_flight_stats)
+    with _evo_async_single_flights_lock:
+        _evo_async_single_flights.add(flight)
+    return flight
+
+
+def forget_evo_flights(match: Callable[[Hashable], bool]) -> None:
+    """forget() on the Evolution single-flights of threads and of every event loop."""
+    evo_single_flight.forget(match)
+    with _evo_async_single_flights_lock:
+        async_flights = list(_evo_async_single_flights)
+    for flight in async_flights:
+        flight.forget(match)
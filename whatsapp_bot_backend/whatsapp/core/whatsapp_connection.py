@@ -1,14 +1,49 @@
-from shared.domain_errors import ConnectionDomainError, WhatsappNotConnectedError
-from whatsapp.core.evo_request import evo_request_with_retries   
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional, Tuple
 
+from apscheduler.schedulers.background import BackgroundScheduler
 
-def connection_state_service():
+from shared.domain_errors import CircuitOpenError, ConnectionDomainError, WhatsappNotConnectedError
+from shared.timezone import TIMEZONE
+from whatsapp.core.evo_request import INSTANCE, evo_request_with_retries
+from whatsapp.core.instances import (
+    WhatsappInstance,
+    get_instances_sql,
+    get_sending_instances,
+    is_registered_instance_sql,
+    upsert_instance_sql,
+)
+from whatsapp.core.retry_policy import RetryPolicy
+from job_and_listener.job.core.create.create_job import add_internal_interval_job
+
+
+# How often the background poller refreshes the connection state
+CONNECTION_POLL_INTERVAL_SECONDS = 30
+
+# A cached state older than this is not trusted and is probed again on read
+CONNECTION_STATE_MAX_AGE_SECONDS = 90
+
+CONNECTION_POLLER_JOB_ID = "internal/poll_whatsapp_connection"
+
+# The probe itself never sleeps: a failed probe is just a negative state until the next one
+CONNECTION_PROBE_RETRY_POLICY = RetryPolicy(max_attempts=1)
+
+
+def connection_state_service(instance: Optional[str] = None):
+    """
+    Probe Evolution for the instance's connection state (one round-trip, no retries).
+    Returns "connected", "not_connected" or "evolution_connection_error".
+    """
     try:
         resp = evo_request_with_retries(
             "instance/connectionState",
-            method="GET"
+            method="GET",
+            policy=CONNECTION_PROBE_RETRY_POLICY,
+            instance=instance,
         )
-    except ConnectionDomainError:
+    except (ConnectionDomainError, CircuitOpenError):
         return "evolution_connection_error"
 
     content_type = resp.headers.get("Content-Type", "")
@@ -25,27 +60,163 @@ def connection_state_service():
 
     return "not_connected"
 
-def validate_whatsapp_connection():
-    status = connection_state_service()
+class ConnectionMonitor:
+    """
+    Last known WhatsApp connection state, refreshed by a background poller.
+
+    Reads are O(1) from the cache; a fresh probe is only made when the cached state is
+    missing, older than `max_age_seconds`, or negative (so recovery is noticed immediately).
+    """
+
+    def __init__(self, instance: str = INSTANCE, max_age_seconds: float = CONNECTION_STATE_MAX_AGE_SECONDS):
+        self.instance = instance
+        self.max_age_seconds = max_age_seconds
+        self._lock = threading.Lock()
+        self._status: Optional[str] = None
+        self._checked_at: Optional[datetime] = None
+        self._checked_monotonic: float = 0.0
+
+    def refresh(self) -> str:
+        """Probe Evolution now and cache the result."""
+        status = connection_state_service(self.instance)
+        with self._lock:
+            self._status = status
+            self._checked_at = datetime.now(TIMEZONE)
+            self._checked_monotonic = time.monotonic()
+        return status
+
+    def cached(self) -> Tuple[Optional[str], Optional[datetime]]:
+        """(status, checked_at) as last probed, without probing. (None, None) before the first probe."""
+        with self._lock:
+            return self._status, self._checked_at
+
+    def is_stale(self) -> bool:
+        with self._lock:
+            return self._status is None or time.monotonic() - self._checked_monotonic > self.max_age_seconds
+
+    def state(self, fresh: bool = False) -> Tuple[str, datetime]:
+        """
+        (status, checked_at), probing first if `fresh` is set or the cached state is stale or negative.
+        """
+        status, checked_at = self.cached()
+        if fresh or self.is_stale() or status != "connected":
+            self.refresh()
+            status, checked_at = self.cached()
+        return status, checked_at
+
+    def is_connected(self) -> bool:
+        """
+        Cached state, probing only when it's missing or stale - a negative state is trusted until
+        the next poll (unlike `state`), so per-send health checks don't probe a dead instance every time.
+        """
+        if self.is_stale():
+            return self.refresh() == "connected"
+        return self.cached()[0] == "connected"
+
+
+connection_monitor = ConnectionMonitor()
+
+_instance_monitors: Dict[str, ConnectionMonitor] = {INSTANCE: connection_monitor}
+_instance_monitors_lock = threading.Lock()
+
+
+def instance_monitor(instance: str) -> ConnectionMonitor:
+    """
+    Connection monitor of `instance` (created on first use). Only for registered instances:
+    names from outside (query params, ...) go through `registered_instance_monitor`.
+    """
+    with _instance_monitors_lock:
+        if instance not in _instance_monitors:
+            _instance_monitors[instance] = ConnectionMonitor(instance)
+        return _instance_monitors[instance]
+
+
+def registered_instance_monitor(cur, instance: str) -> Optional[ConnectionMonitor]:
+    """Connection monitor of `instance`, or None if it's neither the default instance nor registered."""
+    if instance == INSTANCE:
+        return connection_monitor
+    if not is_registered_instance_sql(cur, instance):
+        return None
+    return instance_monitor(instance)
+
+
+def refresh_connection_monitors() -> None:
+    """
+    Poll the default instance and every instance mass messages are sent through, and drop the
+    monitors of the others (unregistered or disabled - recreated if they're asked for again).
+    """
+    connection_monitor.refresh()
+    sending = {instance.name for instance in get_sending_instances()}
+
+    with _instance_monitors_lock:
+        for name in [name for name in _instance_monitors if name != INSTANCE and name not in sending]:
+            del _instance_monitors[name]
+
+    for name in sending - {INSTANCE}:
+        instance_monitor(name).refresh()
+
+
+def setup_connection_monitor(sched: BackgroundScheduler) -> None:
+    add_internal_interval_job(
+        sched,
+        refresh_connection_monitors,
+        seconds=CONNECTION_POLL_INTERVAL_SECONDS,
+        job_id=CONNECTION_POLLER_JOB_ID,
+    )
+
+
+def validate_whatsapp_connection() -> None:
+    """
+    Raises:
+        WhatsappNotConnectedError: if the (cached) state of INSTANCE isn't "connected"
+    """
+    status, _ = connection_monitor.state()
     if status != "connected":
-        return WhatsappNotConnectedError(f"WhatsApp not connected. Current status: {status}")
+        raise WhatsappNotConnectedError(f"WhatsApp not connected. Current status: {status}")
+
+
+def register_instance_service(cur, instance: WhatsappInstance):
+    """Add (or update) an instance in the registry of mass-message senders, without touching Evolution."""
+    upsert_instance_sql(cur, instance)
+    status, checked_at = instance_monitor(instance.name).state(fresh=True)
+    return {"instance": instance, "status": status, "checked_at": checked_at}
+
+
+def list_instances_service(cur):
+    """Registered instances with their last known connection state (probed if stale)."""
+    result = []
+    for instance in get_instances_sql(cur):
+        status, checked_at = instance_monitor(instance.name).state()
+        result.append({"instance": instance, "status": status, "checked_at": checked_at})
+    return result
 
 
 def connect_service(
+    cur,
     number: str,
     api_key: str,
+    instance_name: Optional[str] = None,
+    **instance_settings,
 ):
+    """
+    (Re)create `instance_name` (the default instance if None) in Evolution for `number`, and
+    register it as a mass-message sender with `instance_settings` (see WhatsappInstance).
+    Returns the QR code to scan.
+    """
+    instance_name = instance_name or INSTANCE
+
     resp_delete = evo_request_with_retries(
         "instance/delete",
         payload=None,
         params=None,
         method="DELETE",
+        instance=instance_name,
     )
 
     resp_create = evo_request_with_retries(
         "instance/create",
         payload={
-            "instanceName": "my_instance",
+            "instanceName": instance_name,
             "integration": "WHATSAPP-BAILEYS",
             "token": api_key,
             "number": number,
@@ -58,10 +229,15 @@ def connect_service(
         payload={"number": number},
         params=None,
         method="GET",
+        instance=instance_name,
     )
 
     connect_json = resp_connect.json()
 
+    upsert_instance_sql(cur, WhatsappInstance(name=instance_name, number=number, **instance_settings))
+    # not connected until the QR code is scanned
+    instance_monitor(instance_name).refresh()
+
     return {
         "qr_code": connect_json.get("base64"),
         "delete_response": resp_delete.json(),
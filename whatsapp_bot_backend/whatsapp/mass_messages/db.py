@@ -1,34 +1,246 @@
-from typing import Dict, List, Any
-from sqlalchemy import text
+import json
+from datetime import datetime
+from typing import Dict, List, Any, Optional
+from sqlalchemy import bindparam, text
 
 from api.base_models import ParticipantItem
+from db.bulk import bulk_insert, bulk_update
 from job_and_listener.job.models.job_model import Job
+from job_and_listener.job_batch.stats import add_batch_counts_sql
+from job_and_listener.job_status import JOBSTATUS
 
 
 def insert_to_mass_messages_sql(
     cur, batch_id: str, mass_messages_tb_participants : List[Dict[str, Any]]
 ):
+    """
+    Insert one mass_messages row per recipient (multi-row INSERTs, see db.bulk).
 
-    insert_sql = text("""
-        INSERT INTO mass_messages (
-            batch_id, recipient_id, recipient_phone_number, job_info_id
-        ) VALUES (
-            :batch_id, :recipient_id, :recipient_phone_number, :job_info_id
-        )
-    """)
-
-    for el in mass_messages_tb_participants:
-        
-        participantItem = el["participantItem"]
-        job_id = el["job_id"]
-        
-        cur.execute(
-            insert_sql,
+    Each element holds "participantItem", "job_id" and optionally "scheduled_at".
+    """
+    add_batch_counts_sql(cur, batch_id, {"messages_total": len(mass_messages_tb_participants)})
+    bulk_insert(
+        cur,
+        "mass_messages",
+        ["batch_id", "recipient_id", "recipient_phone_number", "job_info_id", "scheduled_at", "template_vars"],
+        (
             {
                 "batch_id": batch_id,
-                "recipient_id": participantItem.id,
-                "recipient_phone_number": participantItem.phone_number,
-                "job_info_id": job_id,
+                "recipient_id": el["participantItem"].id,
+                "recipient_phone_number": el["participantItem"].phone_number,
+                "job_info_id": el["job_id"],
+                "scheduled_at": el.get("scheduled_at"),
+                # JSON column (bound as text, see bulk_insert)
+                "template_vars": json.dumps(dict(el["participantItem"].vars)) if el["participantItem"].vars else None,
             }
-        )
+            for el in mass_messages_tb_participants
+        ),
+    )
 
+
+def insert_mass_message_batch(cur, batch_id: str, name: str, message: str, mode: str) -> None:
+    cur.execute(
+        text("""
+            INSERT INTO mass_message_batches (batch_id, name, message, mode)
+            VALUES (:batch_id, :name, :message, :mode)
+        """),
+        {"batch_id": batch_id, "name": name, "message": message, "mode": mode},
+    )
+
+
+def claim_unmaterialized_mass_messages(cur, mode: str, until: datetime) -> List[Any]:
+    """
+    Lock and return the mass_messages rows of `mode` batches that have no job yet
+    and are scheduled before `until`. Rows locked by a concurrent materializer are skipped.
+    """
+    return cur.execute(
+        text("""
+            SELECT m.batch_id, m.recipient_id, m.recipient_phone_number, m.scheduled_at, b.name
+            FROM mass_messages m
+            JOIN mass_message_batches b ON b.batch_id = m.batch_id
+            WHERE b.mode = :mode
+              AND m.job_info_id IS NULL
+              AND m.scheduled_at < :until
+            ORDER BY m.scheduled_at
+            FOR UPDATE OF m SKIP LOCKED
+        """),
+        {"mode": mode, "until": until},
+    ).fetchall()
+
+
+def set_mass_message_job_sql(cur, batch_id: str, recipient_id: str, job_id: str) -> None:
+    cur.execute(
+        text("""
+            UPDATE mass_messages SET job_info_id = :job_id
+            WHERE batch_id = :batch_id AND recipient_id = :recipient_id
+        """),
+        {"job_id": job_id, "batch_id": batch_id, "recipient_id": recipient_id},
+    )
+
+
+def set_mass_message_jobs_sql(cur, rows: List[Dict[str, Any]]) -> None:
+    """Set job_info_id of many rows at once; each row holds "batch_id", "recipient_id" and "job_info_id"."""
+    bulk_update(
+        cur,
+        "mass_messages",
+        key_columns=["batch_id", "recipient_id"],
+        value_columns=["job_info_id"],
+        rows=rows,
+    )
+
+
+def get_mass_message_template_vars(cur, batch_id: str, recipient_id: str) -> Optional[Dict[str, str]]:
+    return cur.execute(
+        text("SELECT template_vars FROM mass_messages WHERE batch_id = :batch_id AND recipient_id = :recipient_id"),
+        {"batch_id": batch_id, "recipient_id": recipient_id},
+    ).scalar()
+
+
+def set_mass_message_job_by_recipient_sql(cur, recipient_id: str, job_id: str) -> None:
+    """Point the recipient's row at a new job (used when a send continues in a later job)."""
+    cur.execute(
+        text("UPDATE mass_messages SET job_info_id = :job_id WHERE recipient_id = :recipient_id"),
+        {"job_id": job_id, "recipient_id": recipient_id},
+    )
+
+
+# --- Dispatcher mode ---
+
+def get_mass_message_batch(cur, batch_id: str) -> Optional[Any]:
+    return cur.execute(
+        text("SELECT batch_id, name, message, mode FROM mass_message_batches WHERE batch_id = :batch_id"),
+        {"batch_id": batch_id},
+    ).first()
+
+
+def claim_next_due_mass_message(cur, batch_id: str, now: datetime) -> Optional[Any]:
+    """
+    Claim the earliest unattempted row of the batch scheduled at or before `now`:
+    sets attempted_at and increments attempts. Rows locked by another dispatcher are skipped.
+    Returns (recipient_id, recipient_phone_number, scheduled_at, attempts, template_vars) or None.
+    """
+    return cur.execute(
+        text("""
+            UPDATE mass_messages m
+            SET attempted_at = now(), attempts = m.attempts + 1
+            FROM (
+                SELECT batch_id, recipient_id
+                FROM mass_messages
+                WHERE batch_id = :batch_id
+                  AND attempted_at IS NULL
+                  AND scheduled_at <= :now
+                ORDER BY scheduled_at
+                LIMIT 1
+                FOR UPDATE SKIP LOCKED
+            ) due
+            WHERE m.batch_id = due.batch_id AND m.recipient_id = due.recipient_id
+            RETURNING m.recipient_id, m.recipient_phone_number, m.scheduled_at, m.attempts, m.template_vars
+        """),
+        {"batch_id": batch_id, "now": now},
+    ).first()
+
+
+def get_next_mass_message_time(cur, batch_id: str) -> Optional[datetime]:
+    """scheduled_at of the earliest unattempted row of the batch, or None when nothing is left."""
+    return cur.execute(
+        text("""
+            SELECT min(scheduled_at) FROM mass_messages
+            WHERE batch_id = :batch_id AND attempted_at IS NULL
+        """),
+        {"batch_id": batch_id},
+    ).scalar()
+
+
+def lock_unattempted_mass_message_sql(cur, batch_id: str) -> bool:
+    """
+    Lock one unattempted row of the batch until the transaction ends; False if there is none.
+    While it's locked a running dispatcher can't claim it (SKIP LOCKED) but still sees it as its
+    next send, so it doesn't finish the batch.
+    """
+    row = cur.execute(
+        text("""
+            SELECT 1 FROM mass_messages
+            WHERE batch_id = :batch_id AND attempted_at IS NULL
+            LIMIT 1
+            FOR UPDATE
+        """),
+        {"batch_id": batch_id},
+    ).first()
+    return row is not None
+
+
+def has_active_job_sql(cur, batch_id: str, id_prefix: str) -> bool:
+    """True if a job of the batch whose id starts with `id_prefix` is PENDING or RUNNING."""
+    row = cur.execute(
+        text("""
+            SELECT 1 FROM job_information
+            WHERE batch_id = :batch_id
+              AND left(id, length(:prefix)) = :prefix
+              AND CAST(status AS TEXT) IN :active
+            LIMIT 1
+        """).bindparams(bindparam("active", expanding=True)),
+        {"batch_id": batch_id, "prefix": id_prefix, "active": [JOBSTATUS["PENDING"], JOBSTATUS["RUNNING"]]},
+    ).first()
+    return row is not None
+
+
+def release_mass_message_sql(cur, batch_id: str, recipient_id: str, retry_at: datetime, refund_attempt: bool) -> None:
+    """Put a claimed row back in the queue at `retry_at` (optionally not counting the attempt)."""
+    cur.execute(
+        text("""
+            UPDATE mass_messages
+            SET attempted_at = NULL, scheduled_at = :retry_at,
+                attempts = attempts - CASE WHEN :refund THEN 1 ELSE 0 END
+            WHERE batch_id = :batch_id AND recipient_id = :recipient_id
+        """),
+        {"batch_id": batch_id, "recipient_id": recipient_id, "retry_at": retry_at, "refund": refund_attempt},
+    )
+
+
+# --- Retrying failed recipients ---
+
+# Jobs in these states will never send their message
+JOB_ENDED_UNSENT_STATUSES = (JOBSTATUS["FAILURE"], JOBSTATUS["MISSED"], JOBSTATUS["DELETED"])
+
+
+def claim_failed_mass_messages(cur, batch_id: str) -> List[Any]:
+    """
+    Lock and return the batch's rows to send again: failed sends (success FALSE) and rows whose
+    job ended without sending (success NULL, job FAILURE/MISSED/DELETED).
+    Uses ix_mass_messages_batch_success; rows still waiting for their send are not returned.
+    """
+    return cur.execute(
+        text("""
+            SELECT m.recipient_id, m.recipient_phone_number, m.success
+            FROM mass_messages m
+            LEFT JOIN job_information j ON j.id = m.job_info_id
+            WHERE m.batch_id = :batch_id
+              AND (m.success IS FALSE
+                   OR (m.success IS NULL AND CAST(j.status AS TEXT) IN :ended))
+            ORDER BY m.scheduled_at
+            FOR UPDATE OF m
+        """).bindparams(bindparam("ended", expanding=True)),
+        {"batch_id": batch_id, "ended": list(JOB_ENDED_UNSENT_STATUSES)},
+    ).fetchall()
+
+
+def reset_mass_messages_for_retry_sql(cur, batch_id: str, rows: List[Dict[str, Any]]) -> None:
+    """
+    Put rows back into the plan: new scheduled_at / job_info_id (from `rows`, keyed by recipient_id),
+    no result and no attempts.
+    """
+    bulk_update(
+        cur,
+        "mass_messages",
+        key_columns=["batch_id", "recipient_id"],
+        value_columns=["scheduled_at", "job_info_id", "success", "fail_reason", "attempted_at", "attempts"],
+        rows=(
+            {**row, "batch_id": batch_id, "success": None, "fail_reason": None, "attempted_at": None, "attempts": 0}
+            for row in rows
+        ),
+        # every VALUES entry needs a type: most of them are NULL here
+        casts={
+            "scheduled_at": "timestamptz", "job_info_id": "varchar", "success": "boolean",
+            "fail_reason": "json", "attempted_at": "timestamptz", "attempts": "integer",
+        },
+    )
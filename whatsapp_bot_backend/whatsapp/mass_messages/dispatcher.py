@@ -0,0 +1,216 @@
+"""
+Dispatcher mode for mass messages: one logical job per batch instead of one job per recipient.
+
+The plan (recipient + reserved send time) lives in mass_messages. The batch's dispatcher job claims
+due rows one at a time (FOR UPDATE SKIP LOCKED, ordered by scheduled_at), sends them and records the
+result through mass_message_status_writer. Between sends it waits in-thread for the next scheduled_at; when the next send is
+far away (e.g. outside business hours) it reschedules itself as a continuation instead.
+
+A row is claimed (attempted_at set, committed) before it's sent, so a crash mid-send never sends
+twice: such rows stay attempted with success NULL.
+"""
+
+from datetime import datetime, timedelta
+import logging
+import threading
+import time
+
+from sqlalchemy import create_engine
+
+from db.connection_str import connection_main
+from db.get_cursor import get_cursor
+from shared.domain_errors import CircuitOpenError, EvolutionRetryLaterError, SendDeferredError
+from shared.timezone import TIMEZONE
+from job_and_listener.job.core.create.create_job import schedule_continuation
+from job_and_listener.job.models.job_model import Job, JobAction, JobMetadata, JobSchedule
+from job_and_listener.job_priority import PRIORITY_BULK
+from job_and_listener.scheduler_registry import get_running_scheduler
+from whatsapp.core.core import _phone_number
+from whatsapp.core.evo_request import evo_request_with_retries
+from whatsapp.core.retry_policy import JOB_CONTINUATION_RETRY_POLICY
+from whatsapp.mass_messages.db import (
+    claim_next_due_mass_message,
+    get_next_mass_message_time,
+    has_active_job_sql,
+    lock_unattempted_mass_message_sql,
+    release_mass_message_sql,
+)
+from whatsapp.mass_messages.status_writer import mass_message_status_writer
+from whatsapp.mass_messages.template import MessageTemplate, get_batch_template
+from whatsapp.mass_messages.suppression import content_hash
+from whatsapp.mass_messages.sender_pool import sender_pool
+
+
+# Longest wait for the next send inside the job's thread; longer gaps become a continuation
+DISPATCHER_MAX_IN_THREAD_WAIT = timedelta(minutes=2)
+
+# Shortest wait before looking for a due row again, e.g. when the earliest one is due but locked
+# by another dispatcher (a zero wait would spin)
+DISPATCHER_MIN_POLL_SECONDS = 1.0
+
+# A dispatcher that missed its run time (app was down) still runs - overdue rows are sent
+# at the planner's minimum gap, not all at once
+DISPATCHER_MISFIRE_GRACE_SECONDS = 24 * 60 * 60
+
+# Set on shutdown: running dispatchers reschedule themselves and return
+_stop = threading.Event()
+_active = set()
+_active_cond = threading.Condition()
+
+
+def dispatcher_job_id(batch_id: str) -> str:
+    return f"{batch_id}/dispatcher"
+
+
+def has_live_dispatcher(cur, batch_id: str) -> bool:
+    """
+    True if a dispatcher of the batch (or one of its continuations) will still send rows added in
+    this transaction: one is pending or running and the batch has rows left, one of which stays
+    locked until commit so that dispatcher can't run out of rows and finish before then.
+    """
+    return has_active_job_sql(cur, batch_id, dispatcher_job_id(batch_id)) and lock_unattempted_mass_message_sql(cur, batch_id)
+
+
+def build_mass_message_dispatcher_job(batch_id: str, first_run_time: datetime, id_suffix: str = "") -> Job:
+    """`id_suffix` tells apart later dispatchers of the same batch (e.g. for retried recipients)."""
+    return Job(
+        metadata=JobMetadata(id=dispatcher_job_id(batch_id) + id_suffix, description="mass message dispatcher", batch_id=batch_id),
+        action=JobAction(func=mass_messages_dispatcher_job, run_args={"batch_id": batch_id}),
+        schedule=JobSchedule(
+            run_time=first_run_time, coalesce=True, misfire_grace_time=DISPATCHER_MISFIRE_GRACE_SECONDS,
+            priority=PRIORITY_BULK,
+        ),
+    )
+
+
+def mass_messages_dispatcher_job(job_name, run_args, use_logging=True):
+    """
+    Send the batch's due messages in scheduled_at order until the batch is done, the next send is
+    more than DISPATCHER_MAX_IN_THREAD_WAIT away, or the app is shutting down.
+
+    Args:
+        job_name: APScheduler job name
+        run_args: dict containing:
+            - "batch_id": the mass-message batch
+            - "continuation": number of continuations so far (default 0)
+    """
+    log = logging.debug if use_logging else print
+    batch_id = run_args["batch_id"]
+
+    template = get_batch_template(batch_id)
+    if template is None:
+        log(f"{job_name}: batch {batch_id} no longer exists")
+        return
+
+    gap = sender_pool.slot_gap().total_seconds()
+    last_send = None  # monotonic
+    sent = 0
+
+    # one engine (and connection pool) for the whole run, not one per query
+    engine = create_engine(connection_main)
+
+    with _active_cond:
+        _active.add(job_name)
+
+    try:
+        while True:
+            now = datetime.now(TIMEZONE)
+
+            with get_cursor(engine) as cur:
+                row = claim_next_due_mass_message(cur, batch_id, now)
+
+            if row is None:
+                with get_cursor(engine) as cur:
+                    next_at = get_next_mass_message_time(cur, batch_id)
+
+                if next_at is None:
+                    log(f"{job_name}: batch done ({sent} sent in this run)")
+                    return
+
+                wait = (next_at - now).total_seconds()
+                if _stop.is_set() or wait > DISPATCHER_MAX_IN_THREAD_WAIT.total_seconds():
+                    _continue_later(job_name, run_args, max(wait, 1.0), f"next send at {next_at}")
+                    log(f"{job_name}: next send at {next_at}, continuing later ({sent} sent in this run)")
+                    return
+
+                _stop.wait(max(wait, DISPATCHER_MIN_POLL_SECONDS))
+                continue
+
+            # Overdue rows (late start, retries) still respect the global minimum gap
+            if last_send is not None:
+                _stop.wait(max(0.0, gap - (time.monotonic() - last_send)))
+
+            _send_claimed(engine, batch_id, template, row, log)
+            last_send = time.monotonic()
+            sent += 1
+
+            if _stop.is_set():
+                _continue_later(job_name, run_args, 1.0, "shutting down")
+                return
+    finally:
+        engine.dispose()
+        with _active_cond:
+            _active.discard(job_name)
+            _active_cond.notify_all()
+
+
+def _send_claimed(engine, batch_id: str, template: MessageTemplate, row, log) -> None:
+    try:
+        message_text = template.render(row.recipient_id, row.recipient_phone_number, row.template_vars)
+        resp = evo_request_with_retries(
+            "message/sendText",
+            {
+                "number": _phone_number(row.recipient_phone_number),
+                "text": message_text,
+                "delay": 50000,  # some delay required by API
+            },
+            policy=JOB_CONTINUATION_RETRY_POLICY,
+            attempt=row.attempts,
+            instance=sender_pool.acquire(),
+        )
+        if not resp.ok:
+            raise Exception(f"HTTP {resp.status_code}: {resp.text}")
+
+        mass_message_status_writer.record(
+            batch_id, row.recipient_id, True,
+            phone_number=_phone_number(row.recipient_phone_number), content_hash=content_hash(message_text),
+        )
+
+    except EvolutionRetryLaterError as e:
+        # Back in the queue; an open circuit or a held-back send (nothing sent) doesn't count as an attempt
+        retry_at = datetime.now(TIMEZONE) + timedelta(seconds=e.retry_after)
+        refund_attempt = isinstance(e, (CircuitOpenError, SendDeferredError))
+        with get_cursor(engine) as cur:
+            release_mass_message_sql(cur, batch_id, row.recipient_id, retry_at, refund_attempt=refund_attempt)
+        log(f"{batch_id}/{row.recipient_id}: {e}. Retrying at {retry_at}")
+
+    except Exception as e:
+        mass_message_status_writer.record(batch_id, row.recipient_id, False, str(e))
+
+
+def _continue_later(job_name: str, run_args: dict, delay: float, reason: str) -> None:
+    continuation = run_args.get("continuation", 0) + 1
+    with get_cursor() as cur:
+        schedule_continuation(
+            cur,
+            get_running_scheduler(),
+            job_name,
+            mass_messages_dispatcher_job,
+            {**run_args, "continuation": continuation},
+            delay=delay,
+            n=continuation,
+            misfire_grace_time=DISPATCHER_MISFIRE_GRACE_SECONDS,
+            priority=PRIORITY_BULK,
+            reason=reason,
+        )
+
+
+def stop_mass_message_dispatchers(timeout: float = 150) -> None:
+    """
+    Ask running dispatchers to reschedule themselves and return, and wait for them
+    (at most `timeout` seconds - an in-flight send can take up to READ_TIMEOUT).
+    Call before shutting the scheduler down, so their continuations are persisted.
+    """
+    _stop.set()
+    with _active_cond:
+        _active_cond.wait_for(lambda: not _active, timeout=timeout)
@@ -1,6 +1,6 @@
 from datetime import datetime, timedelta
 import logging
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 from zoneinfo import ZoneInfo
 
 
@@ -12,27 +12,56 @@ from sqlalchemy import text
 
 # Project-specific imports
 from shared.timezone import TIMEZONE
+from shared.domain_errors import CircuitOpenError, EvolutionRetryLaterError, MessageTemplateError, SendDeferredError
 from db.get_cursor import get_cursor
 
 # WhatsApp core
 from whatsapp.core.evo_request import evo_request_with_retries
+from whatsapp.core.retry_policy import JOB_CONTINUATION_RETRY_POLICY
 from whatsapp.core.core import _phone_number
-from whatsapp.whatsapp_group.core.compute_spread_times import compute_spread_times
+from whatsapp.core.business_calendar import get_business_calendar
+from whatsapp.send_slots.planner import SLOT_POOL_BULK, reserve_next_slots
 
 # Job and listener
-from job_and_listener.job.core.create.create_job import create_job
+from job_and_listener.job.core.create.create_job import create_jobs_bulk, schedule_continuation
+from job_and_listener.scheduler_registry import get_running_scheduler
 from job_and_listener.job.models.job_model import JobMetadata, JobAction, JobSchedule, Job
+from job_and_listener.job_priority import PRIORITY_BULK
 from api.base_models import ParticipantItem, SendMassMessagesRequestModel
 from job_and_listener.job_batch.core import create_job_batch
-from whatsapp.mass_messages.db import insert_to_mass_messages_sql
+from job_and_listener.job_batch.stats import add_batch_counts_sql
+from whatsapp.mass_messages.dispatcher import build_mass_message_dispatcher_job, has_live_dispatcher
+from whatsapp.mass_messages.db import (
+    claim_failed_mass_messages,
+    get_mass_message_batch,
+    get_mass_message_template_vars,
+    insert_mass_message_batch,
+    reset_mass_messages_for_retry_sql,
+    insert_to_mass_messages_sql,
+    set_mass_message_job_by_recipient_sql,
+    set_mass_message_job_sql,
+)
+from whatsapp.mass_messages.status_writer import mass_message_status_writer
+from whatsapp.mass_messages.template import compile_template, get_batch_template
+from whatsapp.mass_messages.suppression import RecipientFilter, content_hash
+from whatsapp.mass_messages.sender_pool import sender_pool
 
 
 SEND_MASS_MESSAGES_BATCH_ID = "send_mass_messages_batch"
+
+# Default spacing between two messages of the same batch
+MASS_MESSAGES_MIN_DIFF = timedelta(minutes=1, seconds=30)
+
+# Batch modes (see mass_message_batches.mode)
+MASS_MESSAGES_MODE_PER_RECIPIENT = "per_recipient"
+MASS_MESSAGES_MODE_ROLLING = "rolling"
+MASS_MESSAGES_MODE_DISPATCHER = "dispatcher"
    
 # --- Define callbacks ---
 def mark_message_success_in_sql(cur, recipient_id: str):
     """
     Marks a message as successfully sent in the mass_messages table.
+    Only for jobs created before run_args carried batch_id; see mass_message_status_writer.
     """
     cur.execute(
         text("UPDATE mass_messages SET success = TRUE WHERE recipient_id = :recipient_id"),
@@ -43,6 +72,7 @@ def mark_message_success_in_sql(cur, recipient_id: str):
 def mark_message_failure_in_sql(cur, recipient_id: str, reason: str):
     """
     Marks a message as failed in the mass_messages table and records the failure reason.
+    Only for jobs created before run_args carried batch_id; see mass_message_status_writer.
     """
     cur.execute(
         text("""
@@ -52,131 +82,326 @@ def mark_message_failure_in_sql(cur, recipient_id: str, reason: str):
         """),
         {"recipient_id": recipient_id, "reason": reason}
     )
-   
-   
+
+
+
+def _job_message_text(cur, run_args) -> str:
+    """
+    The text to send: the batch's message rendered for the recipient.
+    Jobs created by older versions carry the text itself in run_args["message"].
+    """
+    if "message" in run_args:
+        return run_args["message"]
+
+    template = get_batch_template(run_args["batch_id"])
+    if template is None:
+        raise Exception(f"Mass message batch {run_args['batch_id']} no longer exists")
+
+    template_vars = (
+        get_mass_message_template_vars(cur, run_args["batch_id"], run_args["recipient_id"])
+        if template.needs_vars else None
+    )
+    return template.render(run_args["recipient_id"], run_args["recipient_phone_number"], template_vars)
    
    
 def mass_messages_job(job_name, run_args, use_logging=True):
     """
-    Job that sends a WhatsApp message and records success/failure in the database.
+    Job that sends a WhatsApp message and records success/failure in the database
+    (through mass_message_status_writer, batched with other jobs' results).
+
+    Retryable Evolution failures (connection errors, 429/5xx gateway responses) don't block the
+    executor thread: the job reschedules itself as a delayed continuation
+    (JOB_CONTINUATION_RETRY_POLICY) and the recipient's row points at the new job.
+    While the Evolution circuit breaker is open, or the send is held back by the lane's send rate
+    or the sender pool (SendDeferredError), the job defers the same way, without using up an attempt.
 
     Args:
         job_name: APScheduler job name (not used here, but passed by scheduler)
         run_args: dict containing:
-            - "message": the text to send
+            - "batch_id" : mass-message batch, whose message template is rendered for the recipient
             - "recipient_phone_number": recipient phone number
             - "recipient_id" : recipient id 
+            - "message": the text to send (only in jobs created by older versions, instead of batch_id)
+            - "attempt" : attempt number, set on continuations (default 1)
+            - "continuation" : number of continuations so far, set on continuations (default 0)
             
     """
     with get_cursor() as cur:
         
-        logging.debug if use_logging else print
+        log = logging.debug if use_logging else print
+        attempt = run_args.get("attempt", 1)
+        batch_id = run_args.get("batch_id")
         
         try:
-            # Send the message via the API
+            message_text = _job_message_text(cur, run_args)
+
+            # Send the message via the API, through the next instance of the pool
             resp = evo_request_with_retries(
                 "message/sendText",
                 {
                     "number": _phone_number(run_args["recipient_phone_number"]),
-                    "text": run_args["message"],
+                    "text": message_text,
                     "delay": 50000,  # some delay required by API
                 },
+                policy=JOB_CONTINUATION_RETRY_POLICY,
+                attempt=attempt,
+                instance=sender_pool.acquire(),
             )
             # If the response is not OK, raise an exception
             if not resp.ok: 
                 raise Exception(f"HTTP {resp.status_code}: {resp.text}")
 
-            mark_message_success_in_sql(cur, run_args["recipient_id"])
+            if batch_id is not None:
+                mass_message_status_writer.record(
+                    batch_id, run_args["recipient_id"], True,
+                    phone_number=_phone_number(run_args["recipient_phone_number"]), content_hash=content_hash(message_text),
+                )
+            else:
+                mark_message_success_in_sql(cur, run_args["recipient_id"])
+
+        except EvolutionRetryLaterError as e:
+            # Nothing was sent: the attempt isn't used up
+            next_attempt = attempt if isinstance(e, (CircuitOpenError, SendDeferredError)) else attempt + 1
+            continuation = run_args.get("continuation", 0) + 1
+
+            continuation_id = schedule_continuation(
+                cur,
+                get_running_scheduler(),
+                job_name,
+                mass_messages_job,
+                {**run_args, "attempt": next_attempt, "continuation": continuation},
+                delay=e.retry_after,
+                n=continuation,
+                priority=PRIORITY_BULK,
+                reason=str(e),
+            )
+            if batch_id is not None:
+                set_mass_message_job_sql(cur, batch_id, run_args["recipient_id"], continuation_id)
+            else:
+                set_mass_message_job_by_recipient_sql(cur, run_args["recipient_id"], continuation_id)
+            log(f"{job_name}: {e}. Continuing as {continuation_id}")
             
         except Exception as e:
             
-            mark_message_failure_in_sql(cur, run_args["recipient_id"], str(e))
+            if batch_id is not None:
+                mass_message_status_writer.record(batch_id, run_args["recipient_id"], False, str(e))
+            else:
+                mark_message_failure_in_sql(cur, run_args["recipient_id"], str(e))
 
             
 
     
+def build_mass_message_job(
+    batch_id: str,
+    name: str,
+    recipient_id: str,
+    recipient_phone_number: str,
+    run_time: datetime,
+    id_suffix: str = "",
+) -> Job:
+    """
+    Create the Job that sends the batch's message to one recipient at `run_time`.
+    Only the batch_id is stored, not the message: it's read from mass_message_batches at send time.
+    `id_suffix` tells apart later jobs for the same recipient (e.g. retries of failed sends).
+    """
+    return Job(
+        metadata=JobMetadata(
+            id=f"send_message_to_{recipient_phone_number}_{name}{id_suffix}",
+            description="",
+            batch_id=batch_id,
+        ),
+        action=JobAction(
+            func=mass_messages_job,
+            run_args={"batch_id" : batch_id, "recipient_phone_number" : recipient_phone_number,
+                      "recipient_id" : recipient_id }
+        ),
+        schedule=JobSchedule(
+            run_time=run_time,
+            coalesce=True,
+            misfire_grace_time=1,
+            priority=PRIORITY_BULK,
+        )
+    )
+
+
+def reserve_mass_message_times(
+    cur,
+    batch_id: str,
+    runs: int,
+    *,
+    start: datetime | None = None,
+    min_diff: timedelta = MASS_MESSAGES_MIN_DIFF,
+) -> List[datetime]:
+    """
+    Reserve send times for a batch from the global send-rate planner,
+    so concurrent batches don't collide. The budget and `min_diff` are per sending instance
+    (see SenderPool.slot_gap / batch_spacing).
+    """
+    # Default start: 30 seconds from now in configured timezone.
+    if start is None:
+        start = datetime.now(tz=TIMEZONE) + timedelta(seconds=30)
+
+    return reserve_next_slots(
+        cur, batch_id, runs, start, sender_pool.batch_spacing(min_diff), gap=sender_pool.slot_gap(), pool=SLOT_POOL_BULK
+    )
+
+    
 def get_mass_message_jobs(
+    cur,
     participants: List[ParticipantItem],
-    message: str,
     name: str,
     batch_id: str,
     *,
     start: datetime | None = None,
-    min_diff: timedelta = timedelta(minutes=1, seconds=30),
+    min_diff: timedelta = MASS_MESSAGES_MIN_DIFF,
 ) :
     """
     Create Job objects for sending mass messages.
     Only the job_id and run_args vary per number; everything else is shared.
+    Run times are reserved from the global send-rate planner so concurrent batches don't collide.
     """
+    run_times = reserve_mass_message_times(cur, batch_id, len(participants), start=start, min_diff=min_diff)
 
-    # Default start: 30 seconds from now in configured timezone.
-    if start is None:
-        start = datetime.now(tz=TIMEZONE) + timedelta(seconds=30)
-        
-    run_times = compute_spread_times(start, min_diff=min_diff, runs=len(participants))
-    
-            
-    job_specifics = [ { "job_id" : f"send_message_to_{p.phone_number}_{name}", "recipient_phone_number" : p.phone_number,
-                       "recipient_id" : p.id, "run_time" : run_time }
-                     for p, run_time in zip(participants, run_times) ] 
-                   
-    jobs =  [
-             Job(
-            metadata=JobMetadata(
-                id=specific["job_id"],
-                description="",
-                batch_id=batch_id,
-            ),
-            action=JobAction(
-                func=mass_messages_job,
-                run_args={"message" : message, "recipient_phone_number" : specific["recipient_phone_number"],
-                          "recipient_id" : specific["recipient_id"]  }
-            ),
-            schedule=JobSchedule(
-                run_time=specific["run_time"],
-                coalesce=True,
-                misfire_grace_time=1,
-            )
-             ) for specific in job_specifics
-             ]
+    return [
+        build_mass_message_job(batch_id, name, p.id, p.phone_number, run_time)
+        for p, run_time in zip(participants, run_times)
+    ]
 
-    return jobs
 
+def start_mass_message_batch(cur, name: str, message: str, mode: str) -> str:
+    """Create the job batch and its mass_message_batches row. Returns the batch id."""
+    batch_id = f"{SEND_MASS_MESSAGES_BATCH_ID}/{name}/{datetime.now(tz=TIMEZONE).strftime('%Y%m%d_%H%M%S')}"
 
+    create_job_batch(batch_id, cur)
+    insert_mass_message_batch(cur, batch_id, name, message, mode)
+    return batch_id
 
 
-        
-        
+def next_mass_message_start(last_run_time: datetime, min_diff: timedelta = MASS_MESSAGES_MIN_DIFF) -> datetime:
+    """
+    Where the next chunk of a batch starts reserving: after its last slot, by the same spacing as
+    between two slots of one chunk (see reserve_mass_message_times), so chunking doesn't slow the batch.
+    """
+    spacing = sender_pool.batch_spacing(min_diff)
+    return get_business_calendar().add_business_seconds(last_run_time, spacing.total_seconds())
 
-def send_mass_messages_core(sched, cur, req: SendMassMessagesRequestModel):
-    # Generate batch ID
-    batch_id = f"{SEND_MASS_MESSAGES_BATCH_ID}/{req.name}/{datetime.now(tz=TIMEZONE).strftime('%Y%m%d_%H%M%S')}" 
 
-    # Create batch in DB
-    create_job_batch(batch_id, cur)
-    
-    
+def add_mass_message_recipients(
+    sched,
+    cur,
+    batch_id: str,
+    name: str,
+    message: str,
+    mode: str,
+    participants: List[ParticipantItem],
+    *,
+    start: datetime | None = None,
+    first_chunk: bool = True,
+) -> List[datetime]:
+    """
+    Plan/schedule `participants` (one chunk of the batch's recipients) according to `mode`,
+    reserving their send slots from `start` on. Returns the reserved send times.
 
-    # Create jobs
-    jobs = get_mass_message_jobs(
-        req.participants,
-        req.message,
-        req.name,
-        batch_id=batch_id
-    )
-    
-    #Create jobs 
-    for job in jobs:
-        create_job(cur, sched, job)
-        
-    mass_messages_tb_participants = [ {"participantItem" : participant, 
-                    "job_id" : job.metadata.id} for participant, job in zip(req.participants, jobs) ]
-    
+    A batch may be fed in several chunks (see whatsapp.mass_messages.upload): pass
+    start=next_mass_message_start(last time of the previous chunk) and first_chunk=False
+    for every chunk but the first.
+    """
+    if not participants:
+        return []
+
+    # Every placeholder must have a value for every recipient, before anything is scheduled
+    template = compile_template(message)
+    for participant in participants:
+        missing = template.missing_fields(participant.vars)
+        if missing:
+            raise MessageTemplateError(f"Recipient {participant.id} has no value for placeholder(s) {sorted(missing)}")
+
+    if mode in (MASS_MESSAGES_MODE_ROLLING, MASS_MESSAGES_MODE_DISPATCHER):
+        run_times = reserve_mass_message_times(cur, batch_id, len(participants), start=start)
+
+        # Store only the plan: jobs come from the materializer / the batch's dispatcher job
+        insert_to_mass_messages_sql(cur, batch_id, [
+            {"participantItem": participant, "job_id": None, "scheduled_at": run_time}
+            for participant, run_time in zip(participants, run_times)
+        ])
+
+        # Later chunks are scheduled after the first one, so the dispatcher only starts once.
+        # Written through `cur` (not the jobstore's own connection), so a failed upload rolls it back too.
+        if mode == MASS_MESSAGES_MODE_DISPATCHER and first_chunk:
+            create_jobs_bulk(cur, sched, [build_mass_message_dispatcher_job(batch_id, run_times[0])])
+        return run_times
+
+    jobs = get_mass_message_jobs(cur, participants, name, batch_id=batch_id, start=start)
+
+    #Create jobs (one transaction for all of them)
+    create_jobs_bulk(cur, sched, jobs)
 
     # Insert participants with job references
-    insert_to_mass_messages_sql(cur, batch_id, mass_messages_tb_participants)
+    insert_to_mass_messages_sql(cur, batch_id, [
+        {"participantItem": participant, "job_id": job.metadata.id, "scheduled_at": job.schedule.run_time}
+        for participant, job in zip(participants, jobs)
+    ])
+    return [job.schedule.run_time for job in jobs]
 
-    
 
+def send_mass_messages_core(sched, cur, req: SendMassMessagesRequestModel) -> Dict[str, Any]:
+    """Returns the batch_id, the number of recipients scheduled and those skipped (see RecipientFilter)."""
+    suppress_within = timedelta(hours=req.suppress_within_hours) if req.suppress_within_hours else None
+    recipient_filter = RecipientFilter(req.message, suppress_within)
+    participants = recipient_filter.filter(cur, req.participants)
+
+    batch_id = start_mass_message_batch(cur, req.name, req.message, req.mode)
+    add_mass_message_recipients(sched, cur, batch_id, req.name, req.message, req.mode, participants)
+    return {"batch_id": batch_id, "recipients": len(participants), **recipient_filter.report()}
+
+
+def retry_failed_mass_messages_core(sched, cur, batch_id: str) -> Optional[List[datetime]]:
+    """
+    Send the batch's message again to its failed / never-sent recipients only (see
+    claim_failed_mass_messages), at fresh send slots from the global planner, the way the
+    batch's mode sends:
+      - per_recipient: a new job per recipient ("<job id>/resend_<timestamp>")
+      - rolling: the rows go back to the plan, the materializer creates their jobs
+      - dispatcher: the rows go back to the plan and a new dispatcher job sends them (unless
+        one is still pending or running, see has_live_dispatcher)
+
+    Returns the reserved send times ([] if there was nothing to retry), or None if the batch
+    doesn't exist (or predates mass_message_batches).
+    """
+    batch = get_mass_message_batch(cur, batch_id)
+    if batch is None:
+        return None
+
+    # Results still buffered in memory must be in the table before choosing the rows
+    mass_message_status_writer.flush()
+
+    rows = claim_failed_mass_messages(cur, batch_id)
+    if not rows:
+        return []
+
+    # A dispatcher still working through the batch picks the retried rows up as well
+    dispatcher_live = batch.mode == MASS_MESSAGES_MODE_DISPATCHER and has_live_dispatcher(cur, batch_id)
+
+    run_times = reserve_mass_message_times(cur, batch_id, len(rows))
+    id_suffix = f"/resend_{datetime.now(tz=TIMEZONE).strftime('%Y%m%d_%H%M%S')}"
+
+    job_ids = [None] * len(rows)
+    if batch.mode == MASS_MESSAGES_MODE_PER_RECIPIENT:
+        jobs = [
+            build_mass_message_job(batch_id, batch.name, row.recipient_id, row.recipient_phone_number, run_time, id_suffix)
+            for row, run_time in zip(rows, run_times)
+        ]
+        create_jobs_bulk(cur, sched, jobs)
+        job_ids = [job.metadata.id for job in jobs]
+
+    reset_mass_messages_for_retry_sql(cur, batch_id, [
+        {"recipient_id": row.recipient_id, "scheduled_at": run_time, "job_info_id": job_id}
+        for row, run_time, job_id in zip(rows, run_times, job_ids)
+    ])
 
+    if batch.mode == MASS_MESSAGES_MODE_DISPATCHER and not dispatcher_live:
+        create_jobs_bulk(cur, sched, [build_mass_message_dispatcher_job(batch_id, run_times[0], id_suffix)])
 
+    # Failed rows are pending again
+    add_batch_counts_sql(cur, batch_id, {"messages_failed": -sum(1 for row in rows if row.success is False)})
+    return run_times
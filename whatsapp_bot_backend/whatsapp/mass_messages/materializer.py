@@ -0,0 +1,67 @@
+"""
+Rolling-horizon materialization of mass messages.
+
+Batches in "rolling" mode only store their plan (recipients + send times) in mass_messages.
+This periodic job turns the rows due within the next MATERIALIZE_WINDOW into real scheduler
+jobs, so the jobstore holds at most one window of jobs no matter how big or long the send is.
+"""
+
+from datetime import datetime, timedelta
+import logging
+
+from apscheduler.schedulers.background import BackgroundScheduler
+
+from db.get_cursor import get_cursor
+from shared.timezone import TIMEZONE
+from job_and_listener.job.core.create.create_job import add_internal_interval_job, create_jobs_bulk
+from whatsapp.mass_messages.db import claim_unmaterialized_mass_messages, set_mass_message_jobs_sql
+from whatsapp.mass_messages.mass_messages import MASS_MESSAGES_MODE_ROLLING, build_mass_message_job
+
+
+# Jobs are created for messages scheduled within this window from now
+MATERIALIZE_WINDOW = timedelta(minutes=30)
+
+# How often the materializer runs (must be well below MATERIALIZE_WINDOW)
+MATERIALIZE_INTERVAL_SECONDS = 60
+
+MATERIALIZER_JOB_ID = "internal/materialize_mass_messages"
+
+
+def materialize_due_mass_messages(sched: BackgroundScheduler, window: timedelta = MATERIALIZE_WINDOW, use_logging=True) -> int:
+    """
+    Create scheduler jobs for rolling-mode messages due before now + `window`.
+    Returns the number of jobs created.
+    """
+    log = logging.debug if use_logging else print
+
+    until = datetime.now(TIMEZONE) + window
+
+    with get_cursor() as cur:
+        rows = claim_unmaterialized_mass_messages(cur, MASS_MESSAGES_MODE_ROLLING, until)
+
+        jobs = [
+            build_mass_message_job(
+                row.batch_id, row.name, row.recipient_id, row.recipient_phone_number, row.scheduled_at
+            )
+            for row in rows
+        ]
+        create_jobs_bulk(cur, sched, jobs)
+
+        set_mass_message_jobs_sql(cur, [
+            {"batch_id": row.batch_id, "recipient_id": row.recipient_id, "job_info_id": job.metadata.id}
+            for row, job in zip(rows, jobs)
+        ])
+
+    if rows:
+        log(f"Materialized {len(rows)} mass message jobs due before {until}")
+    return len(rows)
+
+
+def setup_mass_messages_materializer(sched: BackgroundScheduler) -> None:
+    add_internal_interval_job(
+        sched,
+        materialize_due_mass_messages,
+        seconds=MATERIALIZE_INTERVAL_SECONDS,
+        job_id=MATERIALIZER_JOB_ID,
+        args=[sched],
+    )
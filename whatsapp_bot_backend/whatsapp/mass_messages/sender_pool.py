@@ -0,0 +1,112 @@
+"""
+Pool of the instances mass messages are sent through (see whatsapp.core.instances).
+
+Every send asks the pool for an instance: the next one in smooth weighted round-robin order
+(as in nginx: over any window, each instance gets its weight's share of the picks, evenly
+interleaved) among the instances that are connected (cached state of their connection monitor)
+and have a token left in their own send budget (a token bucket at the stricter of the instance's
+messages_per_minute and messages_per_hour). An instance that is down or over budget is skipped
+and the others take its share, so weights set the split but never push a number past its budget.
+
+Send slots are reserved at the combined budget of all sending instances (`slot_gap`) and the
+per-batch spacing is divided between them (`batch_spacing`), so aggregate throughput grows with
+the number of instances while each number stays within its own budget.
+"""
+
+import threading
+from collections import Counter
+from datetime import timedelta
+from typing import Dict, List
+
+from shared.domain_errors import SendDeferredError
+from whatsapp.core.instances import WhatsappInstance, get_sending_instances
+from whatsapp.core.lane_rate_limit import TokenBucket
+from whatsapp.core.whatsapp_connection import CONNECTION_POLL_INTERVAL_SECONDS, instance_monitor
+from whatsapp.send_slots.planner import min_slot_gap
+
+
+# Sends an instance may burst above its per-minute rate after being idle
+INSTANCE_BURST = 2
+
+
+class SenderPool:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._current: Dict[str, float] = {}        # smooth WRR state: instance -> current weight
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._picks = Counter()
+        self._skipped = Counter()                    # instance -> times it was over budget when its turn came
+
+    def slot_gap(self) -> timedelta:
+        """Minimum gap between mass-message send slots: the combined budget of the sending instances."""
+        instances = get_sending_instances()
+        return min_slot_gap(
+            sum(instance.messages_per_minute for instance in instances),
+            sum(instance.messages_per_hour for instance in instances),
+        )
+
+    def batch_spacing(self, min_diff: timedelta) -> timedelta:
+        """Spacing between two messages of one batch, for `min_diff` per number."""
+        return min_diff / max(1, len(get_sending_instances()))
+
+    def _bucket(self, instance: WhatsappInstance) -> TokenBucket:
+        rate = instance.sends_per_minute / 60
+        bucket = self._buckets.get(instance.name)
+        if bucket is None or bucket.rate != rate:
+            bucket = self._buckets[instance.name] = TokenBucket(rate=rate, capacity=INSTANCE_BURST)
+        return bucket
+
+    def acquire(self) -> str:
+        """
+        Name of the instance the next message goes through (one token of its budget taken).
+
+        Raises:
+            SendDeferredError: if no sending instance is connected (retry after the next
+                connection poll), or every connected one is out of budget (retry_after = soonest token)
+        """
+        instances = [instance for instance in get_sending_instances() if instance_monitor(instance.name).is_connected()]
+        if not instances:
+            raise SendDeferredError(
+                "No connected WhatsApp instance to send mass messages through",
+                retry_after=CONNECTION_POLL_INTERVAL_SECONDS,
+            )
+
+        with self._lock:
+            total = sum(instance.weight for instance in instances)
+            for instance in instances:
+                self._current[instance.name] = self._current.get(instance.name, 0) + instance.weight
+
+            waits = []
+            for instance in sorted(instances, key=lambda i: self._current[i.name], reverse=True):
+                wait = self._bucket(instance).take()
+                if wait == 0:
+                    self._current[instance.name] -= total
+                    self._picks[instance.name] += 1
+                    return instance.name
+                self._skipped[instance.name] += 1
+                waits.append(wait)
+
+            # nobody was picked: undo this round
+            for instance in instances:
+                self._current[instance.name] -= instance.weight
+
+        raise SendDeferredError("Every connected WhatsApp instance is out of its send budget", retry_after=min(waits))
+
+    def snapshot(self) -> List[Dict]:
+        with self._lock:
+            picks, skipped = dict(self._picks), dict(self._skipped)
+            buckets = dict(self._buckets)
+        return [
+            {
+                "instance": instance.name,
+                "weight": instance.weight,
+                "connected": instance_monitor(instance.name).cached()[0] == "connected",
+                "sent": picks.get(instance.name, 0),
+                "over_budget": skipped.get(instance.name, 0),
+                "tokens": round(buckets[instance.name].available(), 2) if instance.name in buckets else None,
+            }
+            for instance in get_sending_instances()
+        ]
+
+
+sender_pool = SenderPool()
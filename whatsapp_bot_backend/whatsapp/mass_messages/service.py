@@ -1,13 +1,25 @@
 from api.base_models import SendMassMessagesRequestModel
 from whatsapp.core.whatsapp_connection import validate_whatsapp_connection
-from whatsapp.mass_messages.mass_messages import send_mass_messages_core
+from whatsapp.mass_messages.mass_messages import retry_failed_mass_messages_core, send_mass_messages_core
 
 
 def send_mass_messages_service(
     sched, cur, payload: SendMassMessagesRequestModel
 ):
     validate_whatsapp_connection()
-    send_mass_messages_core(sched, cur, payload)
-    return {"message": "Mass messages scheduling initiated."}
+    result = send_mass_messages_core(sched, cur, payload)
+    return {"message": "Mass messages scheduling initiated.", **result}
 
 
+def retry_failed_mass_messages_service(sched, cur, batch_id: str):
+    validate_whatsapp_connection()
+    run_times = retry_failed_mass_messages_core(sched, cur, batch_id)
+    if run_times is None:
+        return {"message": f"Mass message batch {batch_id} not found.", "retried": 0}
+    return {
+        "message": f"Retrying {len(run_times)} recipients." if run_times else "No failed recipients to retry.",
+        "batch_id": batch_id,
+        "retried": len(run_times),
+        "first_send_at": run_times[0] if run_times else None,
+        "last_send_at": run_times[-1] if run_times else None,
+    }
@@ -0,0 +1,156 @@
+"""
+Buffered writer for mass-message results (mass_messages.success / fail_reason).
+
+Send jobs record their outcome here instead of updating mass_messages themselves. Outcomes are
+keyed by (batch_id, recipient_id), the table's primary key, so an update only touches that
+batch's row. The buffer is written as one `UPDATE ... FROM (VALUES ...)` (which also moves the
+batch's sent/failed progress counters, see job_and_listener.job_batch.stats) every
+STATUS_FLUSH_INTERVAL_SECONDS (internal job), as soon as STATUS_FLUSH_EVERY results are pending,
+and on shutdown. Successful sends are also added to recent_sends (see whatsapp.mass_messages.suppression)
+in the same transaction.
+
+Results recorded in the last few seconds before a crash are lost; their rows keep success NULL,
+the same as a send that never finished.
+"""
+
+import json
+import logging
+import threading
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from apscheduler.schedulers.background import BackgroundScheduler
+
+from db.bulk import bulk_insert, bulk_update
+from db.get_cursor import get_cursor
+from job_and_listener.job.core.create.create_job import add_internal_interval_job
+from job_and_listener.job_batch.stats import add_batch_counts_sql, add_batch_minute_counts_sql
+from shared.timezone import TIMEZONE
+
+
+# Pending results that trigger a flush from the recording thread
+STATUS_FLUSH_EVERY = 200
+
+# Periodic flush of whatever is pending
+STATUS_FLUSH_INTERVAL_SECONDS = 2
+
+STATUS_WRITER_JOB_ID = "internal/flush_mass_message_statuses"
+
+
+class MassMessageStatusWriter:
+    """Thread-safe buffer of (batch_id, recipient_id) -> (success, fail_reason); the last result recorded wins."""
+
+    def __init__(self, flush_every: int = STATUS_FLUSH_EVERY):
+        self.flush_every = flush_every
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # one flush at a time, so results are written in order
+        self._pending: Dict[Tuple[str, str], Tuple[bool, Optional[str]]] = {}
+        self._sent: List[Dict[str, Any]] = []  # recent_sends rows
+        self._stats = {"recorded": 0, "flushes": 0, "rows_written": 0, "flush_errors": 0}
+
+    def record(
+        self,
+        batch_id: str,
+        recipient_id: str,
+        success: bool,
+        reason: Optional[str] = None,
+        phone_number: Optional[str] = None,
+        content_hash: Optional[str] = None,
+    ) -> None:
+        """`phone_number` / `content_hash` of a successful send go to recent_sends."""
+        # fail_reason is a JSON column
+        fail_reason = json.dumps(reason) if reason is not None else None
+        with self._lock:
+            self._pending[(batch_id, recipient_id)] = (success, fail_reason)
+            if success and phone_number and content_hash:
+                self._sent.append({"phone_number": phone_number, "content_hash": content_hash, "sent_at": datetime.now(TIMEZONE)})
+            self._stats["recorded"] += 1
+            full = len(self._pending) >= self.flush_every
+
+        if full:
+            self.flush()
+
+    def flush(self, use_logging=True) -> int:
+        """
+        Write every pending result. Returns the number of rows sent to the database.
+        On a database error the results go back into the buffer (unless newer ones were recorded
+        meanwhile) for the next flush.
+        """
+        log = logging.debug if use_logging else print
+
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                sent, self._sent = self._sent, []
+            if not pending:
+                return 0
+
+            rows = [
+                {"batch_id": batch_id, "recipient_id": recipient_id, "success": success, "fail_reason": fail_reason}
+                for (batch_id, recipient_id), (success, fail_reason) in pending.items()
+            ]
+
+            try:
+                with get_cursor() as cur:
+                    updated = bulk_update(
+                        cur,
+                        "mass_messages",
+                        key_columns=["batch_id", "recipient_id"],
+                        value_columns=["success", "fail_reason"],
+                        rows=rows,
+                        casts={"success": "boolean", "fail_reason": "json"},
+                        returning_previous=["success"],
+                    )
+                    _count_results(cur, updated, pending)
+                    bulk_insert(cur, "recent_sends", ["phone_number", "content_hash", "sent_at"], sent)
+            except Exception as e:
+                with self._lock:
+                    for key, value in pending.items():
+                        self._pending.setdefault(key, value)
+                    self._sent = sent + self._sent
+                    self._stats["flush_errors"] += 1
+                log(f"Failed to flush {len(rows)} mass message results, will retry: {e}")
+                return 0
+
+            with self._lock:
+                self._stats["flushes"] += 1
+                self._stats["rows_written"] += len(rows)
+            return len(rows)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"pending": len(self._pending), **self._stats}
+
+
+def _count_results(cur, updated: List, pending: Dict[Tuple[str, str], Tuple[bool, Optional[str]]]) -> None:
+    """Move the batches' sent/failed counters by the difference between the previous and the new results."""
+    totals = defaultdict(lambda: defaultdict(int))   # batch_id -> batch_stats deltas
+    recent = defaultdict(lambda: defaultdict(int))   # batch_id -> batch_stats_minutes deltas
+
+    for row in updated:
+        success = pending[(row.batch_id, row.recipient_id)][0]
+        if success == row.previous_success:
+            continue
+        if row.previous_success is not None:
+            totals[row.batch_id]["messages_sent" if row.previous_success else "messages_failed"] -= 1
+        column = "messages_sent" if success else "messages_failed"
+        totals[row.batch_id][column] += 1
+        recent[row.batch_id][column] += 1
+
+    for batch_id, counts in totals.items():
+        add_batch_counts_sql(cur, batch_id, counts)
+    for batch_id, counts in recent.items():
+        add_batch_minute_counts_sql(cur, batch_id, counts)
+
+
+mass_message_status_writer = MassMessageStatusWriter()
+
+
+def setup_mass_message_status_writer(sched: BackgroundScheduler) -> None:
+    add_internal_interval_job(
+        sched,
+        mass_message_status_writer.flush,
+        seconds=STATUS_FLUSH_INTERVAL_SECONDS,
+        job_id=STATUS_WRITER_JOB_ID,
+    )
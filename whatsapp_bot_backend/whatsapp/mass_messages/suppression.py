@@ -0,0 +1,120 @@
+"""
+Recipient suppression for mass messages.
+
+Successful sends are recorded in recent_sends (phone number, hash of the text actually sent, time)
+by the status writer. When a batch is scheduled, `RecipientFilter` drops:
+  - duplicates within the request: a recipient id or phone number seen before (kept as 64-bit
+    hashes, so an upload of any size only holds 8 bytes per recipient, not the recipients)
+  - with a suppression window, recipients who already got the identical text within it
+    (one set-based anti-join per chunk against recent_sends)
+
+recent_sends rows are kept for RECENT_SENDS_RETENTION, the longest possible window.
+"""
+
+import hashlib
+from datetime import datetime, timedelta
+from typing import List, Optional, Set
+
+from apscheduler.schedulers.background import BackgroundScheduler
+from sqlalchemy import text
+
+from api.base_models import ParticipantItem
+from db.get_cursor import get_cursor
+from job_and_listener.job.core.create.create_job import add_internal_interval_job
+from shared.timezone import TIMEZONE
+from whatsapp.core.core import _phone_number
+from whatsapp.mass_messages.template import compile_template
+
+
+RECENT_SENDS_RETENTION = timedelta(days=7)
+
+RECENT_SENDS_PRUNE_INTERVAL_SECONDS = 60 * 60
+RECENT_SENDS_PRUNER_JOB_ID = "internal/prune_recent_sends"
+
+
+def content_hash(message_text: str) -> str:
+    """Identity of a sent text in recent_sends."""
+    return hashlib.sha256(message_text.encode()).hexdigest()
+
+
+def _key_hash(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+
+
+def find_recently_sent_sql(cur, phone_numbers: List[str], hashes: List[str], since: datetime) -> Set[int]:
+    """
+    Positions (0-based) of the (phone number, content hash) pairs with a recent_sends row since `since`.
+    """
+    rows = cur.execute(
+        text("""
+            SELECT c.idx - 1
+            FROM unnest(CAST(:phones AS text[]), CAST(:hashes AS text[])) WITH ORDINALITY AS c (phone_number, content_hash, idx)
+            WHERE EXISTS (
+                SELECT 1 FROM recent_sends r
+                WHERE r.phone_number = c.phone_number
+                  AND r.content_hash = c.content_hash
+                  AND r.sent_at >= :since
+            )
+        """),
+        {"phones": phone_numbers, "hashes": hashes, "since": since},
+    ).fetchall()
+    return {row[0] for row in rows}
+
+
+class RecipientFilter:
+    """
+    Filters the recipients of one batch, chunk by chunk (see module docstring).
+    Counts what it dropped in `skipped_duplicate` / `skipped_recent`.
+    """
+
+    def __init__(self, message: str, suppress_within: Optional[timedelta] = None):
+        self.template = compile_template(message)
+        self.suppress_within = min(suppress_within, RECENT_SENDS_RETENTION) if suppress_within else None
+        self.skipped_duplicate = 0
+        self.skipped_recent = 0
+        self._seen_ids: Set[int] = set()
+        self._seen_phones: Set[int] = set()
+
+    def filter(self, cur, participants: List[ParticipantItem]) -> List[ParticipantItem]:
+        unique = []
+        for participant in participants:
+            id_key = _key_hash(participant.id)
+            phone_key = _key_hash(_phone_number(participant.phone_number))
+            if id_key in self._seen_ids or phone_key in self._seen_phones:
+                self.skipped_duplicate += 1
+                continue
+            self._seen_ids.add(id_key)
+            self._seen_phones.add(phone_key)
+            unique.append(participant)
+
+        if not self.suppress_within or not unique:
+            return unique
+
+        recent = find_recently_sent_sql(
+            cur,
+            [_phone_number(p.phone_number) for p in unique],
+            [content_hash(self.template.render(p.id, p.phone_number, p.vars)) for p in unique],
+            datetime.now(TIMEZONE) - self.suppress_within,
+        )
+        self.skipped_recent += len(recent)
+        return [p for i, p in enumerate(unique) if i not in recent]
+
+    def report(self) -> dict:
+        return {"skipped_duplicate": self.skipped_duplicate, "skipped_recent": self.skipped_recent}
+
+
+def prune_recent_sends() -> None:
+    with get_cursor() as cur:
+        cur.execute(
+            text("DELETE FROM recent_sends WHERE sent_at < :before"),
+            {"before": datetime.now(TIMEZONE) - RECENT_SENDS_RETENTION},
+        )
+
+
+def setup_recent_sends_pruner(sched: BackgroundScheduler) -> None:
+    add_internal_interval_job(
+        sched,
+        prune_recent_sends,
+        seconds=RECENT_SENDS_PRUNE_INTERVAL_SECONDS,
+        job_id=RECENT_SENDS_PRUNER_JOB_ID,
+    )
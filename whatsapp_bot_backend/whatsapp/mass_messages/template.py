@@ -0,0 +1,104 @@
+"""
+Mass-message templates.
+
+The message of a batch is stored once, in mass_message_batches; jobs and dispatcher rows only
+reference the batch_id. A message may contain `{placeholders}` (`{{`/`}}` for literal braces;
+any other brace is literal text), rendered per recipient at send time from:
+  - `id` and `phone_number` of the recipient
+  - the recipient's `template_vars` (mass_messages.template_vars, from ParticipantItem.vars)
+
+Templates are compiled once per message text and batch messages are cached per batch_id
+(they never change after the batch is created).
+"""
+
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, FrozenSet, Optional, Tuple
+
+from db.get_cursor import get_cursor
+from shared.domain_errors import MessageTemplateError
+from whatsapp.core.group_cache import TTLCache
+from whatsapp.mass_messages.db import get_mass_message_batch
+
+
+# Placeholders always available, from the recipient itself
+BUILTIN_FIELDS = frozenset({"id", "phone_number"})
+
+MESSAGE_TEMPLATE_CACHE_TTL_SECONDS = 60 * 60
+
+# Escaped braces, or a {...} candidate placeholder (without nested braces)
+_TOKEN = re.compile(r"\{\{|\}\}|\{([^{}]*)\}")
+
+
+@dataclass(frozen=True)
+class MessageTemplate:
+    parts: Tuple[Tuple[str, Optional[str]], ...]  # (literal text, field name or None)
+    fields: FrozenSet[str]
+
+    @property
+    def needs_vars(self) -> bool:
+        """True if rendering needs the recipient's template_vars (more than id/phone_number)."""
+        return not self.fields <= BUILTIN_FIELDS
+
+    def missing_fields(self, template_vars: Optional[Dict[str, str]]) -> FrozenSet[str]:
+        """Placeholders a recipient with these template_vars has no value for."""
+        return self.fields - BUILTIN_FIELDS - set(template_vars or {})
+
+    def render(self, recipient_id: str, phone_number: str, template_vars: Optional[Dict[str, str]] = None) -> str:
+        if not self.fields:
+            return self.parts[0][0]
+
+        values = {**(template_vars or {}), "id": recipient_id, "phone_number": phone_number}
+        missing = self.fields - set(values)
+        if missing:
+            raise MessageTemplateError(f"No value for placeholder(s) {sorted(missing)} of recipient {recipient_id}")
+
+        return "".join(
+            literal + (str(values[field]) if field is not None else "")
+            for literal, field in self.parts
+        )
+
+
+@lru_cache(maxsize=256)
+def compile_template(message: str) -> MessageTemplate:
+    """
+    Parse `message` once. Only `{name}` (a Python identifier) is a placeholder; `{{` and `}}` are
+    literal braces. Any other brace is taken as literal text (`{0}`, `{ }`, a lone `{`, JSON, ...),
+    so plain messages never fail to compile.
+    """
+    parts = []
+    literal = []
+    position = 0
+    for match in _TOKEN.finditer(message):
+        literal.append(message[position:match.start()])
+        position = match.end()
+
+        token, field = match.group(0), match.group(1)
+        if field is not None and field.isidentifier():
+            parts.append(("".join(literal), field))
+            literal = []
+        elif token in ("{{", "}}"):
+            literal.append(token[0])
+        else:
+            literal.append(token)
+    literal.append(message[position:])
+
+    fields = frozenset(field for _, field in parts)
+    if not fields:
+        return MessageTemplate(parts=(("".join(literal), None),), fields=fields)
+    return MessageTemplate(parts=tuple(parts) + (("".join(literal), None),), fields=fields)
+
+
+_batch_messages = TTLCache("mass_message_templates", MESSAGE_TEMPLATE_CACHE_TTL_SECONDS, max_entries=256)
+
+
+def get_batch_template(batch_id: str) -> Optional[MessageTemplate]:
+    """Compiled message of the batch, or None if the batch no longer exists."""
+    def load():
+        with get_cursor() as cur:
+            batch = get_mass_message_batch(cur, batch_id)
+        return batch.message if batch is not None else None
+
+    message = _batch_messages.get_or_load(batch_id, load)
+    return compile_template(message) if message is not None else None
@@ -0,0 +1,195 @@
+"""
+Streaming upload of mass-message recipients (CSV or NDJSON request body).
+
+The body is read chunk by chunk and parsed line by line; every UPLOAD_CHUNK_ROWS recipients are
+validated into ParticipantItems, get their send slots reserved after the previous chunk's and are
+bulk-inserted into mass_messages (see add_mass_message_recipients). Only one chunk of recipients
+is held in memory at a time, whatever the size of the list.
+
+Formats (one recipient per line, chosen by Content-Type):
+  - text/csv: a header line with `id` and `phone_number` columns; any other column is a placeholder value.
+    Quoted fields may not contain line breaks.
+  - application/x-ndjson: one JSON object per line, {"id": ..., "phone_number": ..., "vars": {...}}
+"""
+
+import codecs
+import csv
+import json
+from datetime import timedelta
+from typing import AsyncIterable, AsyncIterator, Dict, List, Optional
+
+from pydantic import ValidationError
+from starlette.concurrency import run_in_threadpool
+
+from api.base_models import ParticipantItem
+from shared.domain_errors import RecipientUploadError
+from whatsapp.core.core import _phone_number
+from whatsapp.core.whatsapp_connection import validate_whatsapp_connection
+from whatsapp.mass_messages.mass_messages import (
+    add_mass_message_recipients,
+    next_mass_message_start,
+    start_mass_message_batch,
+)
+from whatsapp.mass_messages.suppression import RecipientFilter
+
+
+# Recipients validated, scheduled and inserted together
+UPLOAD_CHUNK_ROWS = 1000
+
+# A longer line is rejected instead of being buffered
+MAX_LINE_CHARS = 64 * 1024
+
+UPLOAD_FORMAT_CSV = "csv"
+UPLOAD_FORMAT_NDJSON = "ndjson"
+
+UPLOAD_CONTENT_TYPES = {
+    "text/csv": UPLOAD_FORMAT_CSV,
+    "application/csv": UPLOAD_FORMAT_CSV,
+    "application/x-ndjson": UPLOAD_FORMAT_NDJSON,
+    "application/ndjson": UPLOAD_FORMAT_NDJSON,
+    "application/jsonl": UPLOAD_FORMAT_NDJSON,
+}
+
+
+def upload_format(content_type: Optional[str]) -> str:
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    if media_type not in UPLOAD_CONTENT_TYPES:
+        raise RecipientUploadError(
+            f"Unsupported Content-Type {content_type!r}, expected one of {sorted(UPLOAD_CONTENT_TYPES)}"
+        )
+    return UPLOAD_CONTENT_TYPES[media_type]
+
+
+async def _aiter_lines(body: AsyncIterable[bytes]) -> AsyncIterator[str]:
+    """Decoded lines of a UTF-8 byte stream (a leading BOM is dropped)."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    line_no = 0
+
+    async for data in body:
+        pending += decoder.decode(data)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            line_no += 1
+            yield line.rstrip("\r")
+        if len(pending) > MAX_LINE_CHARS:
+            raise RecipientUploadError(f"Line longer than {MAX_LINE_CHARS} characters", line=line_no + 1)
+
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
+
+
+def _participant(fields: Dict, line_no: int) -> ParticipantItem:
+    """Validate one row and normalize it: trimmed id, digits-only phone number."""
+    try:
+        item = ParticipantItem(
+            id=str(fields.get("id", "")).strip(),
+            phone_number=str(fields.get("phone_number", "")),
+            vars=fields.get("vars") or None,
+        )
+    except ValidationError as e:
+        raise RecipientUploadError(str(e), line=line_no)
+
+    phone_number = _phone_number(item.phone_number)
+    if not item.id or not phone_number:
+        raise RecipientUploadError("Both id and phone_number are required", line=line_no)
+    return ParticipantItem(id=item.id, phone_number=phone_number, vars=item.vars)
+
+
+async def aiter_recipient_chunks(
+    body: AsyncIterable[bytes], fmt: str, chunk_rows: int = UPLOAD_CHUNK_ROWS
+) -> AsyncIterator[List[ParticipantItem]]:
+    """Validated recipients of an upload body, `chunk_rows` at a time. Blank lines are skipped."""
+    header = None
+    chunk = []
+    line_no = 0
+
+    async for line in _aiter_lines(body):
+        line_no += 1
+        if not line.strip():
+            continue
+
+        if fmt == UPLOAD_FORMAT_CSV:
+            values = next(csv.reader([line]))
+            if header is None:
+                header = [column.strip() for column in values]
+                if "id" not in header or "phone_number" not in header:
+                    raise RecipientUploadError("CSV header must contain id and phone_number", line=line_no)
+                continue
+            row = dict(zip(header, values))
+            fields = {
+                "id": row.pop("id"),
+                "phone_number": row.pop("phone_number"),
+                "vars": {column: value for column, value in row.items() if column},
+            }
+        else:
+            try:
+                fields = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise RecipientUploadError(f"Invalid JSON: {e}", line=line_no)
+            if not isinstance(fields, dict):
+                raise RecipientUploadError("Expected a JSON object", line=line_no)
+
+        chunk.append(_participant(fields, line_no))
+        if len(chunk) >= chunk_rows:
+            yield chunk
+            chunk = []
+
+    if chunk:
+        yield chunk
+
+
+async def upload_mass_messages_service(
+    sched,
+    cur,
+    body: AsyncIterable[bytes],
+    content_type: Optional[str],
+    name: str,
+    message: str,
+    mode: str,
+    suppress_within_hours: Optional[float] = None,
+):
+    """
+    Create a mass-message batch from a streamed recipient list. All chunks are written in one
+    transaction: a malformed line rolls back the whole upload.
+    Duplicates (across the whole upload) and recently messaged recipients are skipped, see RecipientFilter.
+    """
+    fmt = upload_format(content_type)
+    await run_in_threadpool(validate_whatsapp_connection)
+
+    suppress_within = timedelta(hours=suppress_within_hours) if suppress_within_hours else None
+    recipient_filter = RecipientFilter(message, suppress_within)
+
+    try:
+        batch_id = await run_in_threadpool(start_mass_message_batch, cur, name, message, mode)
+
+        start = None
+        recipients = 0
+        received = 0
+        async for chunk in aiter_recipient_chunks(body, fmt):
+            received += len(chunk)
+            # DB work (anti-join, slot reservation, bulk inserts) stays off the event loop
+            chunk = await run_in_threadpool(recipient_filter.filter, cur, chunk)
+            if not chunk:
+                continue
+            run_times = await run_in_threadpool(
+                add_mass_message_recipients, sched, cur, batch_id, name, message, mode, chunk,
+                start=start, first_chunk=recipients == 0,
+            )
+            start = next_mass_message_start(run_times[-1])
+            recipients += len(chunk)
+
+        if received == 0:
+            raise RecipientUploadError("The upload contains no recipients")
+    except Exception:
+        # get_cursor commits on exit, even after an error
+        await run_in_threadpool(cur.rollback)
+        raise
+
+    return {
+        "message": "Mass messages scheduling initiated.",
+        "batch_id": batch_id,
+        "recipients": recipients,
+        **recipient_filter.report(),
+    }
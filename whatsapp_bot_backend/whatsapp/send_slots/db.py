@@ -0,0 +1,44 @@
+from datetime import datetime
+from typing import List
+
+from sqlalchemy import text
+
+
+# Arbitrary constant key for the transaction-level advisory lock guarding slot allocation
+SEND_SLOTS_LOCK_KEY = 727001
+
+
+def lock_send_slots(cur, pool: str) -> None:
+    """
+    Serialize slot allocation of `pool` across requests/processes (pools don't block each other).
+    The lock is released automatically when the current transaction ends.
+    """
+    cur.execute(text("SELECT pg_advisory_xact_lock(:key, hashtext(:pool))"), {"key": SEND_SLOTS_LOCK_KEY, "pool": pool})
+
+
+def delete_send_slots_before(cur, pool: str, before: datetime) -> None:
+    cur.execute(
+        text("DELETE FROM send_slots WHERE pool = :pool AND slot_at < :before"),
+        {"pool": pool, "before": before},
+    )
+
+
+def get_send_slots_since(cur, pool: str, since: datetime) -> List[datetime]:
+    """
+    Returns the slot times of `pool` reserved at or after `since`, sorted ascending.
+    """
+    rows = cur.execute(
+        text("SELECT slot_at FROM send_slots WHERE pool = :pool AND slot_at >= :since ORDER BY slot_at"),
+        {"pool": pool, "since": since},
+    ).fetchall()
+    return [row[0] for row in rows]
+
+
+def insert_send_slots(cur, pool: str, batch_id: str, slot_times: List[datetime]) -> None:
+    if not slot_times:
+        return
+
+    cur.execute(
+        text("INSERT INTO send_slots (slot_at, batch_id, pool) VALUES (:slot_at, :batch_id, :pool)"),
+        [{"slot_at": slot_at, "batch_id": batch_id, "pool": pool} for slot_at in slot_times],
+    )
@@ -0,0 +1,176 @@
+"""
+Global send-rate planner.
+
+Every batch (mass messages, group jobs) reserves its send times here instead of computing
+spread times on its own, so concurrent batches interleave instead of firing on the same seconds.
+Reserved slots live in the `send_slots` table; allocation is serialized with a Postgres advisory lock.
+
+Slots belong to a pool with its own budget (SLOT_POOL_BUDGETS): mass messages fill the bulk pool,
+group flows reserve from the interactive pool, so a large queued campaign never pushes group
+sends past their deadline.
+
+The messages-per-minute / messages-per-hour budget is enforced as a minimum gap between any two
+reserved slots of a pool: max(60 / per_minute, 3600 / per_hour) seconds. Evenly spaced slots at
+that gap never exceed either budget, so sustained throughput sits exactly at the configured ceiling.
+"""
+
+from bisect import bisect_right, insort
+from datetime import datetime, timedelta
+import logging
+from typing import Iterable, List, Optional
+
+from shared.timezone import TIMEZONE
+from whatsapp.core.business_calendar import BusinessCalendar, get_business_calendar
+from whatsapp.send_slots.db import delete_send_slots_before, get_send_slots_since, insert_send_slots, lock_send_slots
+
+
+# Budget for the Evolution instance, shared by all mass-message batches (bulk pool)
+MESSAGES_PER_MINUTE = 2
+MESSAGES_PER_HOUR = 80
+
+# Budget of the group flows (interactive pool), separate from the bulk one
+GROUP_MESSAGES_PER_MINUTE = 2
+GROUP_MESSAGES_PER_HOUR = 80
+
+SLOT_POOL_BULK = "bulk"
+SLOT_POOL_INTERACTIVE = "interactive"
+
+SLOT_POOL_BUDGETS = {
+    SLOT_POOL_BULK: (MESSAGES_PER_MINUTE, MESSAGES_PER_HOUR),
+    SLOT_POOL_INTERACTIVE: (GROUP_MESSAGES_PER_MINUTE, GROUP_MESSAGES_PER_HOUR),
+}
+
+# Slots older than this are deleted when new slots are allocated
+SLOT_RETENTION = timedelta(days=1)
+
+
+def min_slot_gap(per_minute: int = MESSAGES_PER_MINUTE, per_hour: int = MESSAGES_PER_HOUR) -> timedelta:
+    """
+    Minimum distance between any two reserved slots for the given budget.
+    """
+    return timedelta(seconds=max(60 / per_minute, 3600 / per_hour))
+
+
+class _SlotAllocator:
+    """
+    In-memory view of the reserved slots used while one allocation holds the lock.
+    """
+
+    def __init__(self, reserved: List[datetime], gap: timedelta, calendar: BusinessCalendar):
+        self.reserved = [slot.timestamp() for slot in reserved]  # sorted epochs
+        self.gap = gap.total_seconds()
+        self.calendar = calendar
+
+    def first_free_at_or_after(self, desired: datetime) -> datetime:
+        """
+        First instant >= `desired` that is open in the calendar and at least `gap` away
+        from every reserved slot. Reserves it before returning.
+        """
+        candidate = self.calendar.next_open(desired)
+
+        while True:
+            ts = candidate.timestamp()
+
+            # first reserved slot that is closer than `gap` on the left, or anywhere on the right
+            i = bisect_right(self.reserved, ts - self.gap)
+            if i < len(self.reserved) and self.reserved[i] < ts + self.gap:
+                candidate = self.calendar.next_open(
+                    datetime.fromtimestamp(self.reserved[i] + self.gap, TIMEZONE)
+                )
+                continue
+
+            insort(self.reserved, ts)
+            return candidate
+
+    def reserve(self, slot: datetime) -> None:
+        """Reserve `slot` as is, even if it's closer than `gap` to another slot."""
+        insort(self.reserved, slot.timestamp())
+
+    def release(self, slot: datetime) -> None:
+        self.reserved.remove(slot.timestamp())
+
+
+def pool_slot_gap(pool: str) -> timedelta:
+    return min_slot_gap(*SLOT_POOL_BUDGETS[pool])
+
+
+def _open_allocator(cur, pool: str, gap: timedelta, calendar: BusinessCalendar) -> _SlotAllocator:
+    lock_send_slots(cur, pool)
+
+    now = datetime.now(TIMEZONE)
+    delete_send_slots_before(cur, pool, now - SLOT_RETENTION)
+
+    return _SlotAllocator(get_send_slots_since(cur, pool, now - gap), gap, calendar)
+
+
+def reserve_next_slots(
+    cur,
+    batch_id: str,
+    runs: int,
+    start: datetime,
+    min_diff: timedelta,
+    *,
+    calendar: Optional[BusinessCalendar] = None,
+    gap: Optional[timedelta] = None,
+    pool: str = SLOT_POOL_BULK,
+) -> List[datetime]:
+    """
+    Reserve the next `runs` free send slots of `pool` for `batch_id`, starting at `start`.
+
+    Consecutive slots of the batch are at least `min_diff` business seconds apart (as with
+    compute_spread_times), and every slot is at least `gap` (default: the pool's budget) away
+    from any slot reserved in the pool by any batch. Returns the slot times in increasing order.
+    """
+    calendar = calendar if calendar is not None else get_business_calendar()
+    gap = gap if gap is not None else pool_slot_gap(pool)
+
+    allocator = _open_allocator(cur, pool, gap, calendar)
+
+    slots = []
+    desired = start
+    for _ in range(runs):
+        slot = allocator.first_free_at_or_after(desired)
+        slots.append(slot)
+        desired = calendar.add_business_seconds(slot, min_diff.total_seconds())
+
+    insert_send_slots(cur, pool, batch_id, slots)
+    return slots
+
+
+def reserve_slots_at(
+    cur,
+    batch_id: str,
+    desired_times: Iterable[datetime],
+    *,
+    latest: Optional[datetime] = None,
+    calendar: Optional[BusinessCalendar] = None,
+    gap: Optional[timedelta] = None,
+    pool: str = SLOT_POOL_INTERACTIVE,
+) -> List[datetime]:
+    """
+    Reserve, for each desired time, the first free send slot of `pool` at or after it (used by
+    the deadline-based group schedulers, which already computed their spread).
+
+    A slot that would land after `latest` (the pool's budget is exhausted until the deadline)
+    is taken at the desired time instead: a deadline is worth more than the budget. It's still
+    reserved, so later allocations keep their distance from it.
+    """
+    calendar = calendar if calendar is not None else get_business_calendar()
+    gap = gap if gap is not None else pool_slot_gap(pool)
+
+    allocator = _open_allocator(cur, pool, gap, calendar)
+
+    slots = []
+    for desired in desired_times:
+        slot = allocator.first_free_at_or_after(desired)
+        if latest is not None and slot > latest:
+            logging.warning(
+                f"No free {pool} send slot between {desired} and {latest}: sending at {desired}, over the budget"
+            )
+            allocator.release(slot)
+            allocator.reserve(desired)
+            slot = desired
+        slots.append(slot)
+
+    insert_send_slots(cur, pool, batch_id, slots)
+    return slots
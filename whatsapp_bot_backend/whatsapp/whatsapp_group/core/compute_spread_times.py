@@ -1,12 +1,16 @@
 # Standard library imports
+from array import array
+from bisect import bisect_right
 from datetime import datetime, time, timedelta
+from functools import lru_cache
 import logging
-from typing import List, Optional, Tuple
+from typing import Iterable, Iterator, List, Optional, Tuple
 from zoneinfo import ZoneInfo
 
 # Project-specific imports
 from shared.timezone import TIMEZONE
 from whatsapp.core.core import BUSINESS_HOURS_DEFAULT
+from whatsapp.core.business_calendar import BusinessCalendar
 
 
 # Oct 1, 2025 00:00, timezone-aware
@@ -15,101 +19,118 @@ OCT1 = datetime(2025, 10, 1, 0, 0, tzinfo=TIMEZONE)
 
 
 
+def _time_to_seconds(t: time) -> int:
+    return t.hour * 3600 + t.minute * 60 + t.second
+
+
+@lru_cache(maxsize=16)
+def _weekly_tables(business_hours: Tuple[Tuple[time, time], ...]) -> Tuple[Tuple[int, ...], Tuple[int, ...], Tuple[int, ...], int]:
+    """
+    Precompute the weekly calendar tables for the given business hours.
+
+    Returns (day_start_seconds, day_business_seconds, prefix, week_seconds) where:
+      - day_start_seconds[wd]    = opening time of weekday `wd` in seconds since midnight
+      - day_business_seconds[wd] = business seconds in a full weekday `wd` (Monday=0)
+      - prefix[k]                = business seconds in the first `k` days counted from OCT1 (k = 0..7)
+      - week_seconds             = business seconds in a full week (== prefix[7])
+    """
+    day_start_seconds = tuple(_time_to_seconds(start_time) for start_time, _ in business_hours)
+    day_business_seconds = tuple(
+        max(0, _time_to_seconds(end_time) - _time_to_seconds(start_time))
+        for start_time, end_time in business_hours
+    )
+
+    # Cumulative table starts on OCT1's weekday, so whole weeks since OCT1 line up with it
+    first_weekday = OCT1.weekday()
+    prefix = [0]
+    for i in range(7):
+        prefix.append(prefix[-1] + day_business_seconds[(first_weekday + i) % 7])
+
+    return day_start_seconds, day_business_seconds, tuple(prefix), prefix[7]
+
+
+def _get_weekly_tables(business_hours: list):
+    # lists are not hashable - freeze them so the tables are computed once per configuration
+    return _weekly_tables(tuple(tuple(day) for day in business_hours))
+
+
 def business_seconds_since_oct1(dt: datetime, business_hours: list = BUSINESS_HOURS_DEFAULT) -> float:
     """
     Compute business seconds since Oct 1 00:00, given 7 pairs of business hours per weekday.
     business_hours[0] = Monday, ..., [6] = Sunday
 
-    After processing the current day we move `current` to 23:59:59 of the previous day
-    (instead of simply subtracting one day from the same time).
+    Every full day between Oct 1 and the day of `dt` contributes its whole business window,
+    so those days are summed in constant time: whole weeks via division and the remaining
+    days via the weekly prefix table. Only the day of `dt` itself is partial.
     """
 
     if dt < OCT1:
         raise ValueError("dt must be after Oct 1 00:00")
 
-    total_seconds = 0
-    current = dt
-
-    while current >= OCT1:
-        wd = current.weekday()  # Monday=0
-        start_time, end_time = business_hours[wd]
-
-        t = current.time()
+    day_start_seconds, day_business_seconds, prefix, week_seconds = _get_weekly_tables(business_hours)
 
-        start_sec = start_time.hour * 3600 + start_time.minute * 60 + start_time.second
-        end_sec   = end_time.hour * 3600 + end_time.minute * 60 + end_time.second
-        current_sec = t.hour * 3600 + t.minute * 60 + t.second
+    # full days strictly before the day of dt
+    full_days = max(0, (dt.date() - OCT1.date()).days)
+    full_weeks, remaining_days = divmod(full_days, 7)
+    total_seconds = full_weeks * week_seconds + prefix[remaining_days]
 
-        # compute seconds added for this day
-        if current_sec >= end_sec:
-            added_sec = max(0, end_sec - start_sec)
-        elif current_sec >= start_sec:
-            added_sec = max(0, current_sec - start_sec)
-        else:
-            added_sec = 0
+    # partial day of dt
+    wd = dt.weekday()  # Monday=0
+    start_sec = day_start_seconds[wd]
+    end_sec = start_sec + day_business_seconds[wd]
+    t = dt.time()
+    current_sec = t.hour * 3600 + t.minute * 60 + t.second
 
-        total_seconds += added_sec
-        
-        # print(f"Date: {current.date()}, Added seconds: {added_sec}, Total seconds: {total_seconds}")
+    if current_sec >= end_sec:
+        added_sec = day_business_seconds[wd]
+    elif current_sec >= start_sec:
+        added_sec = current_sec - start_sec
+    else:
+        added_sec = 0
 
-        # move to previous day at 23:59:59
-        prev_date = (current.date() - timedelta(days=1))
-        current = datetime(
-            prev_date.year,
-            prev_date.month,
-            prev_date.day,
-            23, 59, 59,
-            tzinfo=TIMEZONE
-        )
-
-    return total_seconds
+    return total_seconds + added_sec
 
     
 
 def convert_business_seconds_since_oct1_to_date(business_seconds: int, business_hours: list = BUSINESS_HOURS_DEFAULT, use_logging = True) -> datetime:
     """
     Convert business seconds since Oct 1 00:00 back to a datetime.
+
+    Whole weeks are skipped via division, then the day inside the week is found
+    in the 7-entry prefix table (days without business hours are skipped over).
     """
-    current = OCT1
-    remaining_seconds = business_seconds
+    log = logging.debug if use_logging else print
 
+    if business_seconds < 0:
+        raise ValueError("business_seconds must be non-negative")
 
-    log = logging.debug if use_logging else print
+    day_start_seconds, _, prefix, week_seconds = _get_weekly_tables(business_hours)
 
-    log(f"Converting business seconds back to date...{ business_seconds }") 
-
-    while remaining_seconds >= 0:
-        wd = current.weekday()  # Monday=0
-        start_time, end_time = business_hours[wd]
-
-        start_sec = start_time.hour * 3600 + start_time.minute * 60 + start_time.second
-        end_sec   = end_time.hour * 3600 + end_time.minute * 60 + end_time.second
-        business_day_seconds =  end_sec - start_sec
-
-        if remaining_seconds >= business_day_seconds:
-            
-            # Move to next day
-            remaining_seconds -= business_day_seconds
-            log(f"Date: {current.date()}, Consuming full business day seconds: {business_day_seconds}, Remaining seconds before: {remaining_seconds}")
-            
-            current += timedelta(days=1)
-        else:
-            # Add the remaining time inside the current business day
-            result = datetime(
-                current.year,
-                current.month,
-                current.day,
-                start_time.hour,
-                start_time.minute,
-                start_time.second, 
-                tzinfo=TIMEZONE
-            ) + timedelta(seconds=remaining_seconds)
-            
-            log(f"Date: {current.date()}, Consuming remaining seconds: {remaining_seconds}, Result: {result.isoformat()}")
-            
-            return result
-        
-    raise Exception("Should not reach here if business_seconds > 0") #DEBUG
+    if week_seconds <= 0:
+        raise ValueError("business_hours has no business time in the week")
+
+    full_weeks, remaining_seconds = divmod(business_seconds, week_seconds)
+
+    # last day whose cumulative start is <= remaining_seconds (so empty days are skipped)
+    day_in_week = bisect_right(prefix, remaining_seconds) - 1
+    remaining_seconds -= prefix[day_in_week]
+
+    day = OCT1.date() + timedelta(days=int(full_weeks) * 7 + day_in_week)
+    start_sec = day_start_seconds[day.weekday()]
+
+    result = datetime(
+        day.year,
+        day.month,
+        day.day,
+        start_sec // 3600,
+        (start_sec // 60) % 60,
+        start_sec % 60,
+        tzinfo=TIMEZONE
+    ) + timedelta(seconds=remaining_seconds)
+
+    log(f"Converted business seconds {business_seconds} to date: {result.isoformat()}")
+
+    return result
 
     
 
@@ -136,23 +157,146 @@ def test_business_seconds_since_oct1():
     
     
 
+def _iter_business_seconds_to_dates(business_seconds_list: Iterable[int], business_hours: list = BUSINESS_HOURS_DEFAULT) -> Iterator[datetime]:
+    """
+    Convert a non-decreasing stream of business seconds since Oct 1 to datetimes in a single
+    forward pass over the calendar. Gives the same result as calling
+    `convert_business_seconds_since_oct1_to_date` on every item, without re-deriving the day each time.
+    """
+    day_start_seconds, day_business_seconds, _, week_seconds = _get_weekly_tables(business_hours)
+
+    if week_seconds <= 0:
+        raise ValueError("business_hours has no business time in the week")
+
+    day = OCT1.date()               # current day of the walk
+    day_begin_business_seconds = 0  # business seconds consumed before `day`
+    day_opening = None              # opening datetime of `day`, built lazily once per day
+
+    for business_seconds in business_seconds_list:
+        if business_seconds < day_begin_business_seconds:
+            raise ValueError("business seconds must be given in non-decreasing order")
+
+        # Jump over whole weeks at once, then walk at most 7 days
+        full_weeks = (business_seconds - day_begin_business_seconds) // week_seconds
+        if full_weeks:
+            day += timedelta(days=int(full_weeks) * 7)
+            day_begin_business_seconds += full_weeks * week_seconds
+            day_opening = None
+
+        while business_seconds >= day_begin_business_seconds + day_business_seconds[day.weekday()]:
+            day_begin_business_seconds += day_business_seconds[day.weekday()]
+            day += timedelta(days=1)
+            day_opening = None
+
+        if day_opening is None:
+            start_sec = day_start_seconds[day.weekday()]
+            day_opening = datetime(
+                day.year,
+                day.month,
+                day.day,
+                start_sec // 3600,
+                (start_sec // 60) % 60,
+                start_sec % 60,
+                tzinfo=TIMEZONE
+            )
+
+        yield day_opening + timedelta(seconds=business_seconds - day_begin_business_seconds)
+
+
+def _spread_business_seconds(
+    start: datetime,
+    runs: int,
+    deadline: Optional[datetime] = None,
+    min_diff: Optional[timedelta] = None,
+    calendar: Optional[BusinessCalendar] = None,
+) -> Tuple[float, float]:
+    """
+    Returns (start business seconds, business seconds between runs) for a spread.
+    The spacing comes from `deadline` when given (which must not be before `start`, and is validated
+    against `min_diff` if both are given), otherwise from `min_diff`.
+
+    Business seconds are counted by `calendar` when given, otherwise since Oct 1 with the default weekly hours.
+    """
+    if deadline is None and min_diff is None:
+        raise ValueError("At least one of `deadline` or `min_diff` must be provided.")
+
+    to_business_seconds = calendar.business_seconds_at if calendar is not None else business_seconds_since_oct1
+
+    start_business_seconds = to_business_seconds(start)
+
+    if deadline is None:
+        return start_business_seconds, min_diff.total_seconds()
+
+    deadline_business_seconds = to_business_seconds(deadline)
+    if deadline_business_seconds < start_business_seconds:
+        raise ValueError(f"deadline ({deadline.isoformat()}) is before start ({start.isoformat()})")
+
+    business_seconds_diff_between_runs = (deadline_business_seconds - start_business_seconds) / runs
+
+    # If min_diff is also provided, validate spacing
+    if min_diff is not None:
+        min_diff_seconds = min_diff.total_seconds()
+        if business_seconds_diff_between_runs < min_diff_seconds:
+            raise ValueError(
+                f"Computed spacing between runs ({business_seconds_diff_between_runs}s) "
+                f"is less than min_diff ({min_diff_seconds}s)"
+            )
+
+    return start_business_seconds, business_seconds_diff_between_runs
+
+
+def compute_spread_times_batch(
+    start: datetime,
+    runs: int,
+    min_diff: Optional[timedelta] = None,
+    deadline: Optional[datetime] = None,
+    calendar: Optional[BusinessCalendar] = None,
+) -> Iterator[datetime]:
+    """
+    Yield `runs` spread times as a sorted stream, walking the business calendar once.
+
+    Same semantics as `compute_spread_times`: the spacing is based on `deadline` when given
+    (and validated against `min_diff`), otherwise on `min_diff`. Validation errors are raised
+    when the generator is created, not on first iteration.
+
+    When `calendar` is given its business hours and per-date overrides (holidays) are used,
+    otherwise the default weekly business hours.
+    """
+    start_business_seconds, diff_between_runs = _spread_business_seconds(start, runs, deadline, min_diff, calendar)
+
+    business_seconds_list = (int(start_business_seconds + diff_between_runs * i) for i in range(runs))
+
+    if calendar is not None:
+        return calendar.iter_dates_at_business_seconds(business_seconds_list)
+    return _iter_business_seconds_to_dates(business_seconds_list)
+
+
+def compute_spread_epochs_batch(
+    start: datetime,
+    runs: int,
+    min_diff: Optional[timedelta] = None,
+    deadline: Optional[datetime] = None,
+    calendar: Optional[BusinessCalendar] = None,
+) -> array:
+    """
+    Same as `compute_spread_times_batch`, but returns a compact array of epoch seconds.
+    """
+    return array("d", (
+        run_time.timestamp()
+        for run_time in compute_spread_times_batch(start, runs, min_diff, deadline, calendar)
+    ))
+
+
 def compute_spread_time_based_on_deadline(start: datetime, deadline: datetime, runs: int = 3) -> Tuple[List[datetime], float]:
     """
     Compute `runs` datetimes evenly spaced between `start` (inclusive) and `deadline` (exclusive)
     based on deadline. Returns a tuple of the list of datetimes and business seconds between runs.
     """
-    start_business_seconds = business_seconds_since_oct1(start)
-    deadline_business_seconds = business_seconds_since_oct1(deadline)
-    
-    business_seconds_diff = deadline_business_seconds - start_business_seconds
-    business_seconds_diff_between_runs = business_seconds_diff / runs
-
-    times = [
-        convert_business_seconds_since_oct1_to_date(
-            int(start_business_seconds + business_seconds_diff_between_runs * i)
-        )
-        for i in range(runs)
-    ]
+    start_business_seconds, business_seconds_diff_between_runs = _spread_business_seconds(start, runs, deadline=deadline)
+
+    times = list(_iter_business_seconds_to_dates(
+        int(start_business_seconds + business_seconds_diff_between_runs * i) for i in range(runs)
+    ))
 
     return times, business_seconds_diff_between_runs
 
@@ -169,54 +313,22 @@ def compute_spread_time_based_on_min_diff(start: datetime, min_diff: timedelta,
     Returns:
         List of datetime objects
     """
-    # Convert start to business seconds
-    start_business_seconds = business_seconds_since_oct1(start)
-    
-    # Convert min_diff to seconds
-    min_diff_seconds = min_diff.total_seconds()
-
-    # Generate the list of business seconds for each run
-    business_seconds_list = [
-        start_business_seconds + min_diff_seconds * i
-        for i in range(runs)
-    ]
-
-    # Convert back to datetime objects
-    return [
-        convert_business_seconds_since_oct1_to_date(int(business_sec))
-        for business_sec in business_seconds_list
-    ]
+    return list(compute_spread_times_batch(start, runs, min_diff=min_diff))
 
 
 def compute_spread_times(
     start: datetime,
     deadline: Optional[datetime] = None,
     min_diff: Optional[timedelta] = None,
-    runs: int = 3
+    runs: int = 3,
+    calendar: Optional[BusinessCalendar] = None,
 ) -> List[datetime]:
     """
     Compute spread times between `start` and either `deadline` or using `min_diff`.
     Must provide at least one of `deadline` or `min_diff`.
+    Pass `calendar` to respect its per-date overrides (holidays).
     """
-    if deadline is None and min_diff is None:
-        raise ValueError("At least one of `deadline` or `min_diff` must be provided.")
-
-    if deadline is not None:
-        times, business_seconds_diff_between_runs = compute_spread_time_based_on_deadline(start, deadline, runs)
-
-        # If min_diff is also provided, validate spacing
-        if min_diff is not None:
-            min_diff_seconds = min_diff.total_seconds()
-            if business_seconds_diff_between_runs < min_diff_seconds:
-                raise ValueError(
-                    f"Computed spacing between runs ({business_seconds_diff_between_runs}s) "
-                    f"is less than min_diff ({min_diff_seconds}s)"
-                )
-
-        return times
-
-    # Only min_diff is provided
-    return compute_spread_time_based_on_min_diff(start, min_diff, runs)
+    return list(compute_spread_times_batch(start, runs, min_diff=min_diff, deadline=deadline, calendar=calendar))
 
 
 def test_compute_spread_times1():
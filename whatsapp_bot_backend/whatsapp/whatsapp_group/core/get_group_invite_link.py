@@ -1,7 +1,10 @@
 from whatsapp.core.evo_request import evo_request_with_retries
+from whatsapp.core.group_cache import group_invite_link_cache
 
 
 def get_group_invite_link(group_id: str) -> str:
-    resp_json = evo_request_with_retries(f"group/inviteCode", get=True, params={"groupJid": group_id}).json()
+    def load():
+        resp_json = evo_request_with_retries("group/inviteCode", method="GET", params={"groupJid": group_id}).json()
+        return resp_json.get("inviteUrl")
 
-    return resp_json.get("inviteUrl") 
\ No newline at end of file
+    return group_invite_link_cache.get_or_load(group_id, load)
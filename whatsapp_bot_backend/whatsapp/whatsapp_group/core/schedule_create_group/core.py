@@ -1,8 +1,9 @@
-from typing import List
+from typing import List, Optional
 
 from zoneinfo import ZoneInfo
 
-from whatsapp.core.core import BUSINESS_HOURS_DEFAULT, _phone_number
+from whatsapp.core.core import _phone_number
+from whatsapp.core.business_calendar import BusinessCalendar, get_business_calendar
 from whatsapp.whatsapp_group.features.participants.db import _save_group_and_participants
 from whatsapp.core.evo_request import  evo_request_with_retries
 
@@ -89,10 +90,10 @@ def schedule_add_participants_in_batches(
 
 
 def validate_deadline(deadline: datetime, min_minutes_ahead: int = 5, 
-                      bussiness_hours: list = BUSINESS_HOURS_DEFAULT) -> None:
+                      calendar: Optional[BusinessCalendar] = None) -> None:
     """
     Validates that the deadline is at least `min_minutes_ahead` minutes in the future
-    and falls within business hours.
+    and falls within business hours (holidays and other per-date overrides included).
     
     Raises:
         ValueError: If the deadline is too close, in the past, or outside business hours.
@@ -100,6 +101,7 @@ def validate_deadline(deadline: datetime, min_minutes_ahead: int = 5,
     tz = TIMEZONE
     now = datetime.now(tz)
     min_delta = timedelta(minutes=min_minutes_ahead)
+    calendar = calendar if calendar is not None else get_business_calendar()
 
     if deadline <= now + min_delta:
         raise ValueError(
@@ -107,14 +109,14 @@ def validate_deadline(deadline: datetime, min_minutes_ahead: int = 5,
             f"Current time: {now}\nDeadline: {deadline}"
         )
 
-    weekday = deadline.weekday()  # 0 = Monday, 6 = Sunday
-    start_time, end_time = bussiness_hours[weekday]
+    hours = calendar.hours_on(deadline.date())
 
-    if start_time == end_time:
+    if hours is None:
         raise ValueError(
             f"❌ Invalid deadline: {deadline} is on a non-working day (closed hours)."
         )
 
+    start_time, end_time = hours
     if not (start_time <= deadline.time() <= end_time):
         raise ValueError(
             f"❌ Invalid deadline: {deadline} is outside business hours "
@@ -8,9 +8,11 @@ from whatsapp.whatsapp_group.models.whatsapp_group_create import WhatsappGroupCr
 
 from datetime import datetime, timedelta
 
-from job_and_listener.job.core.create.create_job import create_job
+from job_and_listener.job.core.create.create_job import create_jobs_bulk
 from job_and_listener.job.models.job_model import JobAction, JobMetadata, JobSchedule, Job
 from whatsapp.whatsapp_group.core.compute_spread_times import compute_spread_times
+from whatsapp.core.business_calendar import get_business_calendar
+from whatsapp.send_slots.planner import SLOT_POOL_INTERACTIVE, reserve_slots_at
 
 def get_job_metadatas(description, batch_id, num_jobs):
     
@@ -55,11 +57,13 @@ def schedule_deadline_jobs(cur, req: WhatsappGroupCreate, group_id: str, runs: i
     )
 
     
-    run_times = compute_spread_times(start, deadline=deadline, min_diff=timedelta(minutes=1), runs=runs)
+    run_times = compute_spread_times(start, deadline=deadline, min_diff=timedelta(minutes=1), runs=runs,
+                                     calendar=get_business_calendar())
+    # Move each run to the nearest free slot of the group flows' send budget (not the mass-message one)
+    run_times = reserve_slots_at(cur, req.job_batch_name, run_times, latest=deadline, pool=SLOT_POOL_INTERACTIVE)
     schedules = [ JobSchedule(run_time=run_time) for run_time in run_times]
     
     jobs = [ Job(metadata=metadata, action=action, schedule=schedule) for metadata,action, schedule in zip(metadatas, actions, schedules) ]
     
-    for j in jobs:
-        create_job(cur, req.sched, j)
+    create_jobs_bulk(cur, req.sched, jobs)
     
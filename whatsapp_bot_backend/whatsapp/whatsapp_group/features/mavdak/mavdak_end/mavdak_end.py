@@ -2,6 +2,7 @@ from datetime import datetime
 from apscheduler.schedulers.background import BackgroundScheduler
 from job_and_listener.job.models.job_model import JobAction, JobMetadata, JobSchedule, Job
 from job_and_listener.job.core.create.create_job import create_job
+from job_and_listener.job_priority import PRIORITY_CRITICAL
 from whatsapp.whatsapp_group.features.mavdak.mavdak_end.models.mavdak_end_job_func import MavdakEndJobFunc
 
 def mavdak_end(mavdak_group_id: str, when_to_send: datetime, sched: BackgroundScheduler, job_batch_name : str, cur) -> None:
@@ -19,7 +20,8 @@ def mavdak_end(mavdak_group_id: str, when_to_send: datetime, sched: BackgroundSc
         func=MavdakEndJobFunc.job,
         run_args={"mavdak_group_id": mavdak_group_id},
     )
-    schedule = JobSchedule(run_time=when_to_send)
+    # time-critical: must not wait behind mass-message jobs
+    schedule = JobSchedule(run_time=when_to_send, priority=PRIORITY_CRITICAL)
 
     job = Job(metadata=metadata, action=action, schedule=schedule)
     create_job(cur, sched, job)
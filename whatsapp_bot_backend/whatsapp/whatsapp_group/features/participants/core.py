@@ -1,8 +1,24 @@
 from typing import List
 from whatsapp.core.evo_request import evo_request_with_retries
 from whatsapp.core.core import _phone_number
+from whatsapp.core.group_cache import group_participants_cache
 
 
+def fetch_group_participants(group_id: str) -> List[dict]:
+    """
+    Raw participants list of the group from Evolution's group/participants endpoint,
+    cached per groupJid (see whatsapp.core.group_cache).
+    """
+    def load():
+        resp_json = evo_request_with_retries(
+            "group/participants",
+            params={"groupJid": group_id},
+            method="GET",
+        ).json()
+        return resp_json.get("participants", []) or []
+
+    return group_participants_cache.get_or_load(group_id, load)
+
 
 def get_group_member_ids(group_id: str) -> List[str]:
     """
@@ -10,13 +26,7 @@ def get_group_member_ids(group_id: str) -> List[str]:
     Uses Evolution API /group/participants endpoint with query parameter 'groupJid'.
     """
         
-    resp_json = evo_request_with_retries(
-        "group/participants",
-        params={"groupJid": group_id},
-        method="GET",
-    ).json()
-
-    participants = resp_json.get("participants", []) or []
+    participants = fetch_group_participants(group_id)
 
     out = []
     for p in participants:
@@ -36,12 +46,7 @@ def get_group_participants(gid: str, excluded: list[str]) -> dict:
     Calls the EVO API, maps participants to phone numbers,
     and filters out excluded participants.
     """
-    resp = evo_request_with_retries(
-        "/group/participants",
-        method="GET",
-        params={"groupJid": gid}
-    )
-    participants_json = resp.json().get("participants", [])
+    participants_json = fetch_group_participants(gid)
     all_numbers = [_phone_number(p["phoneNumber"]) for p in participants_json]
 
     all_numbers_without_excluded = [n for n in all_numbers if n not in excluded]
@@ -1,5 +1,17 @@
 from sqlalchemy import text
 
+from db.bulk import bulk_insert
+
+
+def _insert_participants(cur, group_id: str, phone_numbers: list[str]) -> None:
+    bulk_insert(
+        cur,
+        "participants",
+        ["phone_number", "group_id"],
+        ({"phone_number": phone_number, "group_id": group_id} for phone_number in phone_numbers),
+    )
+
+
 def change_participants(cur, group_id, new_participants):
     
     # Delete all existing participants for the group
@@ -9,23 +21,12 @@ def change_participants(cur, group_id, new_participants):
     )
 
     # Insert new participants
-    for phone_number in new_participants:
-        cur.execute(
-            text(
-                "INSERT INTO participants (phone_number, group_id) VALUES (:phone, :gid)"
-            ),
-            {"phone": phone_number, "gid": group_id}
-        )
+    _insert_participants(cur, group_id, new_participants)
 
 
 def _save_group_and_participants(cur, group_id: str, participants: list[str]) -> None:
     """
     Insert group info and participants into the DB.
-
-    Logic kept identical to the original:
-    - single INSERT into group_info
-    - then a simple for-loop inserting each participant one-by-one
-    - same SQL and parameter names
     """
     # Insert into group_info
     cur.execute(
@@ -33,12 +34,5 @@ def _save_group_and_participants(cur, group_id: str, participants: list[str]) ->
         {"gid": group_id},
     )
 
-    # Insert participants (one-by-one, same logic as before)
-    for phone_number in participants:
-        cur.execute(
-            text(
-                "INSERT INTO participants (phone_number, group_id) VALUES (:phone_number, :gid)"
-            ),
-            {"gid": group_id, "phone_number": phone_number},
-        )
+    _insert_participants(cur, group_id, participants)
 